@@ -0,0 +1,89 @@
+"""JSON API против HTML-страниц тех же лент: размер ответа и время.
+
+    python -m benchmarks.bench_api --posts 100000
+
+Для каждой ленты замеряются HTML-страница, первая страница API со всеми
+полями и с ?fields=id,text, а также повторный запрос API с
+If-None-Match, на который сервер отвечает 304 без обращения к БД.
+"""
+import argparse
+
+from .utils import remove_database, seed, setup_django, temp_database, timeit
+
+
+def measure(client, url, repeat, **headers):
+    response = client.get(url, **headers)
+    size = len(response.content)
+    return response, size, timeit(lambda: client.get(url, **headers), repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=100000)
+    parser.add_argument(
+        '--database', help='файл SQLite (по умолчанию временный)'
+    )
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    database = args.database or temp_database()
+    setup_django(database)
+    from django.core.management import call_command
+    from django.test import Client
+    from django.urls import reverse
+
+    from posts.models import Follow, Group, Post
+
+    try:
+        call_command('migrate', verbosity=0)
+        if not args.database:
+            seed(users=1000, posts=args.posts, follows=20000, comments=50000)
+            call_command('reconcile_counters', verbosity=0)
+            call_command('rebuild_timeline', verbosity=0)
+        client = Client()
+        follow = Follow.objects.select_related('user').first()
+        reader = Client()
+        reader.force_login(follow.user)
+        slug = Group.objects.values_list('slug', flat=True).first()
+        post = Post.objects.order_by('-comments_count').first()
+        feeds = {
+            'index': (client, reverse('posts:index'), reverse('api:posts')),
+            'group': (
+                client, reverse('posts:group_list', args=[slug]),
+                reverse('api:group_posts', args=[slug]),
+            ),
+            'profile': (
+                client, reverse('posts:profile', args=[post.author.username]),
+                reverse('api:profile_posts', args=[post.author.username]),
+            ),
+            'comments': (
+                client, reverse('posts:post_detail', args=[post.pk]),
+                reverse('api:post_comments', args=[post.pk]),
+            ),
+            'follow': (
+                reader, reverse('posts:follow_index'),
+                reverse('api:follow_posts'),
+            ),
+        }
+        print(f"{'лента':<10}{'ответ':<16}{'байт':>9}{'мс':>9}")
+        for name, (user_client, html_url, api_url) in feeds.items():
+            rows = {
+                'HTML': measure(user_client, html_url, args.repeat),
+                'API': measure(user_client, api_url, args.repeat),
+                'API id,text': measure(
+                    user_client, api_url + '?fields=id,text', args.repeat
+                ),
+            }
+            etag = rows['API'][0]['ETag']
+            rows['API 304'] = measure(
+                user_client, api_url, args.repeat, HTTP_IF_NONE_MATCH=etag
+            )
+            for title, (_, size, milliseconds) in rows.items():
+                print(f'{name:<10}{title:<16}{size:>9}{milliseconds:>9.2f}')
+    finally:
+        if not args.database:
+            remove_database(database)
+
+
+if __name__ == '__main__':
+    main()
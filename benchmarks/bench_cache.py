@@ -0,0 +1,93 @@
+"""LocMemCache против SQLiteCache на операциях кэша лент.
+
+    python -m benchmarks.bench_cache --keys 1000 --workers 4
+
+Сначала замеряются get_many/set_many/incr в одном процессе, затем
+несколько процессов одновременно увеличивают общий счётчик поколения:
+у LocMemCache каждый процесс видит только свой счётчик.
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from .utils import setup_django, timeit
+
+
+def backends(directory, max_entries):
+    from django.core.cache.backends.locmem import LocMemCache
+
+    from core.cache import SQLiteCache
+
+    params = {'OPTIONS': {'MAX_ENTRIES': max_entries}}
+    return {
+        'LocMemCache': LocMemCache('bench', params),
+        'SQLiteCache': SQLiteCache(
+            os.path.join(directory, 'cache.sqlite3'), params
+        ),
+    }
+
+
+def single_process(cache, keys):
+    fragments = {f'fragment:{i}': 'x' * 2000 for i in range(keys)}
+    names = list(fragments)
+    cache.set('generation', 1)
+    return {
+        'set_many': timeit(lambda: cache.set_many(fragments)),
+        'get_many': timeit(lambda: cache.get_many(names)),
+        'get': timeit(lambda: [cache.get(name) for name in names[:100]]),
+        'incr x100': timeit(
+            lambda: [cache.incr('generation') for _ in range(100)]
+        ),
+    }
+
+
+def bump(name, directory, times):
+    setup_django()
+    cache = backends(directory, 1000)[name]
+    cache.add('shared', 0)
+    for _ in range(times):
+        cache.incr('shared')
+    return cache.get('shared')
+
+
+def cross_process(name, directory, workers, times):
+    with multiprocessing.Pool(workers) as pool:
+        seen = pool.starmap(
+            bump, [(name, directory, times)] * workers
+        )
+    return max(seen)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--keys', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--increments', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    directory = tempfile.mkdtemp(prefix='yatube-cache-')
+    try:
+        for name, cache in backends(directory, args.keys * 2).items():
+            print(f'\n=== {name} ===')
+            for operation, milliseconds in single_process(
+                cache, args.keys
+            ).items():
+                print(f'{operation}: {milliseconds:.2f} мс')
+            if hasattr(cache, 'stats'):
+                print(f'статистика: {cache.stats()}')
+            seen = cross_process(
+                name, directory, args.workers, args.increments
+            )
+            print(
+                f'счётчик после {args.workers} процессов: {seen} '
+                f'(ожидается {args.workers * args.increments})'
+            )
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
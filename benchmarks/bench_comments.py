@@ -0,0 +1,79 @@
+"""Страница поста при разном числе комментариев.
+
+    python -m benchmarks.bench_comments --comments 50000
+
+У постов с 10, 1000 и --comments комментариями замеряются страница
+поста с холодным и тёплым кэшем первой страницы комментариев и
+догрузка страницы из середины ветки. Время не должно расти с числом
+комментариев.
+"""
+import argparse
+import io
+
+from .utils import remove_database, seed, setup_django, temp_database, timeit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--comments', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    database = temp_database()
+    setup_django(database)
+    from django.core.cache import cache
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+    from django.urls import reverse
+
+    from posts import threads
+
+    try:
+        call_command('migrate', verbosity=0)
+        seed(
+            users=100, posts=3, follows=0, comments=0, stdout=io.StringIO()
+        )
+        sizes = {1: 10, 2: 1000, 3: args.comments}
+        with connection.cursor() as cursor:
+            for post_id, count in sizes.items():
+                cursor.executemany(
+                    'INSERT INTO posts_comment (created, text, author_id, '
+                    'post_id, path, replies_count) '
+                    "VALUES (datetime('2021-01-01', %s), 'Комментарий', "
+                    "1, %s, '', 0)",
+                    [(f'+{i} seconds', post_id) for i in range(count)],
+                )
+            cursor.execute(
+                'UPDATE posts_comment '
+                "SET path = substr('0000000000' || id, -10)"
+            )
+        call_command('reconcile_counters', stdout=io.StringIO())
+        client = Client()
+        print(f"{'комментариев':>12}{'холодный':>10}{'тёплый':>10}"
+              f"{'середина':>10}")
+        for post_id, count in sizes.items():
+            url = reverse('posts:post_detail', args=[post_id])
+
+            def cold():
+                cache.clear()
+                client.get(url)
+
+            middle = threads.page(post_id, 'oldest')
+            for _ in range(min(count // threads.COMMENTS_PER_PAGE // 2, 50)):
+                middle = threads.page(post_id, 'oldest', middle.next_cursor)
+            more = reverse('posts:comments', args=[post_id]) + (
+                f'?order=oldest&after={middle.next_cursor or ""}'
+            )
+            print(
+                f'{count:>12}'
+                f'{timeit(cold, args.repeat):>10.2f}'
+                f'{timeit(lambda: client.get(url), args.repeat):>10.2f}'
+                f'{timeit(lambda: client.get(more), args.repeat):>10.2f}'
+            )
+    finally:
+        remove_database(database)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""Одновременные чтения и записи: SQLite по умолчанию против
+core.db.backends.sqlite3.
+
+    python -m benchmarks.bench_db --threads 8 --ops 300 --writes 0.2
+
+Потоки читают страницу ленты или добавляют комментарий так же, как
+add_comment: в транзакции читают пост, вставляют комментарий и
+увеличивают счётчик. Стандартный бэкенд открывает соединение на
+каждую операцию (как при CONN_MAX_AGE = 0), работает с журналом
+отката и начинает транзакции с DEFERRED; новый держит соединение,
+работает в WAL и берёт блокировку записи в начале транзакции.
+Печатаются пропускная способность, медиана и 99-й перцентиль
+задержки и число ошибок "database is locked".
+"""
+import argparse
+import io
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import threading
+import time
+
+from .utils import seed, setup_django, temp_database
+
+CONFIGS = {
+    'стандартный': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'OPTIONS': {'timeout': 1},
+        'persistent': False,
+    },
+    'core.db': {
+        'ENGINE': 'core.db.backends.sqlite3',
+        'OPTIONS': {'timeout': 1, 'transaction_mode': 'IMMEDIATE'},
+        'persistent': True,
+    },
+}
+
+
+def read(alias):
+    from posts.models import Post
+
+    list(Post.objects.using(alias).for_feed()[:10])
+
+
+def write(alias, post_id, user_id):
+    from django.db import transaction
+    from django.db.models import F
+
+    from posts.models import Comment, Post
+
+    with transaction.atomic(using=alias):
+        post = Post.objects.using(alias).only('pk').get(pk=post_id)
+        Comment.objects.using(alias).create(
+            post=post, author_id=user_id, text='Комментарий', path=''
+        )
+        Post.objects.using(alias).filter(pk=post.pk).update(
+            comments_count=F('comments_count') + 1
+        )
+
+
+def worker(alias, persistent, args, timings, errors):
+    from django.db import OperationalError, connections
+
+    rng = random.Random()
+    for _ in range(args.ops):
+        started = time.perf_counter()
+        try:
+            if rng.random() < args.writes:
+                write(alias, rng.randint(1, args.posts), rng.randint(1, 100))
+            else:
+                read(alias)
+        except OperationalError:
+            errors.append(1)
+        else:
+            timings.append(time.perf_counter() - started)
+        if not persistent:
+            connections[alias].close()
+    connections[alias].close()
+
+
+def run(alias, persistent, args):
+    timings, errors = [], []
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(alias, persistent, args, timings, errors),
+        )
+        for _ in range(args.threads)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    p99 = timings[int(len(timings) * 0.99)] if timings else 0
+    median = statistics.median(timings) if timings else 0
+    print(f'{alias:<14}{len(timings) / elapsed:>10.0f}'
+          f'{median * 1000:>10.2f}{p99 * 1000:>10.2f}{len(errors):>8}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--ops', type=int, default=300)
+    parser.add_argument('--writes', type=float, default=0.2)
+    parser.add_argument('--posts', type=int, default=10000)
+    args = parser.parse_args()
+
+    database = temp_database()
+    setup_django(database)
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connection
+
+    files = [database]
+    try:
+        call_command('migrate', verbosity=0)
+        seed(
+            users=100, posts=args.posts, follows=0, comments=0,
+            stdout=io.StringIO(),
+        )
+        connection.close()
+        for alias, config in CONFIGS.items():
+            path = temp_database()
+            shutil.copy(database, path)
+            files.append(path)
+            with sqlite3.connect(path) as raw:
+                # WAL сохраняется в файле; стандартному бэкенду - журнал
+                # отката, как у новой БД.
+                raw.execute('PRAGMA journal_mode = DELETE')
+            settings.DATABASES[alias] = {
+                **settings.DATABASES['default'],
+                'ENGINE': config['ENGINE'],
+                'NAME': path,
+                'OPTIONS': config['OPTIONS'],
+                'CONN_MAX_AGE': None if config['persistent'] else 0,
+            }
+        print(f"{'бэкенд':<14}{'оп/с':>10}{'p50, мс':>10}"
+              f"{'p99, мс':>10}{'ошибок':>8}")
+        for alias, config in CONFIGS.items():
+            run(alias, config['persistent'], args)
+    finally:
+        for path in files:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Повторные правки поста без изменений: прежний post.save() против
+revisions.save_edit.
+
+    python -m benchmarks.bench_edit --repeat 200
+
+Для правки без изменений, правки с той же загруженной картинкой и
+правки текста замеряются время обработки формы и сохранения и число
+SQL-запросов. Прежний путь пересохраняет все столбцы, заново
+обрабатывает картинку и сбрасывает кэш лент; новый пишет только
+изменённые поля.
+"""
+import argparse
+import shutil
+import tempfile
+from io import BytesIO
+
+from .utils import remove_database, setup_django, temp_database, timeit
+
+
+def upload(image_bytes):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    return SimpleUploadedFile('photo.jpg', image_bytes, 'image/jpeg')
+
+
+def old_edit(post_id, data, files):
+    """Правка, как она была: все столбцы и повторная обработка картинки."""
+    from django.core.files.uploadedfile import UploadedFile
+    from django.db import transaction
+
+    from posts import images, thumbnails
+    from posts.forms import PostForm
+    from posts.models import Post
+
+    class OldPostForm(PostForm):
+        def clean_image(self):
+            image = self.cleaned_data.get('image')
+            if isinstance(image, UploadedFile):
+                return images.process(image)
+            return image
+
+    post = Post.objects.get(pk=post_id)
+    form = OldPostForm(data, files, instance=post)
+    if form.is_valid():
+        with transaction.atomic():
+            post.save()
+            if 'image' in form.changed_data:
+                thumbnails.schedule(post)
+
+
+def new_edit(post_id, data, files):
+    from posts import revisions
+    from posts.forms import PostForm
+    from posts.models import Post
+
+    post = Post.objects.get(pk=post_id)
+    form = PostForm(data, files, instance=post)
+    if form.is_valid():
+        revisions.save_edit(post, form)
+
+
+def create_post(image_bytes):
+    from posts.forms import PostForm
+    from posts.models import Group, User
+
+    author = User.objects.create_user(username='author')
+    group = Group.objects.create(title='Группа', slug='group')
+    form = PostForm(
+        {'text': 'Текст', 'group': group.pk},
+        {'image': upload(image_bytes)},
+    )
+    form.is_valid()
+    post = form.save(commit=False)
+    post.author = author
+    post.image_hash = form.image_hash
+    post.save()
+    return post
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    database = temp_database()
+    setup_django(database)
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from PIL import Image
+
+    media = tempfile.mkdtemp(prefix='yatube-bench-')
+    settings.MEDIA_ROOT = media
+    settings.JOBS_EAGER = False
+    try:
+        call_command('migrate', verbosity=0)
+        buffer = BytesIO()
+        Image.new('RGB', (1600, 1200), (120, 80, 40)).save(buffer, 'JPEG')
+        image_bytes = buffer.getvalue()
+        post = create_post(image_bytes)
+        data = {'text': 'Текст', 'group': post.group_id}
+        counter = iter(range(10 ** 9))
+        cases = {
+            'без изменений': lambda: (data, {}),
+            'та же картинка': lambda: (data, {'image': upload(image_bytes)}),
+            'новый текст': lambda: (
+                {**data, 'text': f'Текст {next(counter)}'}, {}
+            ),
+        }
+        print(f"{'правка':<18}{'путь':<8}{'запросов':>10}{'мс':>9}")
+        for title, make in cases.items():
+            for name, edit in (('old', old_edit), ('new', new_edit)):
+                with CaptureQueriesContext(connection) as context:
+                    edit(post.pk, *make())
+                milliseconds = timeit(
+                    lambda: edit(post.pk, *make()), args.repeat
+                )
+                print(f'{title:<18}{name:<8}{len(context):>10}'
+                      f'{milliseconds:>9.2f}')
+    finally:
+        shutil.rmtree(media, ignore_errors=True)
+        remove_database(database)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Каталог групп: COUNT/MAX по постам против таблицы GroupStats.
+
+    python -m benchmarks.bench_groups --posts 200000 --groups 500
+
+Замеряются первая страница каталога, посчитанная на лету агрегатами
+по posts_post (с тремя самыми активными авторами каждой группы), та же
+страница из GroupStats и GroupAuthorStats, полный пересчёт
+rebuild_group_stats и обновление статистики при новом посте.
+"""
+import argparse
+import io
+import time
+
+from .utils import remove_database, seed, setup_django, temp_database, timeit
+
+
+def on_the_fly():
+    """Страница каталога без статистики: агрегаты по всем постам групп."""
+    from django.db.models import Count, Max
+
+    from posts import group_stats
+    from posts.models import Group, Post
+
+    groups = list(Group.objects.annotate(
+        total=Count('posts'), last=Max('posts__created')
+    ).order_by('-last', '-pk')[:group_stats.GROUPS_PER_PAGE])
+    authors = Post.objects.filter(group__in=groups).values(
+        'group_id', 'author_id'
+    ).annotate(total=Count('pk')).order_by('group_id', '-total')
+    top = {}
+    for row in authors:
+        top.setdefault(row['group_id'], [])
+        if len(top[row['group_id']]) < group_stats.TOP_AUTHORS:
+            top[row['group_id']].append(row)
+    return groups, top
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=200000)
+    parser.add_argument('--groups', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    database = temp_database()
+    setup_django(database)
+    from django.core.management import call_command
+
+    from posts import group_stats
+    from posts.models import Post
+
+    try:
+        call_command('migrate', verbosity=0)
+        seed(
+            users=1000, groups=args.groups, posts=args.posts, follows=0,
+            comments=0, stdout=io.StringIO(),
+        )
+        started = time.perf_counter()
+        group_stats.rebuild()
+        rebuild_ms = (time.perf_counter() - started) * 1000
+        print(f'rebuild_group_stats: {rebuild_ms:.0f} мс')
+
+        def stats_page():
+            list(group_stats.page())
+
+        counter = iter(range(10 ** 9))
+
+        def new_post():
+            Post.objects.create(
+                text=f'Пост {next(counter)}', author_id=1, group_id=1
+            )
+
+        cases = {
+            'страница на лету': on_the_fly,
+            'страница из GroupStats': stats_page,
+            'обновление на пост': lambda: group_stats.post_added(
+                1, 1, Post.objects.latest('created').created
+            ),
+            'Post.objects.create с сигналами': new_post,
+        }
+        for title, func in cases.items():
+            print(f'{title:<34}{timeit(func, args.repeat):>10.2f} мс')
+    finally:
+        remove_database(database)
+
+
+if __name__ == '__main__':
+    main()
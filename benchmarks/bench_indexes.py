@@ -0,0 +1,101 @@
+"""Планы и время горячих запросов лент до и после индексов 0018.
+
+    python -m benchmarks.bench_indexes --posts 1000000
+
+БД мигрируется до 0017, наполняется, запросы объясняются
+(EXPLAIN QUERY PLAN) и замеряются; затем применяется 0018_feed_indexes
+и замеры повторяются на тех же данных.
+"""
+import argparse
+
+from .utils import remove_database, seed, setup_django, temp_database, timeit
+
+BEFORE = '0017_counters'
+AFTER = '0018_feed_indexes'
+
+
+def hot_queries():
+    from core.paginator import CursorPaginator
+    from posts import timeline
+    from posts.models import Comment, Follow, Post, User
+
+    user = User.objects.get(pk=1)
+    author = User.objects.get(pk=2)
+    # Курсор из середины ленты: OFFSET здесь читал бы половину таблицы.
+    feed = Post.objects.order_by('-created', '-id')
+    middle = feed[Post.objects.count() // 2]
+    cursor = CursorPaginator(Post.objects.all(), 10).encode_cursor(middle)
+
+    def page(queryset, after=None):
+        paginator = CursorPaginator(queryset, 10)
+        values = paginator.decode_cursor(after) if after else None
+        if values is not None:
+            queryset = queryset.filter(
+                paginator._seek(paginator.ordering, values)
+            )
+        return queryset.order_by(*paginator.ordering)[:11]
+
+    return {
+        'index': page(Post.objects.for_feed()),
+        'index, глубокая страница': page(Post.objects.for_feed(), cursor),
+        'group_posts': page(Post.objects.filter(group_id=1).for_feed()),
+        'profile': page(author.posts.for_feed()),
+        'follow_index': page(timeline.feed_for(user).for_feed()),
+        'Follow.exists в profile': Follow.objects.filter(
+            author=author, user=user
+        ),
+        'комментарии поста': Comment.objects.filter(post_id=1),
+    }
+
+
+def explain(queryset):
+    from django.db import connection
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def report(title):
+    print(f'\n=== {title} ===')
+    for name, queryset in hot_queries().items():
+        milliseconds = timeit(lambda: list(queryset.all()))
+        print(f'\n{name}: {milliseconds:.2f} мс')
+        for line in explain(queryset):
+            print(f'    {line}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--follows', type=int, default=100000)
+    parser.add_argument('--comments', type=int, default=200000)
+    parser.add_argument(
+        '--database', help='файл SQLite (по умолчанию временный)'
+    )
+    args = parser.parse_args()
+
+    database = args.database or temp_database()
+    setup_django(database)
+    from django.core.management import call_command
+
+    try:
+        call_command('migrate', verbosity=0)
+        call_command('migrate', 'posts', BEFORE, verbosity=0)
+        seed(
+            users=args.users, posts=args.posts,
+            follows=args.follows, comments=args.comments,
+        )
+        call_command('rebuild_timeline', '--user', '1', verbosity=0)
+        report(f'до индексов ({BEFORE})')
+        call_command('migrate', 'posts', AFTER, verbosity=0)
+        report(f'после индексов ({AFTER})')
+    finally:
+        if not args.database:
+            remove_database(database)
+
+
+if __name__ == '__main__':
+    main()
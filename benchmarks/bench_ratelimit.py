@@ -0,0 +1,82 @@
+"""Накладные расходы core.ratelimit на один запрос.
+
+    python -m benchmarks.bench_ratelimit --requests 10000
+
+Замеряется ratelimit.check() для POST-запроса на трёх хранилищах
+счётчиков: SQLiteCache (настройка по умолчанию, общий для процессов),
+LocMemCache и счётчики в памяти процесса, на которые лимит
+переключается, если кэш недоступен. Лимит не достигается, так что
+каждый вызов - полный путь разрешённого запроса. Отдельно замеряется
+отклонённый запрос, у которого есть лишнее обращение к кэшу (без
+отрисовки страницы 429).
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from .utils import setup_django
+
+
+def per_call(func, requests):
+    """Микросекунды на вызов func, медиана из пяти прогонов."""
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(requests):
+            func()
+        timings.append((time.perf_counter() - started) / requests * 1e6)
+    return sorted(timings)[2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=10000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='yatube-bench-')
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth.models import AnonymousUser
+    from django.core.cache.backends.locmem import LocMemCache
+    from django.test import RequestFactory
+
+    from core import ratelimit
+    from core.cache import SQLiteCache
+
+    request = RequestFactory().post('/posts/1/comment/')
+    request.user = AnonymousUser()
+    stores = {
+        'SQLiteCache': ratelimit.CacheCounters(SQLiteCache(
+            os.path.join(directory, 'cache.sqlite3'), {}
+        )),
+        'LocMemCache': ratelimit.CacheCounters(LocMemCache('bench', {})),
+        'в процессе': ratelimit.local_counters,
+    }
+    allowed = {'bench': f'{args.requests * 10}/d'}
+    denied = {'bench': '1/d'}
+    print(f"{'хранилище':<14}{'мкс, разрешён':>16}{'мкс, отклонён':>16}")
+    try:
+        for title, store in stores.items():
+            with mock.patch.object(
+                ratelimit, 'counters', return_value=store
+            ), mock.patch.object(
+                ratelimit, 'too_many_requests', return_value=None
+            ):
+                settings.RATE_LIMITS = allowed
+                passed = per_call(
+                    lambda: ratelimit.check(request, 'bench'), args.requests
+                )
+                settings.RATE_LIMITS = denied
+                rejected = per_call(
+                    lambda: ratelimit.check(request, 'bench'), args.requests
+                )
+            print(f'{title:<14}{passed:>16.1f}{rejected:>16.1f}')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
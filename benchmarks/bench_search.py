@@ -0,0 +1,77 @@
+"""Поиск по индексу против LIKE-сканирования, как в админке.
+
+    python -m benchmarks.bench_search --posts 200000
+
+Посты наполняются словами из небольшого словаря с разной частотой,
+затем для частого, среднего и редкого слова замеряются первая страница
+поиска, фильтр админки по индексу и прежний фильтр text LIKE '%...%'.
+"""
+import argparse
+import random
+
+from .utils import remove_database, seed, setup_django, temp_database, timeit
+
+COMMON = ['день', 'город', 'люди', 'время', 'работа', 'дом', 'жизнь']
+MEDIUM = ['поезд', 'книга', 'музыка', 'погода', 'собака', 'кофе']
+RARE = ['телескоп', 'акварель', 'вулкан', 'шахматы']
+QUERIES = {'частое': 'город', 'среднее': 'книги', 'редкое': 'вулкан'}
+
+
+def make_text(number):
+    rng = random.Random(number)
+    words = rng.choices(COMMON, k=rng.randint(5, 20))
+    words += rng.choices(MEDIUM, k=rng.randint(0, 2))
+    if rng.random() < 0.001:
+        words.append(rng.choice(RARE))
+    rng.shuffle(words)
+    return ' '.join(words).capitalize()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=200000)
+    parser.add_argument(
+        '--database', help='файл SQLite (по умолчанию временный)'
+    )
+    args = parser.parse_args()
+
+    database = args.database or temp_database()
+    setup_django(database)
+    from django.core.management import call_command
+
+    from posts import search
+    from posts.models import Post
+
+    try:
+        call_command('migrate', verbosity=0)
+        seed(
+            users=1000, posts=args.posts, follows=0, comments=0,
+            text=make_text,
+        )
+        call_command('rebuild_search_index')
+        for title, query in QUERIES.items():
+            word = query[:-1]
+            like = Post.objects.filter(text__icontains=word)
+            indexed = search.filter_queryset(Post.objects.all(), query)
+            print(f'\n{title} слово «{query}»:')
+            print(f'  найдено LIKE: {like.count()}, '
+                  f'по индексу: {indexed.count()}')
+            timings = {
+                'поиск, первая страница':
+                    lambda: search.search(query),
+                'LIKE, первая страница':
+                    lambda: list(like.order_by('-created')[:10]),
+                'админка по индексу, COUNT':
+                    lambda: indexed.count(),
+                'админка LIKE, COUNT':
+                    lambda: like.count(),
+            }
+            for name, func in timings.items():
+                print(f'  {name}: {timeit(func):.2f} мс')
+    finally:
+        if not args.database:
+            remove_database(database)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Отдача статики и медиа: core.fileserver против django.views.static.
+
+    python -m benchmarks.bench_static --repeat 500
+
+Статика собирается collectstatic во временный каталог. Для css, png,
+большого медиафайла, ответа 304 и запроса Range замеряется время полного
+ответа (с чтением тела) и число переданных байт: FileServer отдаёт
+заранее сжатую копию, django.views.static.serve - файл целиком.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+from .utils import setup_django, timeit
+
+
+def not_found(environ, start_response):
+    start_response('404 Not Found', [])
+    return [b'']
+
+
+def wsgi_get(server, path, headers):
+    environ = {'PATH_INFO': path, 'wsgi.input': BytesIO(), **headers}
+    setup_testing_defaults(environ)
+    return len(b''.join(server(environ, lambda status, headers: None)))
+
+
+def django_get(factory, serve, root, prefix, path, headers):
+    request = factory.get(path, **headers)
+    response = serve(request, path[len(prefix):], document_root=root)
+    return len(b''.join(response))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='yatube-bench-')
+    setup_django()
+    from django.conf import settings
+    from django.contrib.staticfiles.storage import staticfiles_storage
+    from django.core.management import call_command
+    from django.test import RequestFactory
+    from django.views.static import serve
+
+    from core.fileserver import FileServer
+
+    settings.STATIC_ROOT = os.path.join(directory, 'static')
+    settings.MEDIA_ROOT = os.path.join(directory, 'media')
+    try:
+        call_command('collectstatic', interactive=False, verbosity=0)
+        os.makedirs(os.path.join(settings.MEDIA_ROOT, 'posts'))
+        with open(os.path.join(settings.MEDIA_ROOT, 'posts', 'video.bin'),
+                  'wb') as file:
+            file.write(os.urandom(4 * 1024 * 1024))
+        server = FileServer(not_found)
+        storage_names = {
+            'css': 'css/bootstrap.min.css', 'png': 'img/logo.png',
+        }
+        cases = {}
+        for title, name in storage_names.items():
+            hashed = settings.STATIC_URL + staticfiles_storage.stored_name(
+                name
+            )
+            cases[title] = (settings.STATIC_ROOT, settings.STATIC_URL,
+                            hashed, {'HTTP_ACCEPT_ENCODING': 'gzip, br'})
+        css = cases['css'][2]
+        etag = server.static_files[css].etag
+        cases['css 304'] = (settings.STATIC_ROOT, settings.STATIC_URL, css,
+                            {'HTTP_IF_NONE_MATCH': etag})
+        video = settings.MEDIA_URL + 'posts/video.bin'
+        cases['media'] = (settings.MEDIA_ROOT, settings.MEDIA_URL, video, {})
+        cases['media range'] = (settings.MEDIA_ROOT, settings.MEDIA_URL,
+                                video, {'HTTP_RANGE': 'bytes=1048576-1114111'})
+        factory = RequestFactory()
+        print(f"{'файл':<14}{'сервер':<12}{'байт':>10}{'мс':>9}")
+        for title, (root, prefix, path, headers) in cases.items():
+            rows = {
+                'FileServer': lambda: wsgi_get(server, path, headers),
+                'serve': lambda: django_get(
+                    factory, serve, root, prefix, path, headers
+                ),
+            }
+            for name, func in rows.items():
+                size = func()
+                milliseconds = timeit(func, args.repeat)
+                print(f'{title:<14}{name:<12}{size:>10}{milliseconds:>9.3f}')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
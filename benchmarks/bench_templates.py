@@ -0,0 +1,91 @@
+"""Отрисовка страницы ленты из 10 постов.
+
+    python -m benchmarks.bench_templates --repeat 500
+
+Сравниваются: шаблоны, которые читаются и разбираются при каждой
+отрисовке (загрузчики без cached.Loader), скомпилированные шаблоны
+из cached.Loader и карточки из кэша posts.cards с холодным и тёплым
+кэшем. Отдельно печатается время прогрева warm_up.
+"""
+import argparse
+import io
+import time
+
+from .utils import remove_database, seed, setup_django, temp_database, timeit
+
+PAGE = (
+    "{% for post in posts %}"
+    "{% include 'posts/includes/post_card.html' %}"
+    "{% if not forloop.last %}<hr>{% endif %}"
+    "{% endfor %}"
+)
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def make_engine(cached):
+    from django.conf import settings
+    from django.template import Engine
+
+    loaders = LOADERS
+    if cached:
+        loaders = [('django.template.loaders.cached.Loader', LOADERS)]
+    return Engine(dirs=settings.TEMPLATES[0]['DIRS'], loaders=loaders)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    database = temp_database()
+    setup_django(database)
+    from django.core.cache import cache
+    from django.core.management import call_command
+    from django.template import Context
+
+    from core.template_backend import warm_up
+    from posts.cards import render_cards
+    from posts.models import Post
+
+    try:
+        call_command('migrate', verbosity=0)
+        seed(
+            users=10, groups=3, posts=args.posts, follows=0, comments=0,
+            stdout=io.StringIO(),
+        )
+        posts = list(Post.objects.for_feed()[:args.posts])
+        started = time.perf_counter()
+        compiled = warm_up()
+        print(f'Прогрев: {compiled} шаблонов за '
+              f'{(time.perf_counter() - started) * 1000:.1f} мс')
+
+        def engine_page(engine):
+            return lambda: engine.from_string(PAGE).render(
+                Context({'posts': posts})
+            )
+
+        def cold_cards():
+            cache.clear()
+            render_cards(posts)
+
+        cases = {
+            'без cached.Loader': engine_page(make_engine(cached=False)),
+            'cached.Loader': engine_page(make_engine(cached=True)),
+            'карточки, холодный кэш': cold_cards,
+            'карточки, тёплый кэш': lambda: render_cards(posts),
+        }
+        print(f"{'отрисовка':<26}{'мс на страницу':>16}")
+        for title, render in cases.items():
+            render()
+            milliseconds = timeit(render, args.repeat)
+            print(f'{title:<26}{milliseconds:>16.3f}')
+    finally:
+        remove_database(database)
+
+
+if __name__ == '__main__':
+    main()
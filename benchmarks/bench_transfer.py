@@ -0,0 +1,83 @@
+"""Скорость export_posts и import_posts в строках в секунду.
+
+    python -m benchmarks.bench_transfer --posts 1000000
+
+База наполняется сырыми INSERT, выгружается в NDJSON и CSV, затем
+каждая выгрузка загружается в новую пустую базу - с индексами и с
+--defer-indexes. Пересборка счётчиков, лент и поиска после загрузки
+замеряется отдельно.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from .utils import remove_database, seed, setup_django, temp_database
+
+
+def switch_database(path):
+    from django.core.management import call_command
+    from django.db import connection
+
+    connection.close()
+    connection.settings_dict['NAME'] = path
+    call_command('migrate', verbosity=0)
+
+
+def report(title, stats):
+    from posts import transfer
+
+    for name, result in stats.items():
+        print(
+            f'{title:<26}{name:<10}{result.rows:>10}'
+            f'{result.seconds:>9.1f}{transfer.rate(result):>10.0f}'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=1000000)
+    args = parser.parse_args()
+
+    source = temp_database()
+    setup_django(source)
+    from django.core.management import call_command
+
+    from posts import transfer
+
+    directory = tempfile.mkdtemp(prefix='yatube-bench-')
+    targets = []
+    try:
+        call_command('migrate', verbosity=0)
+        seed(users=10000, posts=args.posts, follows=100000,
+             comments=args.posts)
+        print(f"{'прогон':<26}{'данные':<10}{'строк':>10}{'с':>9}"
+              f"{'строк/с':>10}")
+        for file_format in transfer.FORMATS:
+            path = os.path.join(directory, file_format)
+            report(f'export {file_format}', transfer.export(
+                path, file_format=file_format
+            ))
+            for defer in (False, True):
+                targets.append(temp_database())
+                switch_database(targets[-1])
+                title = f'import {file_format}' + (' defer' if defer else '')
+                report(title, transfer.load(
+                    path, file_format=file_format, defer_indexes=defer,
+                    rebuild_after=False,
+                ))
+                switch_database(source)
+        started = time.monotonic()
+        switch_database(targets[-1])
+        transfer.rebuild()
+        print(f'пересборка после загрузки: '
+              f'{time.monotonic() - started:.1f} с')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+        for path in [source, *targets]:
+            remove_database(path)
+
+
+if __name__ == '__main__':
+    main()
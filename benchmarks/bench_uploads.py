@@ -0,0 +1,101 @@
+"""Обработка загрузок картинок: как было и через posts.images.
+
+    python -m benchmarks.bench_uploads --synthetic 5
+
+Прогоняет все файлы из media/posts (и, по желанию, несколько
+сгенерированных фотографий 6000x4000) через полное декодирование,
+которое раньше делал sorl при первом показе, и через posts.images.process.
+Память оценивается по размеру декодированного буфера пикселей:
+Pillow выделяет его вне интерпретатора, и tracemalloc его не видит.
+"""
+import argparse
+import glob
+import os
+import random
+import time
+from io import BytesIO
+
+from .utils import PROJECT_DIR, setup_django
+
+
+def synthetic_photos(count):
+    from PIL import Image
+
+    random.seed(42)
+    for i in range(count):
+        image = Image.effect_noise((6000, 4000), random.randint(5, 20))
+        buffer = BytesIO()
+        image.convert('RGB').save(buffer, 'JPEG', quality=90)
+        yield f'synthetic{i}.jpg', buffer.getvalue()
+
+
+def decoded_bytes(image):
+    return image.size[0] * image.size[1] * len(image.getbands())
+
+
+def baseline(name, content):
+    from PIL import Image
+
+    image = Image.open(BytesIO(content))
+    decoded = decoded_bytes(image)
+    started = time.perf_counter()
+    image.load()
+    return time.perf_counter() - started, len(content), decoded
+
+
+def pipeline(name, content):
+    from django.conf import settings
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from PIL import Image
+
+    from posts import images
+
+    # Размер буфера после draft(): сам draft ничего не декодирует.
+    image = Image.open(BytesIO(content))
+    images.draft(image, settings.POST_IMAGE_MAX_SIDE)
+    decoded = decoded_bytes(image)
+    upload = SimpleUploadedFile(name, content)
+    started = time.perf_counter()
+    result = images.process(upload)
+    elapsed = time.perf_counter() - started
+    result.seek(0, os.SEEK_END)
+    return elapsed, result.tell(), decoded
+
+
+def measure(func, files):
+    seconds = stored = decoded = 0
+    for name, content in files:
+        elapsed, size, peak = func(name, content)
+        seconds += elapsed
+        stored += size
+        decoded = max(decoded, peak)
+    return seconds, stored, decoded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--synthetic', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django()
+    files = []
+    for path in sorted(glob.glob(os.path.join(PROJECT_DIR, 'media/posts/*'))):
+        with open(path, 'rb') as file:
+            files.append((os.path.basename(path), file.read()))
+    files.extend(synthetic_photos(args.synthetic))
+    print(f'Файлов: {len(files)}')
+
+    for title, func in (
+        ('как было (полное декодирование)', baseline),
+        ('posts.images.process', pipeline),
+    ):
+        seconds, stored, decoded = measure(func, files)
+        print(
+            f'{title}: {seconds * 1000:.0f} мс, '
+            f'на диске {stored / 1024:.0f} КиБ, '
+            f'наибольший буфер пикселей {decoded / 1024 / 1024:.1f} МиБ'
+        )
+
+
+if __name__ == '__main__':
+    main()
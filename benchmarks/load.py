@@ -0,0 +1,258 @@
+"""Нагрузочный прогон всех адресов posts.urls через WSGI в процессе.
+
+    python -m benchmarks.seed --database /tmp/yatube-load.sqlite3
+    python -m benchmarks.load --database /tmp/yatube-load.sqlite3 \\
+        --requests 2000 --threads 4 --save baseline.json
+    python -m benchmarks.load --database /tmp/yatube-load.sqlite3 \\
+        --compare baseline.json
+
+Запросы идут через django.test.Client, то есть через тот же
+WSGI-обработчик и middleware, что и на сервере, но без сети.
+Смесь запросов задана весами SCENARIOS: в основном чтение лент,
+немного публикаций, комментариев и подписок. Для каждого адреса
+печатаются p50/p95/p99, запросов в секунду и SQL-запросов на ответ.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import setup_django
+
+# Имя сценария -> вес в смеси запросов.
+SCENARIOS = {
+    'index': 30,
+    'index_next_page': 5,
+    'group_list': 12,
+    'profile': 12,
+    'post_detail': 20,
+    'follow_index': 8,
+    'search': 3,
+    'post_create': 3,
+    'add_comment': 5,
+    'profile_follow': 2,
+}
+LOGIN_REQUIRED = {
+    'follow_index', 'post_create', 'add_comment', 'profile_follow',
+}
+WRITES = {
+    'post_create': ('post', {'text': 'Нагрузочный пост'}),
+    'add_comment': ('post', {'text': 'Нагрузочный комментарий'}),
+}
+SEARCH_WORDS = ['день', 'работа', 'человек', 'время']
+# Доля запросов от залогиненных пользователей среди читающих.
+AUTHENTICATED_SHARE = 0.5
+# Рост p95 больше этой доли при сравнении считается регрессией.
+REGRESSION_THRESHOLD = 0.1
+
+
+class Fixtures:
+    """Id и имена из БД, из которых собираются адреса запросов."""
+
+    def __init__(self):
+        from posts.models import Group, Post, User
+
+        self.users = list(User.objects.values_list('pk', 'username'))
+        self.slugs = list(Group.objects.values_list('slug', flat=True))
+        self.post_ids = list(Post.objects.values_list('pk', flat=True))
+        if not (self.users and self.slugs and self.post_ids):
+            sys.exit('БД пуста: сначала запустите benchmarks.seed')
+        self.cursor = None
+
+    def next_page_cursor(self):
+        if self.cursor is None:
+            from core.paginator import CursorPaginator
+            from posts.models import Post
+            from posts.views import POSTS_PER_PAGE
+
+            paginator = CursorPaginator(Post.objects.all(), POSTS_PER_PAGE)
+            paginator.get_cursor_page()
+            self.cursor = paginator.next_cursor or ''
+        return self.cursor
+
+
+def request_for(name, fixtures, rng):
+    """Метод, адрес, данные и нужен ли вход для сценария."""
+    from django.urls import reverse
+
+    args = {
+        'group_list': lambda: [rng.choice(fixtures.slugs)],
+        'profile': lambda: [rng.choice(fixtures.users)[1]],
+        'profile_follow': lambda: [rng.choice(fixtures.users)[1]],
+        'post_detail': lambda: [rng.choice(fixtures.post_ids)],
+        'add_comment': lambda: [rng.choice(fixtures.post_ids)],
+    }.get(name, list)()
+    url_name = 'index' if name == 'index_next_page' else name
+    url = reverse(f'posts:{url_name}', args=args)
+    if name == 'index_next_page':
+        url += '?after=' + fixtures.next_page_cursor()
+    elif name == 'search':
+        url += '?q=' + rng.choice(SEARCH_WORDS)
+    method, data = WRITES.get(name, ('get', None))
+    return method, url, data, name in LOGIN_REQUIRED
+
+
+class Worker:
+    def __init__(self, fixtures, seed):
+        from django.test import Client
+
+        self.fixtures = fixtures
+        self.rng = random.Random(seed)
+        self.guest = Client()
+        self.clients = {}
+        self.Client = Client
+
+    def client_for(self, login):
+        from django.contrib.auth import get_user_model
+
+        if not login and self.rng.random() > AUTHENTICATED_SHARE:
+            return self.guest
+        pk, _ = self.rng.choice(self.fixtures.users)
+        if pk not in self.clients:
+            client = self.Client()
+            client.force_login(get_user_model().objects.get(pk=pk))
+            self.clients[pk] = client
+        return self.clients[pk]
+
+    def run(self, name):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        method, url, data, login = request_for(
+            name, self.fixtures, self.rng
+        )
+        client = self.client_for(login)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            try:
+                failed = getattr(client, method)(url, data).status_code >= 400
+            except Exception:
+                # Client пробрасывает исключения представлений,
+                # например «database is locked» при записи из потоков.
+                failed = True
+            elapsed = time.perf_counter() - started
+        return elapsed, len(queries), failed
+
+
+def percentile(values, share):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100)[share - 1]
+
+
+def summarize(samples, seconds):
+    report = {}
+    for name, rows in sorted(samples.items()):
+        timings = [row[0] * 1000 for row in rows]
+        report[name] = {
+            'requests': len(rows),
+            'errors': sum(row[2] for row in rows),
+            'p50_ms': percentile(timings, 50),
+            'p95_ms': percentile(timings, 95),
+            'p99_ms': percentile(timings, 99),
+            'queries': statistics.mean(row[1] for row in rows),
+        }
+    total = sum(len(rows) for rows in samples.values())
+    return {'endpoints': report, 'total': total, 'rps': total / seconds}
+
+
+def print_report(report):
+    print(
+        f"{'адрес':<16}{'запросов':>9}{'ошибок':>8}{'p50':>9}"
+        f"{'p95':>9}{'p99':>9}{'SQL':>7}"
+    )
+    for name, row in report['endpoints'].items():
+        print(
+            f"{name:<16}{row['requests']:>9}{row['errors']:>8}"
+            f"{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}"
+            f"{row['p99_ms']:>9.2f}{row['queries']:>7.1f}"
+        )
+    print(f"\nВсего {report['total']} запросов, {report['rps']:.1f} req/s")
+
+
+def compare(report, baseline):
+    """Печатает изменения относительно baseline, возвращает регрессии."""
+    regressions = []
+    if baseline.get('threads') != report['threads']:
+        print('\nВнимание: прогоны с разным числом потоков')
+    print('\nСравнение с базовым прогоном (p95, SQL):')
+    for name, row in report['endpoints'].items():
+        base = baseline['endpoints'].get(name)
+        if base is None:
+            continue
+        change = row['p95_ms'] / base['p95_ms'] - 1 if base['p95_ms'] else 0
+        queries = row['queries'] - base['queries']
+        mark = ''
+        if change > REGRESSION_THRESHOLD or queries > 0.5:
+            mark = '  <- регрессия'
+            regressions.append(name)
+        print(f'{name:<16}{change:>+9.1%}{queries:>+8.1f}{mark}')
+    print(f"req/s: {baseline['rps']:.1f} -> {report['rps']:.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database', required=True, help='файл SQLite')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument(
+        '--cold-cache', action='store_true',
+        help='очистить кэш перед прогоном'
+    )
+    parser.add_argument('--save', help='записать результат в JSON')
+    parser.add_argument('--compare', help='сравнить с JSON прошлого прогона')
+    args = parser.parse_args()
+
+    setup_django(args.database)
+    from django.core.cache import cache
+
+    if args.cold_cache:
+        cache.clear()
+    fixtures = Fixtures()
+    rng = random.Random(args.seed)
+    names = rng.choices(
+        list(SCENARIOS), weights=list(SCENARIOS.values()),
+        k=args.warmup + args.requests,
+    )
+    local = threading.local()
+
+    def run(index_name):
+        index, name = index_name
+        worker = getattr(local, 'worker', None)
+        if worker is None:
+            worker = local.worker = Worker(fixtures, args.seed + index)
+        return name, worker.run(name)
+
+    with ThreadPoolExecutor(args.threads) as pool:
+        list(pool.map(run, enumerate(names[:args.warmup])))
+        samples = defaultdict(list)
+        started = time.perf_counter()
+        for name, sample in pool.map(
+            run, enumerate(names[args.warmup:], args.warmup)
+        ):
+            samples[name].append(sample)
+        seconds = time.perf_counter() - started
+
+    report = summarize(samples, seconds)
+    report['threads'] = args.threads
+    print_report(report)
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(report, json.load(file))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Наполнение БД для нагрузочных прогонов.
+
+    python -m benchmarks.seed --database /tmp/yatube-load.sqlite3 \\
+        --users 200 --groups 10 --posts 5000 --comments 10000 \\
+        --follows 2000 --images 50
+
+Объекты создаются через mixer, как в фикстурах tests/fixtures,
+поэтому сигналы срабатывают и ленты, кэш и поиск заполняются так же,
+как при обычной работе сайта. Для миллионов строк быстрее
+benchmarks.utils.seed с сырыми INSERT (флаг --raw).
+"""
+import argparse
+import random
+from io import BytesIO
+
+from .utils import seed, setup_django, temp_database
+
+
+def make_image(number):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from PIL import Image
+
+    buffer = BytesIO()
+    color = tuple(random.randint(0, 255) for _ in range(3))
+    Image.new('RGB', (1280, 720), color).save(buffer, 'JPEG')
+    return SimpleUploadedFile(f'bench{number}.jpg', buffer.getvalue())
+
+
+def blend(users, groups, posts, comments, follows, images):
+    from mixer.backend.django import Mixer
+
+    from posts import thumbnails
+    from posts.models import Comment, Follow, Group, Post, User
+
+    random.seed(42)
+    mixer = Mixer(locale='ru_RU')
+    authors = mixer.cycle(users).blend(
+        User, username=mixer.sequence('user{0}')
+    )
+    communities = mixer.cycle(groups).blend(
+        Group, slug=mixer.sequence('group-{0}')
+    )
+    entries = []
+    for _ in range(posts):
+        entries.append(mixer.blend(
+            Post,
+            author=random.choice(authors),
+            group=random.choice(communities + [None]),
+            text=mixer.faker.text(max_nb_chars=300),
+            image='',
+        ))
+    for number, post in enumerate(random.sample(entries, images)):
+        post.image = make_image(number)
+        post.save()
+        thumbnails.generate(post.pk)
+    for _ in range(comments):
+        mixer.blend(
+            Comment,
+            post=random.choice(entries),
+            author=random.choice(authors),
+            text=mixer.faker.sentence(),
+        )
+    pairs = set()
+    while len(pairs) < min(follows, users * (users - 1)):
+        pairs.add(tuple(random.sample(authors, 2)))
+    for user, author in pairs:
+        Follow.objects.create(user=user, author=author)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database', help='файл SQLite')
+    parser.add_argument(
+        '--media', help='каталог картинок (по умолчанию рядом с БД)'
+    )
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--groups', type=int, default=10)
+    parser.add_argument('--posts', type=int, default=5000)
+    parser.add_argument('--comments', type=int, default=10000)
+    parser.add_argument('--follows', type=int, default=2000)
+    parser.add_argument('--images', type=int, default=50)
+    parser.add_argument(
+        '--raw', action='store_true',
+        help='сырые INSERT без сигналов и картинок'
+    )
+    args = parser.parse_args()
+
+    database = args.database or temp_database()
+    setup_django(database)
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import transaction
+
+    # Картинки прогонов не должны попадать в media/ репозитория.
+    settings.MEDIA_ROOT = args.media or database + '-media'
+
+    call_command('migrate', verbosity=0)
+    if args.raw:
+        seed(
+            users=args.users, groups=args.groups, posts=args.posts,
+            follows=args.follows, comments=args.comments,
+        )
+        call_command('rebuild_search_index')
+    else:
+        with transaction.atomic():
+            blend(
+                args.users, args.groups, args.posts, args.comments,
+                args.follows, min(args.images, args.posts),
+            )
+    # Счётчики обновляют представления, а не сигналы: пересчитываем.
+    call_command('reconcile_counters')
+    call_command('rebuild_timeline')
+    print(f'БД готова: {database}')
+
+
+if __name__ == '__main__':
+    main()
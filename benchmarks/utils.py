@@ -0,0 +1,177 @@
+"""Общие помощники бенчмарков: настройка Django и быстрое наполнение БД.
+
+Бенчмарки запускаются из корня репозитория:
+
+    python -m benchmarks.bench_indexes --posts 1000000
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+PROJECT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'yatube'
+)
+# Обязательные столбцы из поздних миграций и их значения.
+LATE_COLUMNS = {
+    'posts_post': {
+        'thumbnails': "''",
+        'image_hash': "''",
+        'version': '1',
+    },
+    'posts_comment': {
+        'path': "''",
+        'replies_count': '0',
+    },
+}
+
+
+def setup_django(database=None):
+    """Настраивает Django; database - путь к отдельному файлу SQLite.
+
+    У отдельной БД и кэш отдельный: фрагменты её лент не должны
+    попасть на страницы сайта с ключами тех же поколений.
+    """
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    import django
+    from django.conf import settings
+    if database:
+        settings.DATABASES['default']['NAME'] = database
+        settings.CACHES['default']['LOCATION'] = database + '-cache'
+    django.setup()
+
+
+def temp_database():
+    """Путь к временному файлу SQLite для одного прогона."""
+    handle, path = tempfile.mkstemp(suffix='.sqlite3', prefix='yatube-bench-')
+    os.close(handle)
+    return path
+
+
+def remove_database(path):
+    """Удаляет файл БД из temp_database вместе с файлами её кэша."""
+    for suffix in ('', '-wal', '-shm', '-cache', '-cache-wal', '-cache-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def seed(users=1000, groups=50, posts=100000, follows=20000,
+         comments=100000, batch=10000, stdout=sys.stdout, text=None):
+    """Наполняет БД сырыми INSERT: на миллионах строк ORM слишком медленный.
+
+    Сигналы и счётчики не срабатывают; при необходимости их
+    пересчитывают командами reconcile_counters и rebuild_timeline.
+    text - функция, возвращающая текст поста по его номеру.
+    """
+    from django.db import connection, transaction
+
+    random.seed(42)
+    start = datetime(2020, 1, 1)
+    if text is None:
+        def text(number):
+            return f'Пост номер {number}'
+
+    def moment(seconds):
+        # Django хранит время в SQLite наивной строкой в UTC.
+        return (start + timedelta(seconds=seconds)).isoformat(' ')
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO auth_user (id, password, is_superuser, username, '
+            'first_name, last_name, email, is_staff, is_active, date_joined) '
+            "VALUES (%s, '', 0, %s, '', '', '', 0, 1, %s)",
+            [(i, f'user{i}', moment(0)) for i in range(1, users + 1)],
+        )
+        cursor.executemany(
+            'INSERT INTO posts_group (id, title, slug, description) '
+            'VALUES (%s, %s, %s, %s)',
+            [
+                (i, f'Группа {i}', f'group-{i}', '')
+                for i in range(1, groups + 1)
+            ],
+        )
+        pairs = set()
+        while len(pairs) < min(follows, users * (users - 1)):
+            user, author = random.sample(range(1, users + 1), 2)
+            pairs.add((user, author))
+        cursor.executemany(
+            'INSERT INTO posts_follow (user_id, author_id) VALUES (%s, %s)',
+            sorted(pairs),
+        )
+        extra_names, extra_values = late_columns(cursor, 'posts_post')
+        for first in range(1, posts + 1, batch):
+            cursor.executemany(
+                'INSERT INTO posts_post (id, created, text, author_id, '
+                f'group_id, image, comments_count{extra_names}) '
+                f"VALUES (%s, %s, %s, %s, %s, '', 0{extra_values})",
+                [
+                    (
+                        i,
+                        moment(i * 30),
+                        text(i),
+                        random.randint(1, users),
+                        random.choice((None, random.randint(1, groups))),
+                    )
+                    for i in range(first, min(first + batch, posts + 1))
+                ],
+            )
+            stdout.write(f'\rПостов: {min(first + batch - 1, posts)}')
+        stdout.write('\n')
+        extra_names, extra_values = late_columns(cursor, 'posts_comment')
+        for first in range(1, comments + 1, batch):
+            cursor.executemany(
+                'INSERT INTO posts_comment (created, text, author_id, '
+                f'post_id{extra_names}) '
+                f'VALUES (%s, %s, %s, %s{extra_values})',
+                [
+                    (
+                        moment(i * 10),
+                        'Комментарий',
+                        random.randint(1, users),
+                        random.randint(1, posts),
+                    )
+                    for i in range(first, min(first + batch, comments + 1))
+                ],
+            )
+        if extra_names:
+            # Все комментарии корневые: путь - id, дополненный нулями.
+            cursor.execute(
+                'UPDATE posts_comment '
+                "SET path = substr('0000000000' || id, -10)"
+            )
+
+
+def late_columns(cursor, table):
+    """Имена и значения для INSERT столбцов из LATE_COLUMNS.
+
+    Поля, добавленные поздними миграциями, заполняются, только если
+    БД уже до них мигрирована.
+    """
+    from django.db import connection
+
+    columns = {
+        column.name for column in
+        connection.introspection.get_table_description(cursor, table)
+    }
+    extra = {
+        name: value for name, value in LATE_COLUMNS[table].items()
+        if name in columns
+    }
+    names = ''.join(f', {name}' for name in extra)
+    values = ''.join(f', {value}' for value in extra.values())
+    return names, values
+
+
+def timeit(func, repeat=5):
+    """Медиана времени выполнения func в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
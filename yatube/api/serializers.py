@@ -0,0 +1,102 @@
+"""Представление постов и комментариев в JSON.
+
+Каждое поле знает, какие столбцы и связи ему нужны, поэтому при
+`?fields=id,text` запрос выбирает только эти столбцы и не соединяет
+лишние таблицы.
+"""
+from collections import namedtuple
+
+from django.urls import reverse
+
+Field = namedtuple('Field', 'columns relations getter')
+
+
+def _image(post, request):
+    if not post.image:
+        return None
+    return {
+        'url': request.build_absolute_uri(post.image.url),
+        'renditions': {
+            name: {
+                image_format: {
+                    **rendition,
+                    'url': request.build_absolute_uri(rendition['url']),
+                }
+                for image_format, rendition in formats.items()
+            }
+            for name, formats in post.renditions.items()
+            if name != 'source'
+        },
+    }
+
+
+POST_FIELDS = {
+    'id': Field(('id',), (), lambda post, request: post.pk),
+    'text': Field(('text',), (), lambda post, request: post.text),
+    'created': Field(
+        ('created',), (), lambda post, request: post.created.isoformat()
+    ),
+    'author': Field(
+        ('author__username',), ('author',),
+        lambda post, request: post.author.username,
+    ),
+    'group': Field(
+        ('group__slug',), ('group',),
+        lambda post, request: post.group.slug if post.group else None,
+    ),
+    'image': Field(('image', 'thumbnails'), (), _image),
+    'comments_count': Field(
+        ('comments_count',), (), lambda post, request: post.comments_count
+    ),
+    'url': Field(
+        (), (),
+        lambda post, request: request.build_absolute_uri(
+            reverse('posts:post_detail', args=[post.pk])
+        ),
+    ),
+}
+COMMENT_FIELDS = {
+    'id': Field(('id',), (), lambda comment, request: comment.pk),
+    'text': Field(('text',), (), lambda comment, request: comment.text),
+    'created': Field(
+        ('created',), (),
+        lambda comment, request: comment.created.isoformat(),
+    ),
+    'author': Field(
+        ('author__username',), ('author',),
+        lambda comment, request: comment.author.username,
+    ),
+    'parent': Field(
+        ('parent',), (), lambda comment, request: comment.parent_id
+    ),
+}
+# Столбцы курсора нужны всегда, даже если их нет в ?fields=.
+CURSOR_COLUMNS = ('id', 'created')
+
+
+def parse_fields(value, available):
+    """Имена полей из ?fields=; None, если есть неизвестные."""
+    if not value:
+        return list(available)
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    if not names or any(name not in available for name in names):
+        return None
+    return names
+
+
+def restrict(queryset, names, available):
+    """Ограничивает выборку столбцами и связями полей names."""
+    if len(names) == len(available):
+        return queryset
+    columns = set(CURSOR_COLUMNS)
+    relations = set()
+    for name in names:
+        columns.update(available[name].columns)
+        relations.update(available[name].relations)
+    return queryset.select_related(None).select_related(
+        *sorted(relations)
+    ).only(*sorted(columns))
+
+
+def serialize(obj, names, available, request):
+    return {name: available[name].getter(obj, request) for name in names}
@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import run_on_commit
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author,
+                group=cls.group if number % 2 else None,
+            )
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_endpoints(self):
+        urls = {
+            reverse('api:posts'): 5,
+            reverse('api:group_posts', args=['group']): 2,
+            reverse('api:profile_posts', args=['author']): 5,
+            reverse('api:post_comments', args=[self.posts[0].pk]): 1,
+            reverse('api:follow_posts'): 5,
+        }
+        for url, count in urls.items():
+            with self.subTest(url=url):
+                response = self.reader_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()['results']), count)
+                self.assertTrue(response.has_header('ETag'))
+                self.assertTrue(response.has_header('Last-Modified'))
+                repeated = self.reader_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(repeated.status_code, 304)
+
+    def test_post_fields(self):
+        data = self.client.get(reverse('api:posts')).json()
+        post = data['results'][0]
+        self.assertEqual(post['id'], self.posts[-1].pk)
+        self.assertEqual(post['author'], 'author')
+        self.assertEqual(post['group'], None)
+        self.assertIsNone(data['next'])
+
+    def test_sparse_fields(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse('api:posts'), {'fields': 'id,text'}
+            )
+        self.assertEqual(
+            set(response.json()['results'][0]), {'id', 'text'}
+        )
+        response = self.client.get(reverse('api:posts'), {'fields': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_pagination(self):
+        url = reverse('api:posts')
+        first = self.client.get(url, {'limit': 2}).json()
+        second = self.client.get(first['next']).json()
+        self.assertEqual(
+            [post['id'] for post in first['results'] + second['results']],
+            [post.pk for post in reversed(self.posts)][:4],
+        )
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+
+    def test_not_modified_without_queries(self):
+        url = reverse('api:posts')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with run_on_commit():
+            Post.objects.create(text='Новый', author=self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_comment_changes_comments_etag(self):
+        url = reverse('api:post_comments', args=[self.posts[0].pk])
+        etag = self.client.get(url)['ETag']
+        with run_on_commit():
+            Comment.objects.create(
+                post=self.posts[0], author=self.reader, text='Ещё'
+            )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_follow_requires_login(self):
+        response = self.client.get(reverse('api:follow_posts'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_unknown_objects(self):
+        for url in (
+            reverse('api:group_posts', args=['missing']),
+            reverse('api:profile_posts', args=['missing']),
+            reverse('api:post_comments', args=[0]),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
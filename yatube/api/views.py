@@ -0,0 +1,157 @@
+"""Read-only JSON API лент: /api/v1/.
+
+Ответы лент помечаются ETag и Last-Modified по поколениям областей
+posts.feed_cache. Если клиент прислал If-None-Match или
+If-Modified-Since и лента не менялась, ответ 304 отдаётся до обращения
+к базе данных.
+"""
+from functools import wraps
+
+from django.http import JsonResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_GET
+
+from core.paginator import CursorPaginator
+from posts import feed_cache, timeline
+from posts.conditional import conditional, lookup
+from posts.models import Comment, Group, Post, User
+
+from . import serializers
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def error(message, status):
+    return JsonResponse(
+        {'detail': message}, status=status,
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+def login_required(view):
+    """Вместо редиректа на форму входа отвечает 401."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return error('Нужно войти.', 401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def feed_scopes(request, **kwargs):
+    """Области feed_cache, от которых зависит ответ; None - 404."""
+    name = request.resolver_match.url_name
+    if name == 'posts':
+        return [feed_cache.index_scope()]
+    if name == 'group_posts':
+        pk = lookup(Group.objects, 'slug', kwargs['slug'])
+        return pk and [feed_cache.group_scope(pk)]
+    if name == 'profile_posts':
+        pk = lookup(User.objects, 'username', kwargs['username'])
+        return pk and [feed_cache.author_scope(pk)]
+    if name == 'post_comments':
+        return [feed_cache.post_scope(kwargs['post_id'])]
+    # Лента подписок различается по пользователю через свою область.
+    return [
+        feed_cache.index_scope(), feed_cache.follow_scope(request.user.pk)
+    ]
+
+
+def feed_view(view):
+    """Условный GET по поколениям лент и обязательная перепроверка."""
+    return require_GET(conditional(feed_scopes, per_user=False)(view))
+
+
+def page_response(request, queryset, available,
+                  paginator_class=CursorPaginator):
+    names = serializers.parse_fields(request.GET.get('fields'), available)
+    if names is None:
+        return error(
+            'Неизвестное поле в fields. Доступны: '
+            + ', '.join(available), 400
+        )
+    try:
+        limit = min(int(request.GET.get('limit', PAGE_SIZE)), MAX_PAGE_SIZE)
+    except ValueError:
+        return error('limit должен быть числом.', 400)
+    if limit < 1:
+        return error('limit должен быть больше нуля.', 400)
+    queryset = serializers.restrict(queryset, names, available)
+    paginator = paginator_class(queryset, limit)
+    page = paginator.get_cursor_page(
+        after=request.GET.get('after'), before=request.GET.get('before')
+    )
+    params = request.GET.copy()
+    links = {}
+    for name, cursor, present in (
+        ('next', 'after', page.has_next()),
+        ('previous', 'before', page.has_previous()),
+    ):
+        links[name] = None
+        if present:
+            params.pop('after', None)
+            params.pop('before', None)
+            params[cursor] = getattr(paginator, f'{name}_cursor')
+            links[name] = request.build_absolute_uri(
+                f'{request.path}?{params.urlencode()}'
+            )
+    return JsonResponse(
+        {
+            'results': [
+                serializers.serialize(obj, names, available, request)
+                for obj in page
+            ],
+            **links,
+        },
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+@feed_view
+def posts(request):
+    return page_response(
+        request, Post.objects.for_feed(), serializers.POST_FIELDS
+    )
+
+
+@feed_view
+def group_posts(request, slug):
+    group = Group.objects.filter(slug=slug).first()
+    if group is None:
+        return error('Группа не найдена.', 404)
+    return page_response(
+        request, group.posts.for_feed(), serializers.POST_FIELDS
+    )
+
+
+@feed_view
+def profile_posts(request, username):
+    author = User.objects.filter(username=username).first()
+    if author is None:
+        return error('Автор не найден.', 404)
+    return page_response(
+        request, author.posts.for_feed(), serializers.POST_FIELDS
+    )
+
+
+@feed_view
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return error('Пост не найден.', 404)
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    )
+    return page_response(request, comments, serializers.COMMENT_FIELDS)
+
+
+@login_required
+@cache_control(private=True)
+@feed_view
+def follow_posts(request):
+    return page_response(
+        request,
+        Post.objects.for_feed(),
+        serializers.POST_FIELDS,
+        timeline.paginator(request.user),
+    )
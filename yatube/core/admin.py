@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'name', 'status', 'attempts', 'run_at', 'locked_by',
+        'finished'
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'key')
+    readonly_fields = ('created',)
+
+
+admin.site.register(Job, JobAdmin)
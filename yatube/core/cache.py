@@ -0,0 +1,295 @@
+"""Кэш в файле SQLite, общий для всех процессов на одной машине.
+
+LocMemCache живёт внутри процесса: у каждого воркера gunicorn свой
+холодный кэш, и сброс поколений лент до других воркеров не доходит.
+SQLiteCache хранит записи в одном файле в режиме WAL, поэтому
+читатели не блокируют писателя, а incr атомарен между процессами.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.SQLiteCache',
+            'LOCATION': '/var/tmp/yatube-cache.sqlite3',
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        }
+    }
+
+Записи вытесняются по давности обращения (LRU). Время обращения
+обновляется не чаще раза в ACCESS_RESOLUTION секунд, чтобы чтение
+почти никогда не превращалось в запись.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from . import metrics
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+    'expires REAL, accessed REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+)
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.location = location
+        self.access_resolution = options.get('ACCESS_RESOLUTION', 60)
+        # Проверять размер на каждой записи дорого: COUNT(*) в SQLite
+        # читает весь индекс. Между проверками кэш может ненадолго
+        # превысить MAX_ENTRIES на cull_interval записей.
+        self.cull_interval = options.get('CULL_INTERVAL', 64)
+        self.busy_timeout = options.get('BUSY_TIMEOUT', 5)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0}
+
+    @property
+    def _db(self):
+        # Соединение своё у каждого потока и у каждого процесса после fork.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.location)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self.location,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self._stats[name] += value
+
+    def _alive(self, expires, now):
+        return expires is None or expires > now
+
+    def _touch_rows(self, rows, now):
+        stale = [
+            key for key, accessed in rows
+            if now - accessed >= self.access_resolution
+        ]
+        if stale:
+            self._db.executemany(
+                'UPDATE cache SET accessed = ? WHERE key = ?',
+                [(now, key) for key in stale],
+            )
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        values = self._get_rows([key])
+        if key not in values:
+            return default
+        return values[key]
+
+    def get_many(self, keys, version=None):
+        key_map = {}
+        for key in keys:
+            made = self.make_key(key, version=version)
+            self.validate_key(made)
+            key_map[made] = key
+        values = self._get_rows(list(key_map))
+        return {key_map[key]: value for key, value in values.items()}
+
+    def _get_rows(self, keys):
+        if not keys:
+            return {}
+        now = time.time()
+        placeholders = ', '.join('?' * len(keys))
+        rows = self._db.execute(
+            'SELECT key, value, expires, accessed FROM cache '
+            f'WHERE key IN ({placeholders})',
+            keys,
+        ).fetchall()
+        values = {}
+        touched = []
+        for key, value, expires, accessed in rows:
+            if self._alive(expires, now):
+                values[key] = pickle.loads(value)
+                touched.append((key, accessed))
+        self._touch_rows(touched, now)
+        self._count('hits', len(values))
+        self._count('misses', len(keys) - len(values))
+        metrics.record_cache(len(values), len(keys) - len(values))
+        return values
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout=timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        expires = self.get_backend_timeout(timeout)
+        rows = []
+        for key, value in data.items():
+            key = self.make_key(key, version=version)
+            self.validate_key(key)
+            rows.append((
+                key, pickle.dumps(value, self.pickle_protocol), expires, now
+            ))
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires, accessed) '
+                'VALUES (?, ?, ?, ?)',
+                rows,
+            )
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        self._count('sets', len(rows))
+        self._maybe_cull(len(rows))
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        now = time.time()
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?', (key, now)
+            )
+            added = db.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires, accessed) '
+                'VALUES (?, ?, ?, ?)',
+                (
+                    key,
+                    pickle.dumps(value, self.pickle_protocol),
+                    self.get_backend_timeout(timeout),
+                    now,
+                ),
+            ).rowcount
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        if added:
+            self._count('sets')
+            self._maybe_cull(1)
+        return bool(added)
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        db = self._db
+        # BEGIN IMMEDIATE берёт блокировку записи до чтения, поэтому
+        # два процесса не прочитают одно и то же значение.
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute(
+                'SELECT value, expires FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or not self._alive(row[1], time.time()):
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            db.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (pickle.dumps(value, self.pickle_protocol), key),
+            )
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return bool(self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        ).rowcount)
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._db.execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone() is not None
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_key(key, version=version) for key in keys]
+        for key in keys:
+            self.validate_key(key)
+        self._db.executemany(
+            'DELETE FROM cache WHERE key = ?', [(key,) for key in keys]
+        )
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение переиспользуется между запросами, как и у LocMemCache.
+        pass
+
+    def _maybe_cull(self, written):
+        with self._lock:
+            self._writes += written
+            if self._writes < self.cull_interval:
+                return
+            self._writes = 0
+        self._cull()
+
+    def _cull(self):
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            evicted = db.execute(
+                'DELETE FROM cache WHERE expires <= ?', (time.time(),)
+            ).rowcount
+            count = db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+            if count > self._max_entries:
+                # CULL_FREQUENCY=0 означает очистить кэш целиком.
+                batch = count
+                if self._cull_frequency:
+                    batch = max(
+                        count - self._max_entries,
+                        count // self._cull_frequency,
+                    )
+                evicted += db.execute(
+                    'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                    'ORDER BY accessed LIMIT ?)',
+                    (batch,),
+                ).rowcount
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        self._count('evictions', evicted)
+
+    def stats(self):
+        """Счётчики этого процесса и общий размер кэша."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['entries'] = self._db.execute(
+            'SELECT COUNT(*) FROM cache'
+        ).fetchone()[0]
+        return stats
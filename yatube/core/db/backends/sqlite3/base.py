@@ -0,0 +1,125 @@
+"""SQLite, настроенный для одновременных запросов.
+
+    DATABASES = {
+        'default': {
+            'ENGINE': 'core.db.backends.sqlite3',
+            'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+            'CONN_MAX_AGE': 60,
+            'OPTIONS': {
+                'timeout': 20,
+                'transaction_mode': 'IMMEDIATE',
+                'pragmas': {'mmap_size': 0},
+            },
+        }
+    }
+
+При каждом соединении выполняются PRAGMA из PRAGMAS, дополненные
+OPTIONS['pragmas']: журнал WAL (читатели не ждут писателя),
+synchronous=NORMAL (в WAL это безопасно при падении процесса), кэш
+страниц и mmap. timeout - сколько секунд SQLite ждёт снятия блокировки.
+
+transaction_mode задаёт, с какой блокировкой начинается atomic().
+По умолчанию SQLite берёт блокировку записи только на первой записи,
+и если её уже держит другое соединение, транзакция получает
+"database is locked" сразу, не дожидаясь timeout: отпустить чтение,
+не откатившись, она не может. BEGIN IMMEDIATE берёт блокировку
+на входе, где timeout работает.
+
+Запросы вне транзакции, которые всё же получили блокировку, курсор
+повторяет до lock_retries раз с паузой lock_backoff * 2**попытка
+секунд. Внутри транзакции повторять нельзя: её уже откатил SQLite
+или её продолжение зависит от предыдущих запросов.
+"""
+import sqlite3
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+from core import metrics
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # Отрицательное значение - в КиБ: 20 МБ кэша на соединение.
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+LOCK_RETRIES = 3
+LOCK_BACKOFF = 0.05
+# Ключи OPTIONS, которые не передаются в sqlite3.connect().
+OWN_OPTIONS = ('pragmas', 'transaction_mode', 'lock_retries', 'lock_backoff')
+
+
+def is_locked(error):
+    return 'locked' in str(error)
+
+
+class RetryingCursorWrapper(base.SQLiteCursorWrapper):
+    alias = None
+    lock_retries = LOCK_RETRIES
+    lock_backoff = LOCK_BACKOFF
+
+    def execute(self, query, params=None):
+        return self._retry(super().execute, query, params)
+
+    def executemany(self, query, param_list):
+        if self.lock_retries:
+            # Генератор параметров не пережил бы повтор.
+            param_list = list(param_list)
+        return self._retry(super().executemany, query, param_list)
+
+    def _retry(self, execute, *args):
+        attempt = 0
+        while True:
+            try:
+                return execute(*args)
+            except sqlite3.OperationalError as error:
+                if (
+                    attempt >= self.lock_retries
+                    or self.connection.in_transaction
+                    or not is_locked(error)
+                ):
+                    raise
+            metrics.db_lock_retries.inc(self.alias)
+            time.sleep(self.lock_backoff * 2 ** attempt)
+            attempt += 1
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = {**PRAGMAS, **options.get('pragmas', {})}
+        self.transaction_mode = options.get('transaction_mode', 'DEFERRED')
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f'transaction_mode должен быть одним из {TRANSACTION_MODES}, '
+                f'а не {self.transaction_mode!r}.'
+            )
+        self.lock_retries = options.get('lock_retries', LOCK_RETRIES)
+        self.lock_backoff = options.get('lock_backoff', LOCK_BACKOFF)
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for name in OWN_OPTIONS:
+            params.pop(name, None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=RetryingCursorWrapper)
+        cursor.alias = self.alias
+        cursor.lock_retries = self.lock_retries
+        cursor.lock_backoff = self.lock_backoff
+        return cursor
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,75 @@
+"""Репликация SQLite для разработки и тестов: копия файла через backup.
+
+Настоящей реплики у SQLite нет, поэтому файл реплики периодически
+перезаписывается копией основной БД:
+
+    python manage.py replicate --interval 1
+
+sqlite3 backup копирует страницы согласованного снимка, читатели
+реплики видят либо старую копию, либо новую целиком. Отставание
+реплики - до интервала копирования, как у асинхронной репликации.
+
+После каждой копии в кэше растёт эпоха реплики. read_epoch()
+добавляется к ключам кэша фрагментов и ETag страниц, которые
+читаются с реплики: иначе страница, прочитанная со старой копии
+после сброса поколения, осталась бы в кэше до следующего сброса.
+"""
+import sqlite3
+import time
+
+from django.core.cache import cache
+from django.db import connections
+
+from .routers import read_alias
+
+EPOCH_KEY = 'db:replica:epoch:{}'
+# Читатели реплики держат файл открытым (CONN_MAX_AGE) и на время
+# запроса блокируют запись в него. Копия ждёт их не дольше
+# BUSY_TIMEOUT секунд и повторяется через BACKOFF * 2**попытка секунд.
+BUSY_TIMEOUT = 5
+ATTEMPTS = 4
+BACKOFF = 0.5
+BUSY = (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+
+
+def sync(alias, source='default'):
+    """Копирует source в файл реплики alias; возвращает секунды."""
+    started = time.perf_counter()
+    for attempt in range(ATTEMPTS):
+        try:
+            _backup(
+                connections[source].settings_dict['NAME'],
+                connections[alias].settings_dict['NAME'],
+            )
+            break
+        except sqlite3.OperationalError as error:
+            if 'locked' not in str(error) or attempt == ATTEMPTS - 1:
+                raise
+            time.sleep(BACKOFF * 2 ** attempt)
+    cache.set(EPOCH_KEY.format(alias), time.time_ns(), None)
+    return time.perf_counter() - started
+
+
+def _backup(source, target):
+    deadline = time.monotonic() + BUSY_TIMEOUT
+
+    def progress(status, remaining, total):
+        # Сам backup повторяет занятый шаг бесконечно.
+        if status in BUSY and time.monotonic() > deadline:
+            raise sqlite3.OperationalError('database is locked')
+
+    primary = sqlite3.connect(source, uri=True)
+    replica = sqlite3.connect(target, uri=True, timeout=BUSY_TIMEOUT)
+    try:
+        primary.backup(replica, progress=progress)
+    finally:
+        replica.close()
+        primary.close()
+
+
+def read_epoch():
+    """Метка копии, с которой читает запрос; '' для основной БД."""
+    alias = read_alias()
+    if alias is None:
+        return ''
+    return f'{alias}:{cache.get(EPOCH_KEY.format(alias), 0)}'
@@ -0,0 +1,106 @@
+"""Чтение лент с реплик, запись и всё остальное - в основную БД.
+
+    DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+    DATABASE_REPLICAS = ['replica']
+    DATABASE_REPLICA_SELECTION = 'round_robin'  # или 'least_loaded'
+    DATABASE_PIN_SECONDS = 10
+
+Реплики - псевдонимы из DATABASES с копией основной БД (см.
+core.db.replication). На реплику уходят только чтения представлений,
+обёрнутых replica_reads; реплика выбирается одна на запрос: по кругу
+или с наименьшим числом запросов, которые сейчас читают с неё в этом
+процессе. Пока DATABASE_REPLICAS пуст, все запросы идут в default.
+
+Реплика отстаёт от основной БД, поэтому после записи пользователь
+читает только основную: первая запись в запросе переключает его
+оставшиеся чтения на default, а PrimaryPinMiddleware ставит cookie,
+с которой его запросы DATABASE_PIN_SECONDS секунд не идут на реплики.
+"""
+import threading
+from collections import Counter
+from functools import wraps
+from itertools import count
+
+from django.conf import settings
+from django.db import connections
+
+PIN_COOKIE = 'primary_pin'
+READ_METHODS = ('GET', 'HEAD')
+
+_state = threading.local()
+_lock = threading.Lock()
+_in_flight = Counter()
+_turn = count()
+
+
+def read_alias():
+    """Реплика, с которой читает текущий запрос, или None."""
+    return getattr(_state, 'read_alias', None)
+
+
+def choose_replica():
+    replicas = settings.DATABASE_REPLICAS
+    # Начало списка сдвигается по кругу, чтобы при равной загрузке
+    # реплики тоже чередовались.
+    start = next(_turn) % len(replicas)
+    candidates = replicas[start:] + replicas[:start]
+    if settings.DATABASE_REPLICA_SELECTION == 'least_loaded':
+        with _lock:
+            return min(candidates, key=lambda alias: _in_flight[alias])
+    return candidates[0]
+
+
+def start_request():
+    _state.wrote = False
+    _state.read_alias = None
+
+
+def finish_request():
+    """True, если запрос писал в БД."""
+    wrote = getattr(_state, 'wrote', False)
+    start_request()
+    return wrote
+
+
+def replica_reads(view):
+    """Читает представление с реплики, если пользователь недавно не писал."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (
+            not settings.DATABASE_REPLICAS
+            or request.method not in READ_METHODS
+            or PIN_COOKIE in request.COOKIES
+            or getattr(_state, 'wrote', False)
+        ):
+            return view(request, *args, **kwargs)
+        alias = choose_replica()
+        with _lock:
+            _in_flight[alias] += 1
+        _state.read_alias = alias
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _state.read_alias = None
+            with _lock:
+                _in_flight[alias] -= 1
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        # После записи запрос дочитывает то, что записал, из default.
+        _state.wrote = True
+        _state.read_alias = None
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в основной БД.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики зеркалируют default (TEST MIRROR), их схема приходит
+        # вместе с копией основной БД.
+        return connections[db].settings_dict['TEST']['MIRROR'] is None
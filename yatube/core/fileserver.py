@@ -0,0 +1,237 @@
+"""Отдача статики и загруженных файлов на уровне WSGI.
+
+    application = FileServer(get_wsgi_application())
+
+Запросы к STATIC_URL и MEDIA_URL обслуживаются до Django: без
+middleware, сессий и шаблонов. Список статики читается один раз при
+старте из STATIC_ROOT (после collectstatic он не меняется), медиа
+ищутся на диске при каждом запросе. Файл отдаётся через
+wsgi.file_wrapper, который gunicorn и uWSGI превращают в sendfile.
+
+- файлы с хэшем в имени получают Cache-Control на год и immutable,
+  остальные - STATIC_MAX_AGE и MEDIA_MAX_AGE секунд;
+- заранее сжатые копии .br и .gz отдаются по Accept-Encoding;
+- ETag и Last-Modified, ответ 304 на условные запросы;
+- запросы Range для докачки и перемотки (одна часть на запрос).
+
+Если файла нет, запрос уходит в Django - в разработке его найдёт
+django.conf.urls.static.
+"""
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from wsgiref.headers import Headers
+
+from django.conf import settings
+
+# Хэш, который ManifestStaticFilesStorage вставляет в имя файла.
+HASHED = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+BLOCK_SIZE = 64 * 1024
+
+
+class StaticFile:
+    """Файл на диске и готовые заголовки ответа для него."""
+
+    def __init__(self, path, url, max_age):
+        stat = os.stat(path)
+        self.path = path
+        self.size = stat.st_size
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.mtime = int(stat.st_mtime)
+        self.etag = f'"{self.mtime:x}-{self.size:x}"'
+        content_type, _ = mimetypes.guess_type(path)
+        self.content_type = content_type or 'application/octet-stream'
+        if self.content_type.startswith('text/'):
+            self.content_type += '; charset=utf-8'
+        if HASHED.search(url):
+            self.cache_control = IMMUTABLE
+        else:
+            self.cache_control = f'public, max-age={max_age}'
+        self.encoded = {
+            encoding: path + suffix
+            for encoding, suffix in ENCODINGS
+            if os.path.isfile(path + suffix)
+        }
+
+    def headers(self):
+        return Headers([
+            ('Content-Type', self.content_type),
+            ('Cache-Control', self.cache_control),
+            ('Last-Modified', self.last_modified),
+            ('ETag', self.etag),
+            ('Accept-Ranges', 'bytes'),
+        ])
+
+
+def not_modified(environ, static_file):
+    if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or static_file.etag in tags or (
+            'W/' + static_file.etag in tags
+        )
+    if_modified_since = environ.get('HTTP_IF_MODIFIED_SINCE')
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return static_file.mtime <= since
+    return False
+
+
+def choose_encoding(environ, static_file):
+    """Лучшее сжатое представление, которое принимает клиент."""
+    accepted = set()
+    for item in environ.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, _, params = item.strip().partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00'):
+            accepted.add(name.strip().lower())
+    for encoding, _ in ENCODINGS:
+        if encoding in static_file.encoded and encoding in accepted:
+            return encoding
+    return None
+
+
+def parse_range(header, size):
+    """(начало, длина) для `Range: bytes=...`, None - весь файл.
+
+    ValueError, если диапазон не пересекается с файлом.
+    """
+    match = re.fullmatch(r'bytes=(\d*)-(\d*)', header.strip())
+    if match is None or match.group(1) == match.group(2) == '':
+        # Несколько частей и непонятные единицы не поддерживаем.
+        return None
+    first, last = match.groups()
+    if first == '':
+        length = min(int(last), size)
+        if length == 0:
+            raise ValueError(header)
+        return size - length, length
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end - start + 1
+
+
+def iter_range(file, start, length):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(BLOCK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+class FileServer:
+    def __init__(self, application):
+        self.application = application
+        self.static_url = settings.STATIC_URL
+        self.media_url = settings.MEDIA_URL
+        self.media_root = os.path.realpath(settings.MEDIA_ROOT)
+        self.static_files = self.scan_static(settings.STATIC_ROOT)
+
+    def scan_static(self, root):
+        files = {}
+        if not root or not os.path.isdir(root):
+            return files
+        for directory, _, names in os.walk(root):
+            for name in names:
+                if name.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, name)
+                url = os.path.relpath(path, root).replace(os.sep, '/')
+                files[self.static_url + url] = StaticFile(
+                    path, url, settings.STATIC_MAX_AGE
+                )
+        return files
+
+    def find(self, path):
+        if path.startswith(self.static_url):
+            return self.static_files.get(path)
+        if not path.startswith(self.media_url):
+            return None
+        name = path[len(self.media_url):]
+        if '\x00' in name:
+            # realpath падает на нулевом байте; такого файла нет.
+            return None
+        full_path = os.path.realpath(os.path.join(self.media_root, name))
+        # ../ в адресе не должен вывести за пределы MEDIA_ROOT.
+        if not full_path.startswith(self.media_root + os.sep):
+            return None
+        if not os.path.isfile(full_path):
+            return None
+        return StaticFile(full_path, name, settings.MEDIA_MAX_AGE)
+
+    def __call__(self, environ, start_response):
+        static_file = None
+        if environ['REQUEST_METHOD'] in ('GET', 'HEAD'):
+            # Сервер WSGI передаёт путь байтами в latin-1.
+            path = environ.get('PATH_INFO', '').encode('latin-1').decode(
+                'utf-8', 'replace'
+            )
+            static_file = self.find(path)
+        if static_file is None:
+            return self.application(environ, start_response)
+        return self.serve(static_file, environ, start_response)
+
+    def serve(self, static_file, environ, start_response):
+        headers = static_file.headers()
+        if static_file.encoded:
+            headers['Vary'] = 'Accept-Encoding'
+        if not_modified(environ, static_file):
+            del headers['Content-Type']
+            start_response('304 Not Modified', headers.items())
+            return []
+        encoding = choose_encoding(environ, static_file)
+        if encoding is not None:
+            # Диапазоны сжатого представления не поддерживаем.
+            headers['Content-Encoding'] = encoding
+            path = static_file.encoded[encoding]
+            return self.send(
+                environ, start_response, '200 OK', headers, path,
+                0, os.path.getsize(path),
+            )
+        size = static_file.size
+        try:
+            byte_range = parse_range(environ.get('HTTP_RANGE', ''), size)
+        except ValueError:
+            headers['Content-Range'] = f'bytes */{size}'
+            del headers['Content-Type']
+            headers['Content-Length'] = '0'
+            start_response('416 Range Not Satisfiable', headers.items())
+            return []
+        if byte_range is None:
+            return self.send(
+                environ, start_response, '200 OK', headers,
+                static_file.path, 0, size,
+            )
+        start, length = byte_range
+        headers['Content-Range'] = f'bytes {start}-{start + length - 1}/{size}'
+        return self.send(
+            environ, start_response, '206 Partial Content', headers,
+            static_file.path, start, length,
+        )
+
+    def send(self, environ, start_response, status, headers, path, start,
+             length):
+        headers['Content-Length'] = str(length)
+        start_response(status, headers.items())
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file = open(path, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        whole = start == 0 and length == os.fstat(file.fileno()).st_size
+        if whole and file_wrapper is not None:
+            # Весь файл: сервер может отдать его через sendfile.
+            # file_wrapper не знает длины и отдаёт файл до конца.
+            return file_wrapper(file, BLOCK_SIZE)
+        return iter_range(file, start, length)
@@ -0,0 +1,167 @@
+"""Очередь фоновых задач в таблице core.Job.
+
+Задача - функция уровня модуля с аргументами, которые можно записать
+в JSON. `enqueue` пишет строку в той же транзакции, что и данные,
+поэтому воркер не увидит задачу раньше её данных и не потеряет её при
+откате. Выполняет задачи `manage.py runworker` пулом потоков
+(и при желании несколькими процессами).
+
+Упавшая задача повторяется через JOBS_RETRY_BACKOFF * 2**(попытка - 1)
+секунд, но не позже чем через JOBS_RETRY_BACKOFF_MAX, пока не кончатся
+попытки. Задача с ключом `key` не ставится второй раз, пока первая ещё
+ждёт в очереди. При JOBS_EAGER задачи выполняются сразу в вызывающем
+потоке - так удобнее в тестах и командах.
+"""
+import json
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import metrics
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def task_name(func):
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def enqueue(func, *args, key=None, delay=0, max_attempts=None):
+    """Поставить func(*args) в очередь; возвращает задачу или None."""
+    if settings.JOBS_EAGER:
+        func(*args)
+        return None
+    job = Job(
+        name=task_name(func),
+        args=json.dumps(args),
+        key=key,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    if key is None:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        # Такая же задача уже ждёт в очереди.
+        return Job.objects.filter(key=key, status=Job.QUEUED).first()
+    return job
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker, limit):
+    """Забирает до limit готовых к запуску задач."""
+    if limit <= 0:
+        return []
+    candidates = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=timezone.now()
+    ).order_by('run_at', 'pk').values_list('pk', flat=True)[:limit]
+    claimed = []
+    for pk in list(candidates):
+        # Строку забирает только один воркер: остальные не найдут
+        # её в состоянии queued.
+        updated = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            locked_by=worker,
+            locked_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(pk)
+    return list(Job.objects.filter(pk__in=claimed).order_by('run_at', 'pk'))
+
+
+def backoff(attempts):
+    return min(
+        settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1),
+        settings.JOBS_RETRY_BACKOFF_MAX,
+    )
+
+
+def run(job):
+    """Выполняет забранную задачу и записывает результат."""
+    started = time.perf_counter()
+    try:
+        import_string(job.name)(*json.loads(job.args))
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            result = 'retry'
+            changes = {
+                'status': Job.QUEUED,
+                'run_at': timezone.now() + timedelta(
+                    seconds=backoff(job.attempts)
+                ),
+            }
+        else:
+            result = 'failed'
+            changes = {'status': Job.FAILED, 'finished': timezone.now()}
+            logger.error('Задача %s не выполнена:\n%s', job, error)
+        changes['last_error'] = error
+    else:
+        result = 'done'
+        changes = {'status': Job.DONE, 'finished': timezone.now()}
+    finally:
+        metrics.job_seconds.observe(
+            job.name, value=time.perf_counter() - started
+        )
+    metrics.jobs.inc(job.name, result)
+    try:
+        Job.objects.filter(pk=job.pk).update(**changes)
+    except IntegrityError:
+        # Пока задача выполнялась, в очередь встала такая же:
+        # повторять эту уже незачем.
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED, finished=timezone.now(),
+            last_error=changes['last_error'],
+        )
+    return result
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи воркеров, которые не дожили до конца."""
+    stale = timezone.now() - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    stale_jobs = Job.objects.filter(status=Job.RUNNING, locked_at__lt=stale)
+    requeued = 0
+    for pk in list(stale_jobs.values_list('pk', flat=True)):
+        try:
+            requeued += Job.objects.filter(
+                pk=pk, status=Job.RUNNING
+            ).update(status=Job.QUEUED)
+        except IntegrityError:
+            Job.objects.filter(pk=pk).update(
+                status=Job.FAILED, finished=timezone.now()
+            )
+    return requeued
+
+
+def purge():
+    """Удаляет давно завершённые задачи."""
+    finished = timezone.now() - timedelta(days=settings.JOBS_KEEP_DAYS)
+    deleted, _ = Job.objects.filter(
+        status__in=[Job.DONE, Job.FAILED], finished__lt=finished
+    ).delete()
+    return deleted
+
+
+def run_in_thread(job):
+    try:
+        return run(job)
+    finally:
+        # У каждого потока пула свои соединения с БД.
+        connections.close_all()
@@ -0,0 +1,40 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.db import replication
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную БД SQLite в файлы реплик DATABASE_REPLICAS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=1,
+            help='секунд между копиями'
+        )
+        parser.add_argument(
+            '--once', action='store_true', help='скопировать один раз'
+        )
+
+    def handle(self, *args, **options):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            raise CommandError('DATABASE_REPLICAS пуст.')
+        while True:
+            for alias in replicas:
+                try:
+                    seconds = replication.sync(alias)
+                except sqlite3.OperationalError as error:
+                    if options['once']:
+                        raise CommandError(f'{alias}: {error}')
+                    # Реплика занята читателями: скопируем в следующий раз.
+                    self.stderr.write(f'{alias}: {error}')
+                    continue
+                if options['once'] or options['verbosity'] > 1:
+                    self.stdout.write(f'{alias}: {seconds * 1000:.0f} мс')
+            if options['once']:
+                return
+            time.sleep(options['interval'])
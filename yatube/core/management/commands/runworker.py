@@ -0,0 +1,89 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import jobs, metrics
+
+# Как часто возвращать в очередь зависшие задачи и чистить старые.
+MAINTENANCE_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди core.jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=settings.JOBS_WORKER_THREADS,
+            help='потоков в каждом процессе'
+        )
+        parser.add_argument(
+            '--processes', type=int, default=1, help='процессов воркера'
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='выйти, когда в очереди не останется готовых задач'
+        )
+
+    def handle(self, *args, **options):
+        threads, burst = options['threads'], options['burst']
+        if options['processes'] == 1:
+            self.work(threads, burst)
+            return
+        # Дочерние процессы не должны делить соединения с родителем.
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=self.work, args=(threads, burst))
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+    def work(self, threads, burst):
+        worker = jobs.worker_name()
+        results = {}
+        running = set()
+        maintained = 0
+        with ThreadPoolExecutor(threads, thread_name_prefix='job') as pool:
+            try:
+                while True:
+                    if time.monotonic() - maintained > MAINTENANCE_INTERVAL:
+                        jobs.requeue_stale()
+                        jobs.purge()
+                        maintained = time.monotonic()
+                    claimed = jobs.claim(worker, threads - len(running))
+                    for job in claimed:
+                        running.add(pool.submit(jobs.run_in_thread, job))
+                    if burst and not running:
+                        break
+                    running = self.wait(running, results)
+                    if not running and not claimed:
+                        time.sleep(settings.JOBS_POLL_INTERVAL)
+                    metrics.dump()
+            except KeyboardInterrupt:
+                self.stdout.write('Дожидаемся начатых задач...')
+        metrics.dump(force=True)
+        summary = ', '.join(
+            f'{name}: {count}' for name, count in sorted(results.items())
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Воркер {worker} остановлен. {summary}'
+        ))
+
+    def wait(self, running, results):
+        """Ждёт завершения хотя бы одной задачи, возвращает остальные."""
+        if not running:
+            return running
+        done, running = wait(
+            running, timeout=settings.JOBS_POLL_INTERVAL,
+            return_when=FIRST_COMPLETED,
+        )
+        for future in done:
+            result = future.result()
+            results[result] = results.get(result, 0) + 1
+        return running
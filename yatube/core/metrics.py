@@ -0,0 +1,205 @@
+"""Метрики процесса: время ответов, SQL, шаблоны, кэш, миниатюры,
+фоновые задачи, блокировки БД, лимиты частоты.
+
+Значения копятся в памяти процесса и отдаются в текстовом формате
+Prometheus: страницей /metrics/ для администраторов и файлом
+METRICS_FILE, который раз в METRICS_DUMP_INTERVAL секунд
+перезаписывается (например, для textfile-коллектора node_exporter).
+Данные текущего запроса собираются в RequestStats, которую заводит
+core.middleware.MetricsMiddleware.
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+_lock = threading.Lock()
+_local = threading.local()
+_last_dump = time.monotonic()
+
+
+def _labels(names, values):
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+
+
+class Counter:
+    def __init__(self, name, description, labels):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, *label_values, amount=1):
+        with _lock:
+            self.values[label_values] = (
+                self.values.get(label_values, 0) + amount
+            )
+
+    def render(self):
+        yield f'# HELP {self.name} {self.description}'
+        yield f'# TYPE {self.name} counter'
+        for label_values, value in sorted(self.values.items()):
+            label = _labels(self.labels, label_values)
+            yield f'{self.name}{{{label}}} {value}'
+
+
+class Histogram:
+    def __init__(self, name, description, labels, buckets=SECONDS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        # Значение метки -> [счётчики корзин..., сумма, количество].
+        self.values = {}
+
+    def observe(self, *label_values, value):
+        with _lock:
+            row = self.values.setdefault(
+                label_values, [0] * (len(self.buckets) + 2)
+            )
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self):
+        yield f'# HELP {self.name} {self.description}'
+        yield f'# TYPE {self.name} histogram'
+        for label_values, row in sorted(self.values.items()):
+            label = _labels(self.labels, label_values)
+            for bound, count in zip(self.buckets, row):
+                yield f'{self.name}_bucket{{{label},le="{bound}"}} {count}'
+            yield f'{self.name}_bucket{{{label},le="+Inf"}} {row[-1]}'
+            yield f'{self.name}_sum{{{label}}} {row[-2]}'
+            yield f'{self.name}_count{{{label}}} {row[-1]}'
+
+
+requests = Counter(
+    'yatube_requests_total', 'Ответы по представлениям и кодам.',
+    ('view', 'status'),
+)
+request_seconds = Histogram(
+    'yatube_request_duration_seconds', 'Время ответа.', ('view',)
+)
+sql_queries = Histogram(
+    'yatube_sql_queries', 'SQL-запросов на ответ.', ('view',), QUERIES
+)
+sql_seconds = Histogram(
+    'yatube_sql_duration_seconds', 'Время SQL на ответ.', ('view',)
+)
+template_seconds = Histogram(
+    'yatube_template_render_seconds', 'Отрисовка шаблонов.', ('template',)
+)
+cache_requests = Counter(
+    'yatube_cache_requests_total', 'Обращения к кэшу.', ('result',)
+)
+thumbnail_seconds = Histogram(
+    'yatube_thumbnail_seconds', 'Построение миниатюр поста.',
+    ('rendition', 'format'),
+)
+jobs = Counter(
+    'yatube_jobs_total', 'Выполнения фоновых задач.', ('task', 'result')
+)
+job_seconds = Histogram(
+    'yatube_job_duration_seconds', 'Время фоновых задач.', ('task',)
+)
+db_lock_retries = Counter(
+    'yatube_db_lock_retries_total', 'Повторы SQL после блокировки БД.',
+    ('database',),
+)
+ratelimited = Counter(
+    'yatube_ratelimited_total', 'Запросы, отклонённые лимитом частоты.',
+    ('group',),
+)
+METRICS = (
+    requests, request_seconds, sql_queries, sql_seconds,
+    template_seconds, cache_requests, thumbnail_seconds, jobs, job_seconds,
+    db_lock_retries, ratelimited,
+)
+
+
+class RequestStats:
+    """Счётчики одного запроса; медленные SQL остаются для журнала."""
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0
+        self.template_seconds = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.slowest = []
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.sql_count += 1
+            self.sql_seconds += elapsed
+            self.slowest.append((elapsed, sql))
+            if len(self.slowest) > 10:
+                self.slowest.sort(reverse=True)
+                del self.slowest[5:]
+
+
+def start_request():
+    _local.stats = RequestStats()
+    return _local.stats
+
+
+def finish_request():
+    _local.stats = None
+
+
+def current():
+    return getattr(_local, 'stats', None)
+
+
+def record_cache(hits, misses):
+    if hits:
+        cache_requests.inc('hit', amount=hits)
+    if misses:
+        cache_requests.inc('miss', amount=misses)
+    stats = current()
+    if stats is not None:
+        stats.cache_hits += hits
+        stats.cache_misses += misses
+
+
+def record_template(name, seconds):
+    template_seconds.observe(name, value=seconds)
+    stats = current()
+    if stats is not None:
+        stats.template_seconds += seconds
+
+
+def render():
+    """Все метрики в текстовом формате Prometheus."""
+    with _lock:
+        lines = [line for metric in METRICS for line in metric.render()]
+    return '\n'.join(lines) + '\n'
+
+
+def dump(force=False):
+    """Перезаписывает METRICS_FILE, если подошло время."""
+    global _last_dump
+    path = settings.METRICS_FILE
+    now = time.monotonic()
+    if not path or not (
+        force or now - _last_dump >= settings.METRICS_DUMP_INTERVAL
+    ):
+        return
+    _last_dump = now
+    path = path.format(pid=os.getpid())
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Коллектор не должен прочитать файл наполовину записанным.
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as file:
+        file.write(render())
+    os.replace(temporary, path)
@@ -0,0 +1,91 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+from .db import routers
+
+slow_log = logging.getLogger('yatube.slow_requests')
+
+
+class MetricsMiddleware:
+    """Время ответа, SQL, шаблоны и кэш по представлениям.
+
+    Медленные запросы (дольше SLOW_REQUEST_MS) с вероятностью
+    SLOW_REQUEST_SAMPLE_RATE попадают в журнал yatube.slow_requests
+    вместе с самыми долгими SQL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = metrics.start_request()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(stats.sql_wrapper)
+                    )
+                started = time.perf_counter()
+                response = self.get_response(request)
+                elapsed = time.perf_counter() - started
+        finally:
+            metrics.finish_request()
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        metrics.requests.inc(view, response.status_code)
+        metrics.request_seconds.observe(view, value=elapsed)
+        metrics.sql_queries.observe(view, value=stats.sql_count)
+        metrics.sql_seconds.observe(view, value=stats.sql_seconds)
+        if (
+            elapsed * 1000 >= settings.SLOW_REQUEST_MS
+            and random.random() < settings.SLOW_REQUEST_SAMPLE_RATE
+        ):
+            self.log_slow(request, view, elapsed, stats)
+        metrics.dump()
+        return response
+
+    def log_slow(self, request, view, elapsed, stats):
+        queries = '\n'.join(
+            f'  {seconds * 1000:.1f} мс: {sql}'
+            for seconds, sql in sorted(stats.slowest, reverse=True)[:5]
+        )
+        slow_log.warning(
+            '%s %s (%s) %.0f мс, SQL %d за %.0f мс, шаблоны %.0f мс, '
+            'кэш %d/%d\n%s',
+            request.method, request.get_full_path(), view, elapsed * 1000,
+            stats.sql_count, stats.sql_seconds * 1000,
+            stats.template_seconds * 1000,
+            stats.cache_hits, stats.cache_hits + stats.cache_misses,
+            queries,
+        )
+
+
+class PrimaryPinMiddleware:
+    """После записи в БД пользователь читает только основную БД.
+
+    Cookie живёт DATABASE_PIN_SECONDS: за это время реплики успевают
+    получить запись, см. core.db.routers.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.finish_request()
+        if wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                routers.PIN_COOKIE, '1',
+                max_age=settings.DATABASE_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
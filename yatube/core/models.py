@@ -12,3 +12,56 @@ class CreatedModel(models.Model):
         # Это абстрактная модель:
         abstract = True
         ordering = ['-created']
+
+
+class Job(models.Model):
+    """Задача очереди core.jobs."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Не выполнена'),
+    ]
+
+    name = models.CharField('Функция', max_length=200)
+    args = models.TextField('Аргументы в JSON', default='[]')
+    key = models.CharField(
+        'Ключ идемпотентности',
+        max_length=200,
+        blank=True,
+        null=True
+    )
+    status = models.CharField(
+        'Состояние',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveIntegerField('Попыток не больше')
+    run_at = models.DateTimeField('Выполнить не раньше')
+    locked_by = models.CharField('Воркер', max_length=100, blank=True)
+    locked_at = models.DateTimeField('Взята воркером', blank=True, null=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+    finished = models.DateTimeField('Завершена', blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_queue_idx'),
+        ]
+        constraints = [
+            # Одинаковая задача стоит в очереди не больше одного раза.
+            models.UniqueConstraint(
+                fields=['key'],
+                condition=models.Q(status='queued'),
+                name='unique_queued_job_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
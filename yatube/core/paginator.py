@@ -0,0 +1,129 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по курсору без OFFSET и COUNT(*).
+
+    Страница выбирается условием по ключу сортировки (по умолчанию
+    `created, id`), поэтому глубокие страницы стоят столько же,
+    сколько первая. Номера страниц условные: предыдущая страница
+    имеет номер 1, текущая - 2, следующая - 3.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-created', '-pk')):
+        super().__init__(object_list, per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip('-') for name in self.ordering]
+        self.next_cursor = None
+        self.previous_cursor = None
+        self._has_next = False
+        self._has_previous = False
+
+    @property
+    def count(self):
+        # Настоящее количество объектов курсору не нужно.
+        return self.num_pages * self.per_page
+
+    @property
+    def num_pages(self):
+        return 1 + self._has_previous + self._has_next
+
+    @property
+    def page_range(self):
+        return range(1, self.num_pages + 1)
+
+    def encode_cursor(self, obj):
+        values = [
+            self._field(name).value_to_string(obj) for name in self.fields
+        ]
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Возвращает значения ключа или None для испорченного курсора."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(raw.decode())
+            if len(values) != len(self.fields):
+                return None
+            values = [
+                self._field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except (ValueError, TypeError, AttributeError, ValidationError):
+            return None
+        # По None нельзя построить условие сравнения.
+        if None in values:
+            return None
+        return values
+
+    def get_cursor_page(self, after=None, before=None):
+        """Страница после курсора `after` или перед курсором `before`."""
+        values = None
+        backwards = False
+        if before:
+            values = self.decode_cursor(before)
+            backwards = values is not None
+        elif after:
+            values = self.decode_cursor(after)
+        ordering = self.ordering
+        if backwards:
+            ordering = tuple(self._reverse(name) for name in ordering)
+        rows = self._fetch(ordering, values)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            self._has_previous, self._has_next = has_more, True
+        else:
+            self._has_previous, self._has_next = values is not None, has_more
+        if rows:
+            self.previous_cursor = self.encode_cursor(rows[0])
+            self.next_cursor = self.encode_cursor(rows[-1])
+        return Page(rows, 1 + self._has_previous, self)
+
+    def _fetch(self, ordering, values):
+        """Первые per_page + 1 объектов строго после ключа values."""
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self._seek(ordering, values))
+        return list(queryset.order_by(*ordering)[:self.per_page + 1])
+
+    def _field(self, name):
+        opts = self.object_list.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    @staticmethod
+    def _reverse(name):
+        return name[1:] if name.startswith('-') else '-' + name
+
+    def _seek(self, ordering, values):
+        """Условие "строго после ключа" для составной сортировки."""
+        condition = Q()
+        equal = {}
+        for name, value in zip(ordering, values):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return condition
+
+
+def paginate(request, object_list, per_page, paginator_class=None):
+    """Страница для ленты: курсор из `?after=`/`?before=`.
+
+    Старые ссылки вида `?page=N` обслуживаются обычным Paginator.
+    paginator_class заменяет CursorPaginator для курсорных страниц.
+    """
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    page_number = request.GET.get('page')
+    if page_number and not (after or before):
+        return Paginator(object_list, per_page).get_page(page_number)
+    paginator = (paginator_class or CursorPaginator)(object_list, per_page)
+    return paginator.get_cursor_page(after=after, before=before)
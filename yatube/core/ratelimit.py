@@ -0,0 +1,215 @@
+"""Ограничение частоты запросов скользящим окном.
+
+    @login_required
+    @ratelimit('comment')
+    def add_comment(request, post_id):
+        ...
+
+Лимиты задаются в RATE_LIMITS как 'число/период' (s, m, h, d) по
+группам. Запрос сверх лимита получает 429 с Retry-After, представление
+не выполняется. RateLimitMiddleware ограничивает группой
+RATE_LIMIT_MIDDLEWARE_GROUP все изменяющие запросы с одного адреса -
+на случай, если спамер заводит много аккаунтов. За обратным прокси
+REMOTE_ADDR у всех клиентов один, поэтому адрес берётся из
+X-Forwarded-For с учётом RATE_LIMIT_TRUSTED_PROXIES - числа своих
+прокси перед приложением.
+
+Окно приближённое: счётчик текущего периода плюс счётчик прошлого,
+взвешенный долей прошлого периода, которая ещё попадает в окно.
+Это два обращения к кэшу на запрос без хранения времени каждого
+запроса. Счётчики лежат в кэше RATE_LIMIT_CACHE, incr атомарен между
+процессами. Если кэш недоступен, счёт ведётся в памяти процесса:
+лимит тогда действует на каждый воркер отдельно, но не отключается.
+"""
+import logging
+import math
+import re
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import metrics
+from .views import too_many_requests
+
+KEY = 'ratelimit:{}:{}:{}'
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+RATE_RE = re.compile(r'^([1-9]\d*)/(\d*)([smhd])$')
+UNSAFE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+# Сколько счётчиков держать в памяти, прежде чем вычистить истёкшие.
+MAX_LOCAL_KEYS = 10000
+
+logger = logging.getLogger('yatube.ratelimit')
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60); '5/10s' -> (5, 10)."""
+    match = RATE_RE.match(rate)
+    if match is None:
+        raise ValueError(f'Неверный лимит {rate!r}, нужен вид "10/m".')
+    limit, multiplier, unit = match.groups()
+    return int(limit), int(multiplier or 1) * PERIODS[unit]
+
+
+class LocalCounters:
+    """Счётчики в памяти процесса с тем же интерфейсом, что у кэша."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _alive(self, key, now):
+        value, expires = self._values.get(key, (0, 0))
+        return value if expires > now else 0
+
+    def get(self, key, default=0):
+        with self._lock:
+            return self._alive(key, time.time()) or default
+
+    def incr(self, key, delta, timeout):
+        now = time.time()
+        with self._lock:
+            if len(self._values) > MAX_LOCAL_KEYS:
+                self._values = {
+                    key: item for key, item in self._values.items()
+                    if item[1] > now
+                }
+            value, expires = self._values.get(key, (0, 0))
+            if expires <= now:
+                value, expires = 0, now + timeout
+            self._values[key] = (value + delta, expires)
+            return value + delta
+
+
+local_counters = LocalCounters()
+
+
+class CacheCounters:
+    def __init__(self, cache):
+        self.cache = cache
+
+    def get(self, key, default=0):
+        return self.cache.get(key, default)
+
+    def incr(self, key, delta, timeout):
+        try:
+            return self.cache.incr(key, delta)
+        except ValueError:
+            if self.cache.add(key, delta, timeout):
+                return delta
+            return self.cache.incr(key, delta)
+
+
+def counters():
+    return CacheCounters(caches[settings.RATE_LIMIT_CACHE])
+
+
+def retry_after(previous, current, elapsed, limit, period):
+    """Секунды, через которые ещё один запрос уложится в лимит."""
+    if current + 1 > limit:
+        # Ждём конца периода, затем, пока вес текущего счётчика как
+        # прошлого не упадёт до limit - 1.
+        wait = 1 - elapsed + max(0, 1 - (limit - 1) / current)
+    else:
+        wait = max(0, 1 - (limit - current - 1) / previous) - elapsed
+    # round убирает погрешность float перед округлением вверх.
+    return max(1, math.ceil(round(wait * period, 6)))
+
+
+def _hit(store, group, ident, limit, period, now):
+    window, elapsed = divmod(now / period, 1)
+    current_key = KEY.format(group, ident, int(window))
+    previous = store.get(KEY.format(group, ident, int(window) - 1), 0)
+    current = store.incr(current_key, 1, period * 2)
+    if previous * (1 - elapsed) + current <= limit:
+        return 0
+    # Отклонённый запрос не засчитывается, иначе повторы продлевали
+    # бы блокировку.
+    store.incr(current_key, -1, period * 2)
+    return retry_after(previous, current - 1, elapsed, limit, period)
+
+
+def hit(group, ident, rate, now=None):
+    """Засчитывает запрос; 0 или секунды до следующей попытки."""
+    limit, period = parse_rate(rate)
+    now = time.time() if now is None else now
+    try:
+        return _hit(counters(), group, ident, limit, period, now)
+    except Exception as error:
+        logger.warning('Кэш лимитов недоступен, счёт в процессе: %s', error)
+        return _hit(local_counters, group, ident, limit, period, now)
+
+
+def client_ip(request):
+    """Адрес клиента перед RATE_LIMIT_TRUSTED_PROXIES своими прокси.
+
+    Каждый прокси дописывает в X-Forwarded-For адрес, от которого
+    получил запрос, поэтому начало заголовка клиент может подделать,
+    а последние записи - нет.
+    """
+    remote = request.META.get('REMOTE_ADDR', '')
+    proxies = settings.RATE_LIMIT_TRUSTED_PROXIES
+    if not proxies:
+        return remote
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    chain = [
+        address.strip() for address in forwarded.split(',')
+        if address.strip()
+    ]
+    chain.append(remote)
+    return chain[max(len(chain) - proxies - 1, 0)]
+
+
+def client_key(request, key):
+    """Кого ограничивать: 'user', 'ip' или 'user_or_ip'."""
+    user = getattr(request, 'user', None)
+    if key != 'ip' and user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    if key == 'user':
+        return None
+    return f'ip:{client_ip(request)}'
+
+
+def check(request, group, key='user_or_ip', methods=UNSAFE_METHODS):
+    """Ответ 429, если запрос превышает лимит группы, иначе None."""
+    rate = settings.RATE_LIMITS.get(group)
+    if not rate or (methods and request.method not in methods):
+        return None
+    ident = client_key(request, key)
+    if ident is None:
+        return None
+    wait = hit(group, ident, rate)
+    if not wait:
+        return None
+    metrics.ratelimited.inc(group)
+    return too_many_requests(request, wait)
+
+
+def ratelimit(group, key='user_or_ip', methods=UNSAFE_METHODS):
+    """Декоратор представления; methods=None - все методы."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = check(request, group, key, methods)
+            if response is not None:
+                return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RateLimitMiddleware:
+    """Общий лимит изменяющих запросов с одного IP."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = check(
+            request, settings.RATE_LIMIT_MIDDLEWARE_GROUP, key='ip'
+        )
+        if response is not None:
+            return response
+        return self.get_response(request)
@@ -0,0 +1,79 @@
+"""Хранилище статики с хэшами в именах и заранее сжатыми копиями.
+
+`collectstatic` кладёт в STATIC_ROOT файлы вида
+`css/bootstrap.min.1d2c3b4a5e6f.css` и рядом `.gz` (и `.br`, если
+установлен пакет brotli) для текстовых форматов. core.fileserver
+отдаёт сжатую копию без сжатия на лету, а файлы с хэшем - с вечным
+Cache-Control.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Текстовые форматы, которые имеет смысл сжимать.
+COMPRESSIBLE = {
+    '.css', '.js', '.map', '.svg', '.json', '.txt', '.html', '.xml', '.ico',
+}
+# Файлы меньше этого размера не сжимаются: выигрыша почти нет.
+MIN_SIZE = 256
+
+
+def compressors():
+    """Расширение сжатой копии -> функция сжатия."""
+    result = {'.gz': lambda data: gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        result['.br'] = lambda data: brotli.compress(data, quality=11)
+    return result
+
+
+def compress_file(path):
+    """Пишет сжатые копии файла, если они меньше оригинала."""
+    if os.path.splitext(path)[1].lower() not in COMPRESSIBLE:
+        return []
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < MIN_SIZE:
+        return []
+    written = []
+    for suffix, compress in compressors().items():
+        compressed = compress(data)
+        if len(compressed) >= len(data):
+            continue
+        with open(path + suffix, 'wb') as file:
+            file.write(compressed)
+        written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # Без собранного манифеста (тесты, разработка) и для файлов вне
+    # статики {% static %} выдаёт имя без хэша, а не падает.
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except (ValueError, SuspiciousFileOperation):
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        # Файл может пройти обработку несколько раз; сжимаем итоговые
+        # версии, когда все проходы закончены.
+        final = {}
+        processed = super().post_process(paths, dry_run, **options)
+        for name, hashed_name, result in processed:
+            if not isinstance(result, Exception):
+                final[name] = hashed_name
+            yield name, hashed_name, result
+        if dry_run:
+            return
+        for name, hashed_name in final.items():
+            for stored in {name, hashed_name or name}:
+                compress_file(self.path(stored))
@@ -0,0 +1,142 @@
+"""Стеммер Snowball для русского языка.
+
+Чистый Python по описанию алгоритма
+https://snowballstem.org/algorithms/russian/stemmer.html,
+чтобы поиск не зависел от сторонних библиотек.
+"""
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    (),
+    (
+        'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+        'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую',
+        'юю', 'ая', 'яя', 'ою', 'ею',
+    ),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+        'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+        'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+        'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = (
+    (),
+    (
+        'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+        'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+        'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+        'ья', 'я',
+    ),
+)
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+WORD_RE = re.compile(r'\w+')
+
+
+def _endings(groups):
+    # Первая группа окончаний снимается только после «а» или «я».
+    first, second = groups
+    endings = [(ending, True) for ending in first]
+    endings += [(ending, False) for ending in second]
+    return sorted(endings, key=lambda item: -len(item[0]))
+
+
+PERFECTIVE_GERUND = _endings(PERFECTIVE_GERUND)
+ADJECTIVE = _endings(ADJECTIVE)
+PARTICIPLE = _endings(PARTICIPLE)
+REFLEXIVE = _endings(REFLEXIVE)
+VERB = _endings(VERB)
+NOUN = _endings(NOUN)
+
+
+def _strip(rv, endings):
+    """Снимает самое длинное подходящее окончание; None, если его нет."""
+    for ending, after_a in endings:
+        if rv.endswith(ending):
+            stem = rv[:-len(ending)]
+            if after_a and not stem.endswith(('а', 'я')):
+                return None
+            return stem
+    return None
+
+
+def _region(word, start):
+    """Начало области после первой согласной, идущей за гласной."""
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def _step1(rv):
+    """Деепричастие либо возвратность и одно из окончаний."""
+    stripped = _strip(rv, PERFECTIVE_GERUND)
+    if stripped is not None:
+        return stripped
+    stripped = _strip(rv, REFLEXIVE)
+    if stripped is not None:
+        rv = stripped
+    stripped = _strip(rv, ADJECTIVE)
+    if stripped is not None:
+        participle = _strip(stripped, PARTICIPLE)
+        return stripped if participle is None else participle
+    for endings in (VERB, NOUN):
+        stripped = _strip(rv, endings)
+        if stripped is not None:
+            return stripped
+    return rv
+
+
+def _step4(rv):
+    if rv.endswith('нн'):
+        return rv[:-1]
+    for ending in SUPERLATIVE:
+        if rv.endswith(ending):
+            rv = rv[:-len(ending)]
+            return rv[:-1] if rv.endswith('нн') else rv
+    return rv[:-1] if rv.endswith('ь') else rv
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    pv = next(
+        (i + 1 for i, char in enumerate(word) if char in VOWELS), len(word)
+    )
+    r2 = _region(word, _region(word, 0))
+    prefix, rv = word[:pv], _step1(word[pv:])
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    # Словообразовательный суффикс снимается, только если он в R2.
+    for ending in DERIVATIONAL:
+        if rv.endswith(ending) and pv + len(rv) - len(ending) >= r2:
+            rv = rv[:-len(ending)]
+            break
+    return prefix + _step4(rv)
+
+
+def words(text):
+    """Слова текста в нижнем регистре."""
+    return WORD_RE.findall(text.lower())
+
+
+def stems(text):
+    """Основы всех слов текста в порядке следования."""
+    return [stem(word) for word in words(text)]
@@ -0,0 +1,78 @@
+"""Шаблонизатор Django, замеряющий время отрисовки шаблонов.
+
+Время считается для шаблона, который отдаёт представление, вместе со
+всеми его include и extends, и попадает в core.metrics.
+
+warm_up() при старте процесса компилирует все шаблоны проекта
+и приложений в кэш cached.Loader, чтобы первые запросы не тратили
+время на чтение и разбор файлов.
+"""
+import logging
+import os
+import time
+
+from django.template import TemplateDoesNotExist, TemplateSyntaxError
+from django.template import engines
+from django.template.backends import django
+from django.template.utils import get_app_template_dirs
+
+from . import metrics
+
+# Файлы в каталогах шаблонов, которые считаются шаблонами.
+TEMPLATE_EXTENSIONS = ('.html', '.txt')
+
+logger = logging.getLogger('yatube.templates')
+
+
+class Template(django.Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.record_template(
+                self.origin.template_name or '<string>',
+                time.perf_counter() - started,
+            )
+
+
+class DjangoTemplates(django.DjangoTemplates):
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return Template(template.template, self)
+
+
+def template_names(engine):
+    """Имена всех шаблонов из DIRS и каталогов templates приложений."""
+    directories = [*engine.dirs, *get_app_template_dirs('templates')]
+    names = set()
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith(TEMPLATE_EXTENSIONS):
+                    path = os.path.relpath(os.path.join(root, name), directory)
+                    names.add(path.replace(os.sep, '/'))
+    return sorted(names)
+
+
+def warm_up():
+    """Компилирует все шаблоны; возвращает их число.
+
+    Шаблоны с ошибками пропускаются: они упадут при отрисовке, как
+    и без прогрева.
+    """
+    compiled = 0
+    for backend in engines.all():
+        if not isinstance(backend, django.DjangoTemplates):
+            continue
+        for name in template_names(backend.engine):
+            try:
+                backend.engine.get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError) as error:
+                logger.warning('Шаблон %s не скомпилирован: %s', name, error)
+                continue
+            compiled += 1
+    return compiled
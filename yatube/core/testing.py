@@ -0,0 +1,19 @@
+"""Помощники для тестов."""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+@contextmanager
+def run_on_commit(using=DEFAULT_DB_ALIAS):
+    """Выполняет колбэки transaction.on_commit, добавленные в блоке.
+
+    TestCase не фиксирует транзакцию теста, и без этого колбэки не
+    выполнились бы вовсе. В Django 3.2 то же делает
+    TestCase.captureOnCommitCallbacks(execute=True).
+    """
+    connection = connections[using]
+    start = len(connection.run_on_commit)
+    yield
+    for _, callback in connection.run_on_commit[start:]:
+        callback()
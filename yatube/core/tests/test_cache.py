@@ -0,0 +1,72 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from ..cache import SQLiteCache
+
+
+def set_in_child(location):
+    SQLiteCache(location, {}).set('shared', 'из другого процесса')
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.location, {
+            'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_INTERVAL': 1},
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_set_get_and_delete(self):
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_many(self):
+        self.cache.set_many({'a': 1, 'b': 2})
+        self.assertEqual(
+            self.cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': 2}
+        )
+
+    def test_timeout(self):
+        self.cache.set('key', 'value', timeout=0.05)
+        self.assertTrue(self.cache.has_key('key'))
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'new'))
+        self.assertFalse(self.cache.add('key', 'newer'))
+        self.assertEqual(self.cache.get('key'), 'new')
+
+    def test_incr(self):
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter', 5), 6)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_least_recently_used_are_evicted(self):
+        self.cache.access_resolution = 0
+        self.cache.set('keep', 'value')
+        for i in range(20):
+            self.cache.get('keep')
+            self.cache.set(f'key{i}', i)
+        self.assertEqual(self.cache.get('keep'), 'value')
+        stats = self.cache.stats()
+        self.assertLessEqual(stats['entries'], 10)
+        self.assertGreater(stats['evictions'], 0)
+        self.assertGreater(stats['hits'], 0)
+
+    def test_shared_between_processes(self):
+        process = multiprocessing.Process(
+            target=set_in_child, args=(self.location,)
+        )
+        process.start()
+        process.join()
+        self.assertEqual(self.cache.get('shared'), 'из другого процесса')
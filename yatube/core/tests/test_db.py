@@ -0,0 +1,75 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.test import SimpleTestCase
+
+from .. import metrics
+from ..db.backends.sqlite3.base import DatabaseWrapper
+
+
+class SQLiteBackendTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'db.sqlite3')
+        with sqlite3.connect(self.path) as raw:
+            raw.execute('CREATE TABLE item (value INTEGER)')
+
+    def wrapper(self, **options):
+        settings_dict = {
+            **connections.databases['default'],
+            'NAME': self.path,
+            'OPTIONS': options,
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias='file')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_pragmas_applied_on_connect(self):
+        with self.wrapper(pragmas={'cache_size': -1000}).cursor() as cursor:
+            self.assertEqual(
+                cursor.execute('PRAGMA journal_mode').fetchone(), ('wal',)
+            )
+            self.assertEqual(
+                cursor.execute('PRAGMA synchronous').fetchone(), (1,)
+            )
+            self.assertEqual(
+                cursor.execute('PRAGMA cache_size').fetchone(), (-1000,)
+            )
+
+    def test_immediate_transaction_takes_write_lock(self):
+        wrapper = self.wrapper(transaction_mode='IMMEDIATE')
+        wrapper.ensure_connection()
+        wrapper._start_transaction_under_autocommit()
+        other = sqlite3.connect(self.path, timeout=0, isolation_level=None)
+        self.addCleanup(other.close)
+        with self.assertRaisesMessage(sqlite3.OperationalError, 'locked'):
+            other.execute('BEGIN IMMEDIATE')
+        wrapper.connection.execute('ROLLBACK')
+
+    def test_locked_statement_is_retried(self):
+        holder = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        self.addCleanup(holder.close)
+        holder.execute('PRAGMA journal_mode = WAL')
+        holder.execute('BEGIN IMMEDIATE')
+        threading.Timer(0.05, holder.execute, ['COMMIT']).start()
+        before = metrics.db_lock_retries.values.get(('file',), 0)
+        wrapper = self.wrapper(timeout=0, lock_retries=6, lock_backoff=0.02)
+        with wrapper.cursor() as cursor:
+            cursor.execute('INSERT INTO item (value) VALUES (%s)', [1])
+        self.assertGreater(
+            metrics.db_lock_retries.values.get(('file',), 0), before
+        )
+
+    def test_unknown_transaction_mode(self):
+        with self.assertRaisesMessage(
+            ImproperlyConfigured, 'transaction_mode'
+        ):
+            self.wrapper(transaction_mode='LATER')
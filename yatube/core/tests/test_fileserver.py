@@ -0,0 +1,117 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from wsgiref.util import FileWrapper, setup_testing_defaults
+
+from django.test import SimpleTestCase, override_settings
+
+from ..fileserver import FileServer
+from ..staticfiles import compress_file
+
+CSS = b'body { color: black; }\n' * 100
+
+
+def django_app(environ, start_response):
+    start_response('404 Not Found', [])
+    return [b'django']
+
+
+class FileServerTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.static_root = os.path.join(self.directory, 'static')
+        self.media_root = os.path.join(self.directory, 'media')
+        os.makedirs(os.path.join(self.static_root, 'css'))
+        os.makedirs(os.path.join(self.media_root, 'posts'))
+        for name in ('site.css', 'site.0123456789ab.css'):
+            path = os.path.join(self.static_root, 'css', name)
+            with open(path, 'wb') as file:
+                file.write(CSS)
+            compress_file(path)
+        with open(os.path.join(self.media_root, 'posts', 'a.bin'), 'wb') as f:
+            f.write(bytes(range(100)))
+        with open(os.path.join(self.directory, 'secret.txt'), 'w') as f:
+            f.write('secret')
+        settings = override_settings(
+            STATIC_ROOT=self.static_root, MEDIA_ROOT=self.media_root
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.server = FileServer(django_app)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def get(self, path, **headers):
+        environ = {'PATH_INFO': path, 'wsgi.input': BytesIO()}
+        environ.update(headers)
+        setup_testing_defaults(environ)
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+
+        body = b''.join(self.server(environ, start_response))
+        return response['status'], response['headers'], body
+
+    def test_hashed_static_is_immutable(self):
+        status, headers, body = self.get('/static/css/site.0123456789ab.css')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(body, CSS)
+        self.assertIn('immutable', headers['Cache-Control'])
+        status, headers, _ = self.get('/static/css/site.css')
+        self.assertNotIn('immutable', headers['Cache-Control'])
+
+    def test_precompressed(self):
+        status, headers, body = self.get(
+            '/static/css/site.css', HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(body), CSS)
+        self.assertEqual(int(headers['Content-Length']), len(body))
+
+    def test_not_modified(self):
+        _, headers, _ = self.get('/static/css/site.css')
+        status, _, body = self.get(
+            '/static/css/site.css', HTTP_IF_NONE_MATCH=headers['ETag']
+        )
+        self.assertEqual((status, body), ('304 Not Modified', b''))
+        status, _, _ = self.get(
+            '/static/css/site.css',
+            HTTP_IF_MODIFIED_SINCE=headers['Last-Modified'],
+        )
+        self.assertEqual(status, '304 Not Modified')
+
+    def test_media_ranges(self):
+        status, headers, body = self.get(
+            '/media/posts/a.bin', HTTP_RANGE='bytes=10-19'
+        )
+        self.assertEqual(status, '206 Partial Content')
+        self.assertEqual(body, bytes(range(10, 20)))
+        self.assertEqual(headers['Content-Range'], 'bytes 10-19/100')
+        _, _, body = self.get('/media/posts/a.bin', HTTP_RANGE='bytes=-5')
+        self.assertEqual(body, bytes(range(95, 100)))
+        status, _, _ = self.get(
+            '/media/posts/a.bin', HTTP_RANGE='bytes=200-'
+        )
+        self.assertEqual(status, '416 Range Not Satisfiable')
+        # Safari проверяет файл запросом первых двух байтов.
+        status, headers, body = self.get(
+            '/media/posts/a.bin', HTTP_RANGE='bytes=0-1',
+            **{'wsgi.file_wrapper': FileWrapper},
+        )
+        self.assertEqual(status, '206 Partial Content')
+        self.assertEqual(headers['Content-Length'], '2')
+        self.assertEqual(body, bytes(range(2)))
+
+    def test_falls_through_to_django(self):
+        for path in (
+            '/static/css/missing.css', '/media/../secret.txt', '/about/',
+            '/media/\x00', '/media/posts/a.bin\x00.txt',
+        ):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path)[2], b'django')
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import jobs
+from ..models import Job
+
+User = get_user_model()
+calls = []
+
+
+def record(value):
+    calls.append(value)
+
+
+def explode():
+    raise RuntimeError('не вышло')
+
+
+class JobsTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_run(self):
+        job = jobs.enqueue(record, 'значение')
+        self.assertEqual(job.name, 'core.tests.test_jobs.record')
+        (claimed,) = jobs.claim('test', 10)
+        self.assertEqual(claimed.status, Job.RUNNING)
+        self.assertEqual(jobs.run(claimed), 'done')
+        self.assertEqual(calls, ['значение'])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(jobs.claim('test', 10), [])
+
+    def test_key_deduplicates_queued_jobs(self):
+        first = jobs.enqueue(record, 1, key='same')
+        self.assertEqual(jobs.enqueue(record, 2, key='same'), first)
+        self.assertEqual(Job.objects.count(), 1)
+        # Пока первая выполняется, такая же задача снова встаёт в очередь.
+        jobs.claim('test', 10)
+        self.assertNotEqual(jobs.enqueue(record, 3, key='same'), first)
+
+    def test_retry_with_backoff_then_fail(self):
+        job = jobs.enqueue(explode, max_attempts=2)
+        self.assertEqual(jobs.run(jobs.claim('test', 1)[0]), 'retry')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn('не вышло', job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+        # До срока повтора задачу никто не забирает.
+        self.assertEqual(jobs.claim('test', 1), [])
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertEqual(jobs.run(jobs.claim('test', 1)[0]), 'failed')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_stale_jobs_requeued(self):
+        job = jobs.enqueue(record, 1)
+        jobs.claim('test', 1)
+        Job.objects.update(locked_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager(self):
+        self.assertIsNone(jobs.enqueue(record, 1))
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_password_reset_mail_sent_by_worker(self):
+        User.objects.create_user(
+            username='user', email='user@example.com', password='secret'
+        )
+        self.client.post(
+            reverse('users:password_reset'), {'email': 'user@example.com'}
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            Job.objects.get().name, 'users.mail.send'
+        )
+        jobs.run(jobs.claim('test', 1)[0])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
+
+
+class RunWorkerTest(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_runworker_burst(self):
+        for number in range(5):
+            jobs.enqueue(record, number)
+        output = StringIO()
+        call_command('runworker', '--burst', '--threads', '2', stdout=output)
+        self.assertEqual(sorted(calls), list(range(5)))
+        self.assertIn('done: 5', output.getvalue())
+        self.assertEqual(
+            Job.objects.filter(status=Job.DONE).count(), 5
+        )
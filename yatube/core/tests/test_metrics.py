@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import metrics
+
+User = get_user_model()
+
+
+@override_settings(METRICS_FILE='')
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', is_staff=True
+        )
+
+    def test_request_recorded(self):
+        key = ('posts:index', 200)
+        before = metrics.requests.values.get(key, 0)
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(metrics.requests.values[key], before + 1)
+        self.assertIn(('posts:index',), metrics.sql_queries.values)
+        self.assertIn(('posts/index.html',), metrics.template_seconds.values)
+
+    def test_export_for_staff_only(self):
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '# TYPE yatube_requests_total counter')
+        self.assertContains(
+            response,
+            'yatube_request_duration_seconds_bucket{view="posts:index",'
+        )
+
+    @override_settings(SLOW_REQUEST_MS=0, SLOW_REQUEST_SAMPLE_RATE=1)
+    def test_slow_request_logged(self):
+        with self.assertLogs('yatube.slow_requests') as logs:
+            self.client.get(reverse('posts:index'))
+        self.assertIn('GET / (posts:index)', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
@@ -0,0 +1,112 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+from .. import ratelimit
+
+User = get_user_model()
+START = 1_000_000 * 60
+
+
+class SlidingWindowTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(ratelimit.parse_rate('10/m'), (10, 60))
+        self.assertEqual(ratelimit.parse_rate('5/10s'), (5, 10))
+        with self.assertRaises(ValueError):
+            ratelimit.parse_rate('0/m')
+
+    def test_previous_window_is_weighted(self):
+        for _ in range(3):
+            self.assertEqual(ratelimit.hit('g', 'a', '3/m', START), 0)
+        self.assertEqual(ratelimit.hit('g', 'a', '3/m', START + 10), 70)
+        # Четверть следующей минуты: прошлые 3 запроса весят 2.25.
+        self.assertEqual(ratelimit.hit('g', 'a', '3/m', START + 75), 5)
+        self.assertEqual(ratelimit.hit('g', 'a', '3/m', START + 80), 0)
+        self.assertEqual(ratelimit.hit('g', 'b', '3/m', START + 80), 0)
+
+    def test_local_fallback_when_cache_fails(self):
+        broken = mock.Mock()
+        broken.get.side_effect = OSError('cache is down')
+        with mock.patch.object(
+            ratelimit, 'counters', return_value=broken
+        ), self.assertLogs('yatube.ratelimit', 'WARNING'):
+            results = [
+                ratelimit.hit('local', 'a', '2/m', START) for _ in range(3)
+            ]
+        self.assertEqual(results[:2], [0, 0])
+        self.assertGreater(results[2], 0)
+
+
+@override_settings(RATE_LIMITS={'comment': '2/m', 'write': '3/m'})
+class RateLimitViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(text='Пост', author=self.author)
+        self.url = reverse('posts:add_comment', args=[self.post.pk])
+
+    def login(self, username):
+        client = Client()
+        client.force_login(User.objects.create_user(username=username))
+        return client
+
+    def test_view_limit_per_user(self):
+        client = self.login('spammer')
+        for _ in range(2):
+            self.assertEqual(
+                client.post(self.url, {'text': 'Спам'}).status_code, 302
+            )
+        response = client.post(self.url, {'text': 'Спам'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(client.get(self.url).status_code, 302)
+
+    def test_middleware_limit_per_ip(self):
+        statuses = [
+            self.login(f'user{number}').post(
+                self.url, {'text': 'Спам'}
+            ).status_code
+            for number in range(4)
+        ]
+        self.assertEqual(statuses, [302, 302, 302, 429])
+
+    @override_settings(RATE_LIMIT_TRUSTED_PROXIES=1)
+    def test_middleware_limit_per_forwarded_ip(self):
+        statuses = [
+            self.login(f'user{number}').post(
+                self.url, {'text': 'Спам'},
+                HTTP_X_FORWARDED_FOR=f'10.0.0.1, 192.0.2.{number % 2}',
+            ).status_code
+            for number in range(7)
+        ]
+        # Подставленный клиентом 10.0.0.1 не считается: у каждого
+        # из двух адресов свой лимит.
+        self.assertEqual(statuses, [302] * 6 + [429])
+
+
+class ClientIpTest(SimpleTestCase):
+    def ip(self, forwarded, proxies):
+        request = RequestFactory().get(
+            '/', REMOTE_ADDR='10.1.1.1', HTTP_X_FORWARDED_FOR=forwarded
+        )
+        with override_settings(RATE_LIMIT_TRUSTED_PROXIES=proxies):
+            return ratelimit.client_ip(request)
+
+    def test_trusted_hops(self):
+        self.assertEqual(self.ip('203.0.113.5', 0), '10.1.1.1')
+        self.assertEqual(self.ip('203.0.113.5', 1), '203.0.113.5')
+        self.assertEqual(
+            self.ip('6.6.6.6, 203.0.113.5, 10.0.0.2', 2), '203.0.113.5'
+        )
+        self.assertEqual(self.ip('', 2), '10.1.1.1')
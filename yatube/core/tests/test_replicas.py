@@ -0,0 +1,187 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import F
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..db import replication, routers
+
+User = get_user_model()
+
+
+class MirrorConnection:
+    """Реплика-зеркало на соединении default, считающая курсоры.
+
+    Отдельное соединение с той же БД в памяти не видит данных
+    незавершённой транзакции TestCase и упирается в её блокировки.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.cursors = 0
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+    def cursor(self):
+        self.cursors += 1
+        return self.connection.cursor()
+
+    def chunked_cursor(self):
+        self.cursors += 1
+        return self.connection.chunked_cursor()
+
+
+def swap_connection(test, alias, connection):
+    if alias in connections.databases:
+        test.addCleanup(connections.__setitem__, alias, connections[alias])
+    else:
+        test.addCleanup(delattr, connections._connections, alias)
+    connections[alias] = connection
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaReadsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.replica = MirrorConnection(connections['default'])
+        swap_connection(self, 'replica', self.replica)
+        self.user = User.objects.create_user(username='reader')
+        self.post = Post.objects.create(text='Пост', author=self.user)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def replica_reads(self, url):
+        before = self.replica.cursors
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(routers.PIN_COOKIE, response.cookies)
+        return self.replica.cursors - before
+
+    def test_feeds_read_from_replica(self):
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:follow_index'),
+        ):
+            with self.subTest(url=url):
+                self.assertGreater(self.replica_reads(url), 0)
+        self.assertEqual(self.replica_reads(reverse('posts:post_create')), 0)
+
+    def test_write_pins_reads_to_primary(self):
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'},
+        )
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        self.assertEqual(self.replica_reads(detail), 0)
+        self.client.cookies.pop(routers.PIN_COOKIE)
+        self.assertGreater(self.replica_reads(detail), 0)
+
+    def test_new_replica_copy_refreshes_cached_pages(self):
+        index = reverse('posts:index')
+        self.assertContains(self.client.get(index), 'Пост')
+        # Копия на реплике изменилась, а поколения лент - нет.
+        Post.objects.filter(pk=self.post.pk).update(
+            text='Новый текст', version=F('version') + 1
+        )
+        cache.set(replication.EPOCH_KEY.format('replica'), 1, None)
+        self.assertContains(self.client.get(index), 'Новый текст')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_reads_primary(self):
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'},
+        )
+        self.assertNotIn(routers.PIN_COOKIE, response.cookies)
+        self.assertEqual(self.replica_reads(reverse('posts:index')), 0)
+
+
+class ReplicaSelectionTest(SimpleTestCase):
+    @override_settings(DATABASE_REPLICAS=['first', 'second'])
+    def test_round_robin(self):
+        chosen = {routers.choose_replica() for _ in range(4)}
+        self.assertEqual(chosen, {'first', 'second'})
+
+    @override_settings(
+        DATABASE_REPLICAS=['first', 'second'],
+        DATABASE_REPLICA_SELECTION='least_loaded',
+    )
+    def test_least_loaded(self):
+        routers._in_flight['first'] += 1
+        self.addCleanup(routers._in_flight.subtract, ['first'])
+        chosen = {routers.choose_replica() for _ in range(4)}
+        self.assertEqual(chosen, {'second'})
+
+
+class ReplicationTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.paths = {
+            alias: os.path.join(directory, f'{alias}.sqlite3')
+            for alias in ('primary', 'copy')
+        }
+        for alias, path in self.paths.items():
+            swap_connection(self, alias, SimpleNamespace(
+                alias=alias, settings_dict={'NAME': path}
+            ))
+        with sqlite3.connect(self.paths['primary']) as primary:
+            primary.execute('CREATE TABLE item (value INTEGER)')
+            primary.execute('INSERT INTO item VALUES (1)')
+
+    def assertCopied(self):
+        with sqlite3.connect(self.paths['copy']) as copy:
+            self.assertEqual(
+                copy.execute('SELECT value FROM item').fetchall(), [(1,)]
+            )
+
+    def test_sync_copies_primary_and_moves_epoch(self):
+        key = replication.EPOCH_KEY.format('copy')
+        cache.delete(key)
+        replication.sync('copy', source='primary')
+        self.assertCopied()
+        self.assertIsNotNone(cache.get(key))
+
+    @mock.patch.object(replication, 'BACKOFF', 0.05)
+    @mock.patch.object(replication, 'BUSY_TIMEOUT', 0.1)
+    def test_sync_waits_for_replica_readers(self):
+        replication.sync('copy', source='primary')
+        # Читатель держит открытую транзакцию дольше BUSY_TIMEOUT.
+        reader = sqlite3.connect(
+            self.paths['copy'], isolation_level=None,
+            check_same_thread=False,
+        )
+        self.addCleanup(reader.close)
+        reader.execute('BEGIN')
+        reader.execute('SELECT value FROM item').fetchall()
+        timer = threading.Timer(0.3, reader.execute, ['COMMIT'])
+        timer.start()
+        self.addCleanup(timer.join)
+        replication.sync('copy', source='primary')
+        self.assertCopied()
+
+    @mock.patch.object(replication, 'BACKOFF', 0.01)
+    @mock.patch.object(replication, 'BUSY_TIMEOUT', 0.01)
+    def test_sync_gives_up_on_locked_replica(self):
+        replication.sync('copy', source='primary')
+        reader = sqlite3.connect(self.paths['copy'], isolation_level=None)
+        self.addCleanup(reader.close)
+        reader.execute('BEGIN')
+        reader.execute('SELECT value FROM item').fetchall()
+        with self.assertRaisesMessage(sqlite3.OperationalError, 'locked'):
+            replication.sync('copy', source='primary')
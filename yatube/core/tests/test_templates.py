@@ -0,0 +1,14 @@
+from django.template import engines
+from django.test import SimpleTestCase
+
+from ..template_backend import template_names, warm_up
+
+
+class WarmUpTest(SimpleTestCase):
+    def test_all_templates_compiled(self):
+        backend = engines['template_backend']
+        loader, = backend.engine.template_loaders
+        loader.reset()
+        self.assertEqual(warm_up(), len(template_names(backend.engine)))
+        for name in ('posts/index.html', 'posts/includes/post_card.html'):
+            self.assertIn(name, loader.get_template_cache)
@@ -1,5 +1,9 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse
 from django.shortcuts import render
 
+from . import metrics
+
 
 def page_not_found(request, exception):
     # Переменная exception содержит отладочную информацию,
@@ -15,5 +19,22 @@ def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
 
 
+def too_many_requests(request, retry_after):
+    response = render(
+        request, 'core/429.html', {'retry_after': retry_after}, status=429
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+@staff_member_required
+def metrics_export(request):
+    """Метрики процесса в текстовом формате Prometheus."""
+    return HttpResponse(
+        metrics.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
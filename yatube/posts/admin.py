@@ -1,6 +1,7 @@
 from django.contrib import admin
 from .models import Post
 from .models import Group, Follow
+from . import search
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -10,6 +11,14 @@ class PostAdmin(admin.ModelAdmin):
     list_editable = ('group',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Вместо LIKE '%...%' по всей таблице ищем по индексу поиска.
+        if not search_term:
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return search.filter_queryset(queryset, search_term), False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
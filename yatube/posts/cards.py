@@ -0,0 +1,55 @@
+"""Кэш отрисованных карточек постов.
+
+Карточка поста одинакова в общей ленте, группе, профиле и подписках,
+поэтому HTML каждой карточки кэшируется отдельно от страниц. Ключ
+содержит всё, от чего зависит разметка: версию поста (растёт при
+правке), число комментариев, готовность миниатюр, а также имя автора
+и slug группы, которые меняются без правки поста. Устаревшие
+карточки не удаляются, их ключи просто перестают запрашиваться.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+
+KEY = 'post_card:{}:{}:{}:{}:{}'
+TEMPLATE = 'posts/includes/post_card.html'
+
+
+def _related(post):
+    """Хэш имени автора и slug группы из карточки.
+
+    Сами значения в ключ не годятся: в них бывают пробелы.
+    """
+    author = post.author
+    parts = [
+        author.get_username(), author.first_name, author.last_name,
+        post.group.slug if post.group_id else '',
+    ]
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def card_key(post):
+    return KEY.format(
+        post.pk, post.version, post.comments_count,
+        int(bool(post.renditions)), _related(post),
+    )
+
+
+def render_cards(posts):
+    """HTML карточек posts в том же порядке; промахи - одним set_many."""
+    keys = [card_key(post) for post in posts]
+    cards = cache.get_many(keys)
+    missing = {
+        key: post for key, post in zip(keys, posts) if key not in cards
+    }
+    if missing:
+        template = get_template(TEMPLATE)
+        rendered = {
+            key: template.render({'post': post})
+            for key, post in missing.items()
+        }
+        cache.set_many(rendered, settings.FEED_CACHE_TIMEOUT)
+        cards.update(rendered)
+    return [cards[key] for key in keys]
@@ -0,0 +1,99 @@
+"""Условные GET для лент и постов по поколениям feed_cache.
+
+ETag страницы - хэш поколений её областей, адреса с параметрами и,
+для HTML, id пользователя и его токена CSRF: шапка, переключатель
+лент и кнопка подписки у каждого свои, а в формах страницы записан
+токен, который меняется при входе. Last-Modified - время последнего
+изменения областей; HTML-страницы его не отдают, потому что по дате
+нельзя отличить одного пользователя от другого. Значения берутся из
+кэша, поэтому ответ 304 не отрисовывает шаблон и не ходит в базу,
+кроме холодного кэша, когда slug группы или имя автора переводятся
+в id одним запросом.
+"""
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from core.db import replication
+
+from . import feed_cache
+
+KEY = 'conditional:{}:{}:{}'
+# Сколько помнить соответствие slug группы или имени автора их id.
+LOOKUP_TIMEOUT = 60 * 5
+
+
+def lookup(queryset, field, value, *targets):
+    """Значения targets (по умолчанию pk) строки с field = value.
+
+    Результат кэшируется; None, если строки нет.
+    """
+    targets = targets or ('pk',)
+    key = KEY.format(queryset.model._meta.label_lower, field, value)
+    row = cache.get(key)
+    if row is None:
+        row = queryset.filter(**{field: value}).values_list(
+            *targets
+        ).order_by()[:1]
+        row = row[0] if row else None
+        if row is None:
+            return None
+        cache.set(key, row, LOOKUP_TIMEOUT)
+    return row if len(targets) > 1 else row[0]
+
+
+def page_etag(request, scopes, per_user):
+    parts = [*scopes, request.get_full_path()]
+    parts += map(str, feed_cache.generations(*scopes))
+    parts.append(replication.read_epoch())
+    if per_user:
+        parts.append(str(request.user.pk))
+        parts.append(request.META.get('CSRF_COOKIE', ''))
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def patch_headers(request, response, per_user):
+    # Браузер и прокси каждый раз перепроверяют страницу.
+    patch_cache_control(response, no_cache=True)
+    if per_user:
+        patch_vary_headers(response, ['Cookie'])
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True)
+
+
+def conditional(scopes_func, per_user=True):
+    """ETag, Last-Modified и Cache-Control по областям scopes_func.
+
+    scopes_func(request, **kwargs) возвращает области feed_cache или
+    None, если объекта нет: тогда представление отвечает само.
+    """
+    def scopes(request, kwargs):
+        # ETag и Last-Modified считаются по одним и тем же областям.
+        if not hasattr(request, 'feed_scopes'):
+            request.feed_scopes = scopes_func(request, **kwargs)
+        return request.feed_scopes
+
+    def etag(request, *args, **kwargs):
+        request_scopes = scopes(request, kwargs)
+        return request_scopes and page_etag(request, request_scopes, per_user)
+
+    def last_modified(request, *args, **kwargs):
+        request_scopes = scopes(request, kwargs)
+        return request_scopes and feed_cache.last_modified(*request_scopes)
+
+    def decorator(view):
+        conditional_view = condition(
+            etag_func=etag,
+            last_modified_func=None if per_user else last_modified,
+        )(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            patch_headers(request, response, per_user)
+            return response
+        return wrapper
+    return decorator
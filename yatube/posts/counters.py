@@ -0,0 +1,102 @@
+"""Денормализованные счётчики постов, комментариев, ответов,
+подписок и непрочитанных уведомлений.
+
+Профиль со счётчиками создаётся вместе с пользователем. Счётчики
+меняются атомарно через F() в тех же транзакциях, что и данные, и не
+опускаются ниже нуля. Расхождения (например, после удаления через
+админку) исправляет `manage.py reconcile_counters`.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Notification, Post, Profile, User
+
+# SQLite вставляет пачку одним составным SELECT не длиннее 500 частей.
+BATCH_SIZE = 500
+
+
+def _count(model, field, ref, **filters):
+    """Подзапрос с количеством строк model, где field = ref."""
+    return Coalesce(Subquery(
+        model.objects.filter(
+            **{field: OuterRef(ref)}, **filters
+        ).order_by().values(field).annotate(
+            total=Count('pk')
+        ).values('total')
+    ), 0)
+
+
+def _profile_counts():
+    return {
+        'posts_count': _count(Post, 'author', 'user'),
+        'followers_count': _count(Follow, 'author', 'user'),
+        'following_count': _count(Follow, 'user', 'user'),
+        'unread_notifications': _count(
+            Notification, 'user', 'user', is_read=False
+        ),
+    }
+
+
+def create_profile(user_id):
+    """Создаёт недостающий профиль по реальным данным."""
+    Profile.objects.get_or_create(user_id=user_id)
+    Profile.objects.filter(user_id=user_id).update(**_profile_counts())
+
+
+def get_profile(user):
+    """Профиль пользователя без записи в БД.
+
+    Если профиля нет (пользователь вставлен в обход сигналов),
+    возвращается несохранённый профиль с нулями до reconcile_counters.
+    """
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        return Profile(user=user)
+
+
+def change(user_id, **deltas):
+    """Прибавляет deltas к счётчикам профиля пользователя.
+
+    Разошедшийся с данными счётчик упирается в ноль, а не нарушает
+    ограничение PositiveIntegerField.
+    """
+    updated = Profile.objects.filter(user_id=user_id).update(**{
+        name: Greatest(F(name) + delta, 0) for name, delta in deltas.items()
+    })
+    if not updated:
+        # Новый профиль сразу считается по таблицам и уже учитывает
+        # изменение, ради которого его создали.
+        create_profile(user_id)
+
+
+def comment_added(post_id, delta=1):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=F('comments_count') + delta
+    )
+
+
+def reconcile():
+    """Пересчитывает все счётчики; возвращает число исправленных строк."""
+    missing = User.objects.filter(
+        profile__isnull=True
+    ).values_list('pk', flat=True)
+    Profile.objects.bulk_create(
+        [Profile(user_id=pk) for pk in missing.iterator()],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    fixed = {}
+    for name, real in _profile_counts().items():
+        fixed[name] = Profile.objects.exclude(
+            **{name: real}
+        ).update(**{name: real})
+    real = _count(Comment, 'post', 'pk')
+    fixed['comments_count'] = Post.objects.exclude(
+        comments_count=real
+    ).update(comments_count=real)
+    real = _count(Comment, 'parent', 'pk')
+    fixed['replies_count'] = Comment.objects.exclude(
+        replies_count=real
+    ).update(replies_count=real)
+    return fixed
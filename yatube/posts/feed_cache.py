@@ -0,0 +1,120 @@
+"""Кэш фрагментов лент с ключами на счётчиках поколений.
+
+У каждой ленты есть область (scope): вся лента `index`, группа,
+автор, лента подписок пользователя, комментарии поста и каталог групп. Ключ
+фрагмента содержит текущие поколения своих областей и курсор страницы.
+Сигналы на Post, Comment и Follow увеличивают поколения затронутых
+областей, и следующий запрос просто не находит старый фрагмент -
+угадывать TTL не нужно.
+Вместе с поколением запоминается время изменения области, из него
+берётся заголовок Last-Modified.
+"""
+import time
+from datetime import datetime, timezone
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.db import replication
+
+KEY = 'feed:generation:{}'
+MODIFIED_KEY = 'feed:modified:{}'
+PAGE_PARAMS = ('page', 'after', 'before')
+
+
+def index_scope():
+    return 'index'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def follow_scope(user_id):
+    return f'follow:{user_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def groups_scope():
+    return 'groups'
+
+
+def _initial():
+    # Счётчик начинается со времени, а не с нуля: если его вытеснят
+    # из кэша, новые ключи не совпадут со старыми фрагментами.
+    return time.time_ns()
+
+
+def generations(*scopes):
+    """Текущие поколения областей в порядке scopes."""
+    keys = [KEY.format(scope) for scope in scopes]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, _initial(), None)
+            values[key] = cache.get(key)
+    return [values[key] for key in keys]
+
+
+def bump(*scopes):
+    """Делает недействительными все фрагменты областей.
+
+    Поколения меняются после фиксации транзакции: иначе параллельный
+    запрос успеет прочитать новое поколение вместе со старыми строками
+    и сохранит устаревший фрагмент под новым ключом.
+    """
+    transaction.on_commit(partial(_bump, scopes))
+
+
+def _bump(scopes):
+    for scope in set(scopes):
+        key = KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial(), None)
+    now = time.time()
+    cache.set_many(
+        {MODIFIED_KEY.format(scope): now for scope in scopes}, None
+    )
+
+
+def last_modified(*scopes):
+    """Время последнего изменения областей (UTC)."""
+    keys = [MODIFIED_KEY.format(scope) for scope in scopes]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            # Время потерялось: считаем, что область изменилась сейчас,
+            # клиенты просто запросят её заново.
+            cache.add(key, time.time(), None)
+            values[key] = cache.get(key)
+    return datetime.fromtimestamp(max(values.values()), timezone.utc)
+
+
+def post_scopes(author_id, group_id):
+    """Области, в которые попадает пост."""
+    scopes = [index_scope(), author_scope(author_id)]
+    if group_id is not None:
+        scopes.append(group_scope(group_id))
+    return scopes
+
+
+def context(request, *scopes):
+    """Переменные шаблона для {% cache feed_cache_timeout ... feed_key %}."""
+    parts = [str(value) for value in generations(*scopes)]
+    parts += [request.GET.get(name, '') for name in PAGE_PARAMS]
+    parts.append(replication.read_epoch())
+    return {
+        'feed_key': '|'.join(parts),
+        'feed_cache_timeout': settings.FEED_CACHE_TIMEOUT,
+    }
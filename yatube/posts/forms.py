@@ -1,10 +1,17 @@
 from .models import Post
 from .models import Comment
+from . import images
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import ModelForm
 
 
 class PostForm(ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Хэш картинки, которая окажется у поста после сохранения.
+        self.image_hash = self.instance.image_hash
+
     class Meta:
         model = Post
         fields = ['text', 'group', 'image']
@@ -15,6 +22,21 @@ class PostForm(ModelForm):
                 raise forms.ValidationError('Необнаружен текст Вашего поста')
             return data
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        # Уже сохранённую картинку поста повторно не обрабатываем.
+        if not isinstance(image, UploadedFile):
+            if not image:
+                self.image_hash = ''
+            return image
+        self.image_hash = images.content_hash(image)
+        if self.instance.image and (
+            self.image_hash == self.instance.image_hash
+        ):
+            # Загрузили ту же картинку: оставляем сохранённую.
+            return self.instance.image
+        return images.process(image)
+
 
 class CommentForm(ModelForm):
     class Meta:
@@ -0,0 +1,155 @@
+"""Статистика групп для каталога: число постов, последний пост и
+самые активные авторы.
+
+Строки GroupStats и GroupAuthorStats меняются сигналами Post через
+F() - одна-две короткие записи на пост, без COUNT и MAX по таблице
+постов. Только когда удаляется последний пост группы, время
+последнего поста перечитывается по индексу (group, created).
+Расхождения после изменений в обход сигналов исправляет
+`manage.py rebuild_group_stats`.
+"""
+from django.db import models, transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from core.paginator import CursorPaginator
+
+from . import feed_cache
+from .models import Group, GroupAuthorStats, GroupStats, Post
+
+GROUPS_PER_PAGE = 20
+TOP_AUTHORS = 3
+# SQLite вставляет пачку одним составным SELECT не длиннее 500 частей.
+BATCH_SIZE = 500
+SORTS = {
+    'activity': ('-last_post_at', '-group'),
+    'posts': ('-posts_count', '-group'),
+}
+SORT_TITLES = {
+    'activity': 'По активности',
+    'posts': 'По числу постов',
+}
+DEFAULT_SORT = 'activity'
+
+
+def get_sort(value):
+    return value if value in SORTS else DEFAULT_SORT
+
+
+def _change(model, filters, **values):
+    """UPDATE строки filters; недостающая строка создаётся."""
+    if not model.objects.filter(**filters).update(**values):
+        model.objects.get_or_create(**filters)
+        model.objects.filter(**filters).update(**values)
+
+
+def post_added(group_id, author_id, created):
+    with transaction.atomic():
+        _change(
+            GroupStats, {'group_id': group_id},
+            posts_count=F('posts_count') + 1,
+            last_post_at=Greatest(
+                'last_post_at', Value(created, models.DateTimeField())
+            ),
+        )
+        _change(
+            GroupAuthorStats, {'group_id': group_id, 'author_id': author_id},
+            posts_count=F('posts_count') + 1,
+        )
+
+
+def post_removed(group_id, author_id, created):
+    """Пост удалён из группы; сам пост в ней уже не должен числиться."""
+    with transaction.atomic():
+        GroupStats.objects.filter(
+            group_id=group_id, posts_count__gt=0
+        ).update(posts_count=F('posts_count') - 1)
+        # Время меняется, только если ушёл самый свежий пост.
+        latest = Post.objects.filter(group_id=group_id).order_by(
+            '-created', '-pk'
+        ).values('created')[:1]
+        GroupStats.objects.filter(
+            group_id=group_id, last_post_at__lte=created
+        ).update(last_post_at=Coalesce(
+            Subquery(latest), Value(GroupStats.NO_ACTIVITY)
+        ))
+        author_stats = GroupAuthorStats.objects.filter(
+            group_id=group_id, author_id=author_id, posts_count__gt=0
+        )
+        author_stats.update(posts_count=F('posts_count') - 1)
+        GroupAuthorStats.objects.filter(
+            group_id=group_id, author_id=author_id, posts_count=0
+        ).delete()
+
+
+def group_created(group_id):
+    GroupStats.objects.get_or_create(group_id=group_id)
+
+
+def rebuild():
+    """Пересчитывает статистику всех групп; возвращает число групп."""
+    in_groups = Post.objects.filter(group__isnull=False).order_by()
+    totals = {
+        row['group_id']: row for row in in_groups.values('group_id').annotate(
+            total=Count('pk'), last=Max('created')
+        )
+    }
+    authors = in_groups.values('group_id', 'author_id').annotate(
+        total=Count('pk')
+    )
+    stats = []
+    for group_id in Group.objects.values_list('pk', flat=True).iterator():
+        row = totals.get(group_id, {})
+        stats.append(GroupStats(
+            group_id=group_id,
+            posts_count=row.get('total', 0),
+            last_post_at=row.get('last') or GroupStats.NO_ACTIVITY,
+        ))
+    with transaction.atomic():
+        GroupAuthorStats.objects.all().delete()
+        GroupStats.objects.all().delete()
+        GroupStats.objects.bulk_create(stats, batch_size=BATCH_SIZE)
+        GroupAuthorStats.objects.bulk_create(
+            (
+                GroupAuthorStats(
+                    group_id=row['group_id'], author_id=row['author_id'],
+                    posts_count=row['total'],
+                )
+                for row in authors.iterator()
+            ),
+            batch_size=BATCH_SIZE,
+        )
+    feed_cache.bump(feed_cache.groups_scope())
+    return len(stats)
+
+
+def attach_top_authors(stats):
+    """top_authors - до TOP_AUTHORS строк GroupAuthorStats одним запросом."""
+    by_group = {}
+    for row in stats:
+        row.top_authors = []
+        if row.posts_count:
+            by_group[row.group_id] = row
+    if not by_group:
+        return
+    top = GroupAuthorStats.objects.filter(
+        group_id=OuterRef('group_id')
+    ).order_by('-posts_count', 'author_id').values('pk')[:TOP_AUTHORS]
+    authors = GroupAuthorStats.objects.filter(
+        group_id__in=by_group, pk__in=Subquery(top)
+    ).select_related('author').order_by('-posts_count', 'author_id')
+    for row in authors:
+        by_group[row.group_id].top_authors.append(row)
+
+
+def page(sort=DEFAULT_SORT, after=None, before=None):
+    """Страница каталога групп в порядке sort."""
+    ordering = SORTS[sort]
+    paginator = CursorPaginator(
+        GroupStats.objects.select_related('group').order_by(*ordering),
+        GROUPS_PER_PAGE,
+        ordering,
+    )
+    group_page = paginator.get_cursor_page(after=after, before=before)
+    attach_top_authors(group_page.object_list)
+    return group_page
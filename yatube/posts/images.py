@@ -0,0 +1,131 @@
+"""Обработка загруженных картинок постов.
+
+Размеры проверяются по заголовку файла, до декодирования пикселей.
+Большие JPEG декодируются сразу в уменьшенном масштабе (Image.draft),
+затем картинка ужимается до POST_IMAGE_MAX_SIDE, поворачивается по
+EXIF и пересохраняется без метаданных во временный файл, который
+уходит на диск, когда перерастает FILE_UPLOAD_MAX_MEMORY_SIZE.
+"""
+import hashlib
+import math
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from PIL import Image, ImageOps
+
+# Форматы, которые сохраняются как есть; остальные переводятся в PNG.
+KEEP_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP'}
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif', 'WEBP': '.webp'}
+
+
+def open_image(file):
+    """Открывает картинку, читая только заголовок."""
+    file.seek(0)
+    try:
+        image = Image.open(file)
+    except Image.DecompressionBombError:
+        raise ValidationError(
+            'Слишком большое разрешение картинки', code='too_many_pixels'
+        )
+    width, height = image.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Слишком большое разрешение картинки', code='too_many_pixels'
+        )
+    return image
+
+
+def is_animated(image):
+    return getattr(image, 'n_frames', 1) > 1
+
+
+def draft(image, max_side):
+    """Включает уменьшенное декодирование JPEG; сам ничего не декодирует.
+
+    Декодер выдаёт картинку сразу в 1/2, 1/4 или 1/8 масштаба,
+    не разворачивая оригинал в памяти.
+    """
+    width, height = image.size
+    if image.format != 'JPEG' or max(width, height) <= max_side:
+        return
+    scale = max_side / max(width, height)
+    # draft() выбирает масштаб, при котором обе стороны не меньше
+    # запрошенных, поэтому просим размер с пропорциями оригинала.
+    image.draft(
+        image.mode,
+        (math.ceil(width * scale), math.ceil(height * scale)),
+    )
+
+
+def downsample(image, max_side):
+    """Ужимает картинку до max_side пикселей по большей стороне."""
+    draft(image, max_side)
+    image = ImageOps.exif_transpose(image)
+    if max(image.size) > max_side:
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        image.thumbnail((max_side, max_side), Image.LANCZOS, reducing_gap=3.0)
+    return image
+
+
+def encode(image, image_format, output):
+    options = {}
+    if image.info.get('icc_profile'):
+        # Цветовой профиль - не метаданные: без него поплывут цвета.
+        options['icc_profile'] = image.info['icc_profile']
+    if image_format == 'JPEG':
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        options.update(
+            quality=settings.POST_IMAGE_JPEG_QUALITY,
+            optimize=True,
+            progressive=True,
+        )
+    elif image_format == 'PNG':
+        options['optimize'] = True
+    elif image_format == 'WEBP':
+        options['quality'] = settings.POST_IMAGE_JPEG_QUALITY
+    # EXIF и прочие метаданные не передаются и в файл не попадают.
+    image.save(output, image_format, **options)
+
+
+def process(upload):
+    """Проверяет и пересохраняет загруженную картинку.
+
+    Возвращает File с новым содержимым; анимированные GIF
+    сохраняются без изменений, если укладываются в ограничения.
+    """
+    if upload.size > settings.POST_IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            'Файл картинки слишком большой', code='file_too_large'
+        )
+    image = open_image(upload)
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    if is_animated(image):
+        if max(image.size) > max_side:
+            raise ValidationError(
+                'Анимация слишком большого размера', code='animation_too_large'
+            )
+        upload.seek(0)
+        return upload
+    image_format = image.format if image.format in KEEP_FORMATS else 'PNG'
+    output = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+    )
+    encode(downsample(image, max_side), image_format, output)
+    output.seek(0)
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    return File(output, name=name + EXTENSIONS[image_format])
+
+
+def content_hash(file):
+    """SHA-256 содержимого файла в hex."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import notifications
+from posts.models import NotificationOutbox
+
+
+class Command(BaseCommand):
+    help = 'Рассылает уведомления, оставшиеся в очереди.'
+
+    def handle(self, *args, **options):
+        pending = NotificationOutbox.objects.count()
+        notifications.deliver()
+        if options['verbosity']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Разослано уведомлений о постах: {pending}'
+            ))
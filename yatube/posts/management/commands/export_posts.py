@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, группы, посты, комментарии и подписки '
+        'в NDJSON или CSV.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='каталог выгрузки')
+        parser.add_argument(
+            '--format', choices=transfer.FORMATS, default='ndjson'
+        )
+        parser.add_argument(
+            '--only', nargs='+', choices=list(transfer.KINDS),
+            help='выгрузить только эти данные'
+        )
+        parser.add_argument(
+            '--images', action='store_true',
+            help='скопировать картинки постов в каталог выгрузки'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='продолжить с последнего checkpoint и дописать новые строки'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            stats = transfer.export(
+                options['directory'],
+                file_format=options['format'],
+                kinds=options['only'],
+                images=options['images'],
+                resume=options['resume'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        for name, result in stats.items():
+            self.stdout.write(
+                f'{name}: {result.rows} строк за {result.seconds:.1f} с '
+                f'({transfer.rate(result):.0f} строк/с)'
+            )
+        self.stdout.write(self.style.SUCCESS('Выгрузка закончена'))
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает выгрузку export_posts и пересобирает счётчики, '
+        'ленты подписок и поисковый индекс.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='каталог выгрузки')
+        parser.add_argument(
+            '--format', choices=transfer.FORMATS, default='ndjson'
+        )
+        parser.add_argument(
+            '--only', nargs='+', choices=list(transfer.KINDS),
+            help='загрузить только эти данные'
+        )
+        parser.add_argument(
+            '--images', action='store_true',
+            help='скопировать картинки из выгрузки в MEDIA_ROOT'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='пропустить строки, загруженные до прерывания'
+        )
+        parser.add_argument(
+            '--defer-indexes', action='store_true',
+            help='снять индексы постов и комментариев на время загрузки'
+        )
+        parser.add_argument(
+            '--no-rebuild', action='store_true',
+            help='не пересобирать счётчики, ленты и поиск после загрузки'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            stats = transfer.load(
+                options['directory'],
+                file_format=options['format'],
+                kinds=options['only'],
+                images=options['images'],
+                resume=options['resume'],
+                defer_indexes=options['defer_indexes'],
+                rebuild_after=not options['no_rebuild'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        for name, result in stats.items():
+            self.stdout.write(
+                f'{name}: {result.rows} строк, пропущено {result.skipped}, '
+                f'{result.seconds:.1f} с ({transfer.rate(result):.0f} строк/с)'
+            )
+        self.stdout.write(self.style.SUCCESS('Загрузка закончена'))
+        if options['images']:
+            self.stdout.write(
+                'Миниатюры картинок строит manage.py generate_thumbnails'
+            )
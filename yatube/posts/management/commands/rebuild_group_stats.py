@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import group_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает статистику групп для каталога /groups/.'
+
+    def handle(self, *args, **options):
+        groups = group_stats.rebuild()
+        if options['verbosity']:
+            self.stdout.write(
+                self.style.SUCCESS(f'Статистика пересчитана: групп {groups}')
+            )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс постов.'
+
+    def handle(self, *args, **options):
+        total = search.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Проиндексировано постов: {total}')
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, help='id пользователя, чью ленту собрать'
+        )
+
+    def handle(self, *args, **options):
+        timeline.rebuild(options['user'])
+        if options['verbosity']:
+            self.stdout.write(
+                self.style.SUCCESS('Ленты подписок пересобраны')
+            )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core import jobs
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, комментариев и подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--background', action='store_true',
+            help='поставить пересчёт в очередь runworker'
+        )
+
+    def handle(self, *args, **options):
+        if options['background']:
+            jobs.enqueue(counters.reconcile, key='reconcile_counters')
+            self.stdout.write(
+                self.style.SUCCESS('Пересчёт поставлен в очередь')
+            )
+            return
+        fixed = counters.reconcile()
+        for name, rows in fixed.items():
+            self.stdout.write(f'{name}: исправлено строк {rows}')
+        self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны'))
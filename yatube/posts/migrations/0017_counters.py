@@ -0,0 +1,62 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:50
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def count_rows(model, field, ref):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef(ref)}).order_by().values(
+            field
+        ).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    Profile = apps.get_model('posts', 'Profile')
+    Profile.objects.bulk_create(
+        [Profile(user_id=pk) for pk in User.objects.values_list(
+            'pk', flat=True
+        ).iterator()],
+        batch_size=500,
+    )
+    Profile.objects.update(
+        posts_count=count_rows(Post, 'author', 'user'),
+        followers_count=count_rows(Follow, 'author', 'user'),
+        following_count=count_rows(Follow, 'user', 'user'),
+    )
+    Post.objects.update(comments_count=count_rows(Comment, 'post', 'pk'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0016_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество комментариев'),
+        ),
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Количество подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Количество подписок')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='profile', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
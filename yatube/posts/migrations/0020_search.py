@@ -0,0 +1,87 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:02
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import OperationalError, migrations, models
+import django.db.models.deletion
+
+from core import stemmer
+
+
+def create_fts(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE posts_search USING fts5(body)'
+        )
+    except OperationalError:
+        # SQLite собран без FTS5: поиск пойдёт через SearchTerm.
+        pass
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+
+
+def fill_index(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    connection = schema_editor.connection
+    posts = Post.objects.values_list('pk', 'text').order_by()
+    fts = (
+        settings.POSTS_SEARCH_BACKEND != 'index'
+        and 'posts_search' in connection.introspection.table_names()
+    )
+    if fts:
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO posts_search (rowid, body) VALUES (%s, %s)',
+                [
+                    (pk, ' '.join(stemmer.stems(text)))
+                    for pk, text in posts.iterator()
+                ],
+            )
+        return
+    SearchTerm.objects.bulk_create(
+        [
+            SearchTerm(post_id=pk, term=term, count=count)
+            for pk, text in posts.iterator()
+            for term, count in Counter(
+                term[:100] for term in stemmer.stems(text)
+            ).items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_post_thumbnails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100, verbose_name='Основа слова')),
+                ('count', models.PositiveIntegerField(default=1, verbose_name='Число вхождений')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post', verbose_name='Пост')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['term', 'post'], name='search_term_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchterm',
+            constraint=models.UniqueConstraint(fields=('post', 'term'), name='unique_search_term'),
+        ),
+        migrations.RunPython(create_fts, drop_fts),
+        migrations.RunPython(fill_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:30
+
+from django.db import migrations, models
+from django.db.models.functions import Cast, LPad
+import django.db.models.deletion
+
+
+def fill_paths(apps, schema_editor):
+    # Все существующие комментарии - корневые.
+    Comment = apps.get_model('posts', 'Comment')
+    Comment.objects.update(
+        path=LPad(Cast('id', models.CharField()), 10, models.Value('0'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_post_revisions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на комментарий'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=21, verbose_name='Путь в ветке'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='comment',
+            name='replies_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество ответов'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'parent', 'created', 'id'], name='comment_thread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['parent', 'path'], name='comment_reply_idx'),
+        ),
+    ]
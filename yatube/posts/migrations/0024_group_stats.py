@@ -0,0 +1,91 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:45
+
+import datetime
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils.timezone import utc
+
+
+def fill_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    GroupAuthorStats = apps.get_model('posts', 'GroupAuthorStats')
+    Post = apps.get_model('posts', 'Post')
+    in_groups = Post.objects.filter(group__isnull=False).order_by()
+    totals = {
+        row['group_id']: row for row in in_groups.values('group_id').annotate(
+            total=models.Count('pk'), last=models.Max('created')
+        )
+    }
+    no_activity = datetime.datetime(1970, 1, 1, tzinfo=utc)
+    GroupStats.objects.bulk_create([
+        GroupStats(
+            group_id=pk,
+            posts_count=totals.get(pk, {}).get('total', 0),
+            last_post_at=totals.get(pk, {}).get('last') or no_activity,
+        )
+        for pk in Group.objects.values_list('pk', flat=True)
+    ], batch_size=500)
+    GroupAuthorStats.objects.bulk_create([
+        GroupAuthorStats(
+            group_id=row['group_id'], author_id=row['author_id'],
+            posts_count=row['total'],
+        )
+        for row in in_groups.values('group_id', 'author_id').annotate(
+            total=models.Count('pk')
+        )
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0023_comment_threads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupAuthorStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='Сообщество')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+                ('last_post_at', models.DateTimeField(default=datetime.datetime(1970, 1, 1, 0, 0, tzinfo=utc), verbose_name='Время последнего поста')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-last_post_at', '-group'], name='group_stats_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-posts_count', '-group'], name='group_stats_posts_idx'),
+        ),
+        migrations.AddField(
+            model_name='groupauthorstats',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_stats', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AddField(
+            model_name='groupauthorstats',
+            name='group',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='author_stats', to='posts.Group', verbose_name='Сообщество'),
+        ),
+        migrations.AddIndex(
+            model_name='groupauthorstats',
+            index=models.Index(fields=['group', '-posts_count', 'author'], name='group_author_top_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupauthorstats',
+            constraint=models.UniqueConstraint(fields=('group', 'author'), name='unique_group_author'),
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:57
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.utils.timezone
+
+
+def copy_created(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    TimelineEntry.objects.update(created=Subquery(
+        Post.objects.filter(pk=OuterRef('post_id')).values('created')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_group_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timelineentry',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата публикации поста'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_created, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-created', '-post'], name='timeline_user_created_idx'),
+        ),
+    ]
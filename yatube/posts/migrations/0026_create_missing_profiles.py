@@ -0,0 +1,52 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:05
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_rows(model, field, ref, **filters):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef(ref)}, **filters).order_by(
+        ).values(field).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def create_profiles(apps, schema_editor):
+    # Раньше профиль создавался при первом чтении; теперь - вместе
+    # с пользователем, поэтому недостающие создаются здесь.
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Post = apps.get_model('posts', 'Post')
+    Follow = apps.get_model('posts', 'Follow')
+    Notification = apps.get_model('posts', 'Notification')
+    Profile = apps.get_model('posts', 'Profile')
+    missing = list(User.objects.filter(
+        profile__isnull=True
+    ).values_list('pk', flat=True))
+    Profile.objects.bulk_create(
+        [Profile(user_id=pk) for pk in missing], batch_size=500
+    )
+    for first in range(0, len(missing), 500):
+        Profile.objects.filter(
+            user_id__in=missing[first:first + 500]
+        ).update(
+            posts_count=count_rows(Post, 'author', 'user'),
+            followers_count=count_rows(Follow, 'author', 'user'),
+            following_count=count_rows(Follow, 'user', 'user'),
+            unread_notifications=count_rows(
+                Notification, 'user', 'user', is_read=False
+            ),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0025_timeline_created'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_profiles, migrations.RunPython.noop),
+    ]
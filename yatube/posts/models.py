@@ -1,3 +1,6 @@
+import json
+from datetime import datetime, timezone
+
 from django.db import models
 from django.contrib.auth import get_user_model
 from core.models import CreatedModel
@@ -20,6 +23,16 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для ленты: автор и группа одним запросом."""
+        return self.select_related('author', 'group')
+
+    def for_detail(self):
+        """Пост для отдельной страницы; комментарии читает posts.comments."""
+        return self.for_feed().select_related('author__profile')
+
+
 class Post(CreatedModel):
     text = models.TextField(verbose_name='Текст поста')
     author = models.ForeignKey(
@@ -43,11 +56,128 @@ class Post(CreatedModel):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0
+    )
+    thumbnails = models.TextField(
+        'Миниатюры картинки',
+        blank=True,
+        default='',
+        editable=False
+    )
+    image_hash = models.CharField(
+        'SHA-256 загруженной картинки',
+        max_length=64,
+        blank=True,
+        default='',
+        editable=False
+    )
+    version = models.PositiveIntegerField(
+        'Версия',
+        default=1,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta(CreatedModel.Meta):
+        # Индексы повторяют сортировку лент (created, id) по убыванию,
+        # чтобы страницы читались по индексу без сортировки.
+        indexes = [
+            models.Index(
+                fields=['-created', '-id'], name='post_created_idx'
+            ),
+            models.Index(
+                fields=['author', '-created', '-id'],
+                name='post_author_created_idx'
+            ),
+            models.Index(
+                fields=['group', '-created', '-id'],
+                name='post_group_created_idx'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Запоминаем значения из БД, чтобы сигналы видели, что изменилось.
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Сигналы post_save уже отработали: теперь записанное и есть
+        # значения в БД, иначе повторное сохранение того же экземпляра
+        # увидит старую правку ещё раз.
+        update_fields = kwargs.get('update_fields')
+        deferred = self.get_deferred_fields()
+        loaded = getattr(self, '_loaded_values', {})
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred or update_fields is not None and (
+                field.name not in update_fields
+                and field.attname not in update_fields
+            ):
+                continue
+            loaded[field.attname] = field.get_prep_value(
+                getattr(self, field.attname)
+            )
+        self._loaded_values = loaded
+
+    @property
+    def renditions(self):
+        """Готовые миниатюры картинки или пустой словарь, пока их нет."""
+        if not self.image or not self.thumbnails:
+            return {}
+        renditions = json.loads(self.thumbnails)
+        if renditions.get('source') != self.image.name:
+            return {}
+        return renditions
+
+    def changed_fields(self, names):
+        """Поля из names, значения которых отличаются от прочитанных из БД."""
+        loaded = getattr(self, '_loaded_values', {})
+        changed = []
+        for name in names:
+            attname = self._meta.get_field(name).attname
+            # FieldFile картинки равен строке со своим именем.
+            value = getattr(self, attname)
+            if attname not in loaded or value != loaded[attname]:
+                changed.append(name)
+        return changed
 
     def __str__(self):
         return self.text[:15]
 
 
+class PostRevision(CreatedModel):
+    """Состояние поста до правки."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+        verbose_name='Пост'
+    )
+    version = models.PositiveIntegerField('Версия')
+    text = models.TextField('Текст поста')
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        blank=True,
+        null=True,
+        verbose_name='Сообщество'
+    )
+    image = models.CharField('Картинка', max_length=100, blank=True)
+
+    class Meta(CreatedModel.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'version'], name='unique_post_revision'
+            )
+        ]
+
+
 class Comment(CreatedModel):
     post = models.ForeignKey(
         Post,
@@ -61,6 +191,42 @@ class Comment(CreatedModel):
         verbose_name='Автор комментария'
     )
     text = models.TextField(verbose_name='Текст комментария')
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        related_name='replies',
+        blank=True,
+        null=True,
+        verbose_name='Ответ на комментарий'
+    )
+    # id корня и ответа, дополненные нулями: сортировка по path
+    # выстраивает ответы ветки по порядку.
+    path = models.CharField(
+        'Путь в ветке',
+        max_length=21,
+        blank=True,
+        default='',
+        editable=False
+    )
+    replies_count = models.PositiveIntegerField(
+        'Количество ответов',
+        default=0
+    )
+
+    class Meta(CreatedModel.Meta):
+        indexes = [
+            models.Index(
+                fields=['post', '-created'], name='comment_post_created_idx'
+            ),
+            # Страницы корневых комментариев в обе стороны.
+            models.Index(
+                fields=['post', 'parent', 'created', 'id'],
+                name='comment_thread_idx'
+            ),
+            models.Index(
+                fields=['parent', 'path'], name='comment_reply_idx'
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -77,3 +243,196 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Автор'
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'
+            )
+        ]
+
+
+class Profile(models.Model):
+    """Счётчики автора, которые обновляются вместе с данными."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='profile',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Количество постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0
+    )
+    following_count = models.PositiveIntegerField(
+        'Количество подписок',
+        default=0
+    )
+    unread_notifications = models.PositiveIntegerField(
+        'Непрочитанные уведомления',
+        default=0
+    )
+
+    def __str__(self):
+        return f'Профиль {self.user}'
+
+
+class GroupStats(models.Model):
+    """Счётчики группы для каталога групп, обновляются вместе с постами.
+
+    У группы без постов last_post_at равно NO_ACTIVITY, а не NULL:
+    по нему листается курсор каталога.
+    """
+    NO_ACTIVITY = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Сообщество'
+    )
+    posts_count = models.PositiveIntegerField('Количество постов', default=0)
+    last_post_at = models.DateTimeField(
+        'Время последнего поста',
+        default=NO_ACTIVITY
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-last_post_at', '-group'],
+                name='group_stats_activity_idx'
+            ),
+            models.Index(
+                fields=['-posts_count', '-group'],
+                name='group_stats_posts_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Статистика {self.group}'
+
+
+class GroupAuthorStats(models.Model):
+    """Число постов автора в группе, для самых активных авторов."""
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='author_stats',
+        verbose_name='Сообщество'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_stats',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField('Количество постов', default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['group', '-posts_count', 'author'],
+                name='group_author_top_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['group', 'author'], name='unique_group_author'
+            )
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    # Копия Post.created: лента листается по индексу этой таблицы.
+    created = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-created', '-post'],
+                name='timeline_user_created_idx'
+            ),
+        ]
+
+
+class SearchTerm(models.Model):
+    """Запись обратного индекса поиска для БД без SQLite FTS5."""
+    term = models.CharField('Основа слова', max_length=100)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name='Пост'
+    )
+    count = models.PositiveIntegerField('Число вхождений', default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'post'], name='search_term_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'term'], name='unique_search_term'
+            )
+        ]
+
+
+class Notification(CreatedModel):
+    """Уведомление подписчика о новом посте автора."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Пост'
+    )
+    is_read = models.BooleanField('Прочитано', default=False)
+
+    class Meta(CreatedModel.Meta):
+        indexes = [
+            models.Index(
+                fields=['user', '-created'],
+                name='notification_user_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_notification'
+            )
+        ]
+
+
+class NotificationOutbox(models.Model):
+    """Пост, о котором ещё не разосланы уведомления."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Пост'
+    )
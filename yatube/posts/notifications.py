@@ -0,0 +1,94 @@
+"""Уведомления подписчиков о новых постах.
+
+Публикация только ставит пост в NotificationOutbox и фоновую задачу,
+поэтому время запроса не зависит от числа подписчиков. Задача забирает
+из очереди все накопившиеся посты: серия постов одного автора
+рассылается одним проходом по его подписчикам, а строки Notification
+вставляются через bulk_create пачками по BATCH_SIZE подписчиков.
+Число непрочитанных хранится в Profile.unread_notifications.
+"""
+from collections import defaultdict
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F
+
+from core import jobs
+
+from .models import Follow, Notification, NotificationOutbox, Profile
+
+BATCH_SIZE = 500
+
+
+def enqueue(post):
+    """Поставить рассылку уведомлений о посте в очередь."""
+    NotificationOutbox.objects.create(post=post)
+    # Пока задача ждёт в очереди, новые посты доставит она же.
+    jobs.enqueue(deliver, key='notifications')
+
+
+def _claim(post_ids):
+    """Забирает посты из очереди; чужие задачи их уже не увидят."""
+    return [
+        post_id for post_id in post_ids
+        if NotificationOutbox.objects.filter(post_id=post_id).delete()[0]
+    ]
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def deliver():
+    """Рассылает уведомления обо всех постах из очереди."""
+    pending = defaultdict(list)
+    for post_id, author_id in NotificationOutbox.objects.values_list(
+        'post_id', 'post__author_id'
+    ):
+        pending[author_id].append(post_id)
+    for author_id, post_ids in pending.items():
+        with transaction.atomic():
+            post_ids = _claim(post_ids)
+            if post_ids:
+                notify_followers(author_id, post_ids)
+
+
+def notify_followers(author_id, post_ids):
+    followers = Follow.objects.filter(author_id=author_id).values_list(
+        'user_id', flat=True
+    ).order_by()
+    for users in _chunks(followers.iterator(BATCH_SIZE), BATCH_SIZE):
+        # Повтор задачи застаёт часть уведомлений уже созданными:
+        # счётчик растёт только на действительно вставленные.
+        existing = set(Notification.objects.filter(
+            user_id__in=users, post_id__in=post_ids
+        ).values_list('user_id', 'post_id'))
+        rows = []
+        added = defaultdict(int)
+        for user_id in users:
+            for post_id in post_ids:
+                if (user_id, post_id) not in existing:
+                    rows.append(Notification(user_id=user_id, post_id=post_id))
+                    added[user_id] += 1
+        Notification.objects.bulk_create(
+            rows, batch_size=BATCH_SIZE, ignore_conflicts=True
+        )
+        by_count = defaultdict(list)
+        for user_id, count in added.items():
+            by_count[count].append(user_id)
+        for count, user_ids in by_count.items():
+            Profile.objects.filter(user_id__in=user_ids).update(
+                unread_notifications=F('unread_notifications') + count
+            )
+
+
+def mark_read(user):
+    with transaction.atomic():
+        Notification.objects.filter(user=user, is_read=False).update(
+            is_read=True
+        )
+        Profile.objects.filter(user=user).update(unread_notifications=0)
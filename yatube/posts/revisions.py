@@ -0,0 +1,36 @@
+"""Правка поста с записью только изменённых полей.
+
+Изменённые поля считаются по changed_data формы и значениям,
+прочитанным из БД: правка без изменений ничего не пишет, и кэши лент
+остаются действительными. Перед изменением в PostRevision
+сохраняется прежнее состояние поста - одна вставка на правку.
+"""
+from django.db import transaction
+
+from . import thumbnails
+from .models import PostRevision
+
+
+def save_edit(post, form):
+    """Сохраняет правку; возвращает список изменённых полей."""
+    fields = post.changed_fields(form.changed_data)
+    if not fields:
+        return []
+    loaded = post._loaded_values
+    update_fields = fields + ['version']
+    if 'image' in fields:
+        post.image_hash = form.image_hash
+        update_fields.append('image_hash')
+    post.version = loaded['version'] + 1
+    with transaction.atomic():
+        PostRevision.objects.create(
+            post=post,
+            version=loaded['version'],
+            text=loaded['text'],
+            group_id=loaded['group_id'],
+            image=loaded['image'],
+        )
+        post.save(update_fields=update_fields)
+        if 'image' in fields:
+            thumbnails.schedule(post)
+    return fields
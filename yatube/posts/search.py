@@ -0,0 +1,283 @@
+"""Полнотекстовый поиск по постам.
+
+В SQLite основы слов постов лежат в виртуальной таблице FTS5
+posts_search (rowid - id поста), результаты ранжируются bm25.
+На других БД используется обратный индекс SearchTerm с весами tf-idf.
+Слова приводятся к основам стеммером Snowball, поэтому запрос
+«постов» находит «пост» и «посты».
+
+Индекс обновляется сигналами при сохранении и удалении поста;
+после массовой загрузки его пересобирает rebuild_search_index.
+"""
+import base64
+import json
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from core import stemmer
+
+from .models import Post, SearchTerm
+
+FTS_TABLE = 'posts_search'
+# Длинные запросы обрезаются: каждое слово - отдельное условие.
+MAX_TERMS = 10
+SNIPPET_WORDS = 30
+
+TOKEN_RE = re.compile(r'(\w+)')
+DOCUMENTS_KEY = 'search:documents'
+# idf не чувствителен к точному числу постов, поэтому COUNT(*)
+# по всем постам считается не чаще раза в DOCUMENTS_TIMEOUT секунд.
+DOCUMENTS_TIMEOUT = 60 * 60
+
+
+@lru_cache(maxsize=None)
+def _fts_exists(database):
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def use_fts():
+    backend = settings.POSTS_SEARCH_BACKEND
+    if backend != 'auto':
+        return backend == 'fts5'
+    return (
+        connection.vendor == 'sqlite'
+        and _fts_exists(connection.settings_dict['NAME'])
+    )
+
+
+def parse(query):
+    """Основы слов запроса без повторов."""
+    return list(dict.fromkeys(stemmer.stems(query)))[:MAX_TERMS]
+
+
+def _counts(text):
+    return Counter(
+        term[:SearchTerm._meta.get_field('term').max_length]
+        for term in stemmer.stems(text)
+    )
+
+
+def _match(terms):
+    # Основы состоят только из букв и цифр, кавычки не нужно экранировать.
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def index_post(post):
+    if use_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)',
+                [post.pk, ' '.join(stemmer.stems(post.text))],
+            )
+        return
+    SearchTerm.objects.filter(post_id=post.pk).delete()
+    SearchTerm.objects.bulk_create([
+        SearchTerm(post_id=post.pk, term=term, count=count)
+        for term, count in _counts(post.text).items()
+    ])
+
+
+def remove_post(post_id):
+    # Строки SearchTerm удаляются каскадом вместе с постом.
+    if use_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+
+def rebuild(batch=2000):
+    """Пересобирает индекс целиком, возвращает число постов."""
+    posts = Post.objects.values_list('pk', 'text').order_by()
+    total = 0
+    if use_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            rows = []
+            for pk, text in posts.iterator(chunk_size=batch):
+                rows.append((pk, ' '.join(stemmer.stems(text))))
+                if len(rows) == batch:
+                    cursor.executemany(
+                        f'INSERT INTO {FTS_TABLE} (rowid, body) '
+                        'VALUES (%s, %s)',
+                        rows,
+                    )
+                    total += len(rows)
+                    rows = []
+            if rows:
+                cursor.executemany(
+                    f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)',
+                    rows,
+                )
+                total += len(rows)
+        return total
+    SearchTerm.objects.all().delete()
+    terms = []
+    for pk, text in posts.iterator(chunk_size=batch):
+        terms.extend(
+            SearchTerm(post_id=pk, term=term, count=count)
+            for term, count in _counts(text).items()
+        )
+        total += 1
+        if len(terms) >= batch:
+            # Размер пачки INSERT выбирает Django: SQLite не принимает
+            # больше 500 строк в одном составном SELECT.
+            SearchTerm.objects.bulk_create(terms)
+            terms = []
+    SearchTerm.objects.bulk_create(terms)
+    cache.set(DOCUMENTS_KEY, total, DOCUMENTS_TIMEOUT)
+    return total
+
+
+def _index_matches(terms):
+    """Id подходящих постов из SearchTerm: все слова запроса в посте."""
+    return SearchTerm.objects.filter(term__in=terms).values(
+        'post_id'
+    ).annotate(matched=Count('term')).filter(matched=len(terms))
+
+
+def filter_queryset(queryset, query):
+    """Оставляет в queryset постов только найденные по запросу."""
+    terms = parse(query)
+    if not terms:
+        return queryset.none()
+    if use_fts():
+        return queryset.extra(
+            where=[
+                f'{Post._meta.db_table}.id IN (SELECT rowid FROM '
+                f'{FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)'
+            ],
+            params=[_match(terms)],
+        )
+    return queryset.filter(pk__in=_index_matches(terms).values('post_id'))
+
+
+def encode_cursor(score, pk):
+    raw = json.dumps([score, pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        score, pk = json.loads(raw.decode())
+        return float(score), int(pk)
+    except (ValueError, TypeError):
+        return None
+
+
+def _fts_ranked(terms, seek, limit):
+    score = f'-bm25({FTS_TABLE})'
+    sql = (
+        f'SELECT rowid, {score} AS score FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s'
+    )
+    params = [_match(terms)]
+    if seek:
+        sql += f' AND ({score} < %s OR ({score} = %s AND rowid < %s))'
+        params += [seek[0], seek[0], seek[1]]
+    sql += ' ORDER BY score DESC, rowid DESC LIMIT %s'
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _documents():
+    documents = cache.get(DOCUMENTS_KEY)
+    if documents is None:
+        documents = Post.objects.count()
+        cache.set(DOCUMENTS_KEY, documents, DOCUMENTS_TIMEOUT)
+    return documents or 1
+
+
+def _index_ranked(terms, seek, limit):
+    documents = _documents()
+    frequencies = dict(
+        SearchTerm.objects.filter(term__in=terms).values('term').annotate(
+            posts=Count('id')
+        ).values_list('term', 'posts')
+    )
+    if len(frequencies) < len(terms):
+        return []
+    weight = Case(
+        *[
+            When(term=term, then=Value(
+                math.log(1 + documents / frequencies[term])
+            ))
+            for term in terms
+        ],
+        output_field=FloatField(),
+    )
+    rows = _index_matches(terms).annotate(
+        score=Sum(F('count') * weight, output_field=FloatField())
+    )
+    if seek:
+        rows = rows.filter(
+            Q(score__lt=seek[0]) | Q(score=seek[0], post_id__lt=seek[1])
+        )
+    return list(
+        rows.order_by('-score', '-post_id').values_list(
+            'post_id', 'score'
+        )[:limit]
+    )
+
+
+def highlight(text, terms, size=SNIPPET_WORDS):
+    """Фрагмент текста вокруг первого совпадения, слова выделены <mark>."""
+    terms = set(terms)
+    tokens = TOKEN_RE.split(text)
+    # Слова стоят на нечётных позициях, между ними - разделители.
+    words = range(1, len(tokens), 2)
+    matched = {i for i in words if stemmer.stem(tokens[i]) in terms}
+    first = min(matched, default=1)
+    start = max(1, first - 2 * (size // 4))
+    end = min(len(tokens), start + 2 * size)
+    parts = ['…'] if start > 1 else [escape(tokens[0])]
+    for i in range(start, end):
+        if i in matched:
+            parts.append(f'<mark>{escape(tokens[i])}</mark>')
+        else:
+            parts.append(escape(tokens[i]))
+    if end < len(tokens):
+        parts.append('…')
+    return mark_safe(''.join(parts).strip())
+
+
+def search(query, after=None, limit=10):
+    """Страница результатов: посты по убыванию релевантности.
+
+    Возвращает список постов (с атрибутами score и highlight)
+    и курсор следующей страницы или None.
+    """
+    terms = parse(query)
+    if not terms:
+        return [], None
+    seek = decode_cursor(after) if after else None
+    ranked = _fts_ranked if use_fts() else _index_ranked
+    rows = ranked(terms, seek, limit + 1)
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    posts = Post.objects.for_feed().in_bulk([pk for pk, _ in rows])
+    results = []
+    for pk, score in rows:
+        post = posts.get(pk)
+        if post is None:
+            continue
+        post.score = score
+        post.highlight = highlight(post.text, terms)
+        results.append(post)
+    next_cursor = encode_cursor(*rows[-1][::-1]) if has_next else None
+    return results, next_cursor
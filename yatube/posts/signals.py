@@ -0,0 +1,146 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import feed_cache, group_stats, search, timeline
+from .models import Comment, Follow, Group, Post, Profile, User
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, raw, **kwargs):
+    # Профиль со счётчиками заводится сразу, чтобы чтение страниц
+    # ничего не записывало.
+    if created and not raw:
+        Profile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def user_renamed(sender, instance, created, update_fields, **kwargs):
+    # Имя автора есть в карточках его постов во всех лентах. Вход
+    # сохраняет только last_login и ленты не трогает.
+    names = {'username', 'first_name', 'last_name'}
+    if created or (update_fields is not None and not names & update_fields):
+        return
+    groups = Post.objects.filter(
+        author=instance, group__isnull=False
+    ).values_list('group_id', flat=True).order_by().distinct()
+    feed_cache.bump(
+        feed_cache.index_scope(),
+        feed_cache.author_scope(instance.pk),
+        *(feed_cache.group_scope(pk) for pk in groups),
+    )
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_values', {})
+    if created or loaded.get('text') != instance.text:
+        search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+    if instance.group_id is not None:
+        group_stats.post_removed(
+            instance.group_id, instance.author_id, instance.created
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_group_changed(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_values', {})
+    if not created and 'group_id' not in loaded:
+        # Пост сохранён не из прочитанного экземпляра: прежняя группа
+        # неизвестна, статистику поправит rebuild_group_stats.
+        return
+    previous = loaded.get('group_id')
+    if previous == instance.group_id:
+        return
+    if previous is not None:
+        group_stats.post_removed(
+            previous, instance.author_id, instance.created
+        )
+    if instance.group_id is not None:
+        group_stats.post_added(
+            instance.group_id, instance.author_id, instance.created
+        )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    scopes = feed_cache.post_scopes(instance.author_id, instance.group_id)
+    scopes.append(feed_cache.post_scope(instance.pk))
+    loaded = getattr(instance, '_loaded_values', {})
+    if loaded.get('group_id') not in (None, instance.group_id):
+        # Пост ушёл из прежней группы.
+        scopes.append(feed_cache.group_scope(loaded['group_id']))
+    if instance.group_id is not None or loaded.get('group_id') is not None:
+        scopes.append(feed_cache.groups_scope())
+    feed_cache.bump(*scopes)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    feed_cache.bump(feed_cache.post_scope(instance.post_id))
+    # В карточках лент показано число комментариев поста.
+    if Comment.post.is_cached(instance):
+        post = instance.post
+        feed_cache.bump(
+            *feed_cache.post_scopes(post.author_id, post.group_id)
+        )
+        return
+    row = Post.objects.filter(pk=instance.post_id).values_list(
+        'author_id', 'group_id'
+    ).first()
+    if row is not None:
+        feed_cache.bump(*feed_cache.post_scopes(*row))
+
+
+@receiver(post_save, sender=Group)
+def group_changed(sender, instance, created, **kwargs):
+    if created:
+        group_stats.group_created(instance.pk)
+        feed_cache.bump(feed_cache.groups_scope())
+        return
+    # Название и описание группы входят во фрагмент её ленты и каталог,
+    # slug - в ссылки карточек её постов во всех лентах.
+    authors = Post.objects.filter(group=instance).values_list(
+        'author_id', flat=True
+    ).order_by().distinct()
+    feed_cache.bump(
+        feed_cache.group_scope(instance.pk),
+        feed_cache.groups_scope(),
+        feed_cache.index_scope(),
+        *(feed_cache.author_scope(pk) for pk in authors),
+    )
+
+
+def follow_scopes(follow):
+    # Профили обоих показывают счётчики подписок и подписчиков.
+    return [
+        feed_cache.follow_scope(follow.user_id),
+        feed_cache.author_scope(follow.user_id),
+        feed_cache.author_scope(follow.author_id),
+    ]
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+        feed_cache.bump(*follow_scopes(instance))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+    timeline.follower_removed(instance.author_id)
+    feed_cache.bump(*follow_scopes(instance))
@@ -0,0 +1,15 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from ..cards import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    """HTML карточек постов страницы из кэша posts.cards.
+
+    Использование: {% post_cards page_obj as cards %}.
+    """
+    return [mark_safe(card) for card in render_cards(list(posts))]
@@ -1,9 +1,12 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase, Client
 from django.urls import reverse
-from ..models import Post
+from .. import feed_cache
+from ..models import Group, Post
 from django.core.cache import cache
 
+from core.testing import run_on_commit
+
 User = get_user_model()
 
 
@@ -13,21 +16,96 @@ class PostCacheTest(TestCase):
         super().setUpClass()
 
     def setUp(self):
+        cache.clear()
         # Создаем авторизованный клиент
         self.user = User.objects.create_user(username='test')
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
+        self.group = Group.objects.create(title='Группа', slug='group')
+
+    def get_content(self, name, **kwargs):
+        return self.authorized_client.get(
+            reverse(name, kwargs=kwargs)
+        ).content.decode()
 
     def test_cache(self):
         post_test = Post.objects.create(
             text='Test',
             author=self.user
         )
-
-        response_1 = self.authorized_client.get(reverse('posts:index')).content
-        post_test.delete()
-        response_2 = self.authorized_client.get(reverse('posts:index')).content
-        self.assertEquals(response_1, response_2)
+        self.assertIn('Test', self.get_content('posts:index'))
+        # Изменение в обход сигналов не сбрасывает кэш.
+        Post.objects.filter(pk=post_test.pk).update(text='Hidden')
+        self.assertNotIn('Hidden', self.get_content('posts:index'))
         cache.clear()
-        response_3 = self.authorized_client.get(reverse('posts:index')).content
-        self.assertNotEqual(response_2, response_3)
+        self.assertIn('Hidden', self.get_content('posts:index'))
+
+    def test_new_and_deleted_posts_invalidate_feeds(self):
+        self.get_content('posts:index')
+        with run_on_commit():
+            post_test = Post.objects.create(
+                text='Новый пост', author=self.user, group=self.group
+            )
+        feeds = {
+            'posts:index': {},
+            'posts:group_list': {'slug': 'group'},
+            'posts:profile': {'username': 'test'},
+        }
+        for name, kwargs in feeds.items():
+            with self.subTest(name=name):
+                self.assertIn('Новый пост', self.get_content(name, **kwargs))
+        with run_on_commit():
+            post_test.delete()
+        for name, kwargs in feeds.items():
+            with self.subTest(name=name):
+                self.assertNotIn(
+                    'Новый пост', self.get_content(name, **kwargs)
+                )
+
+    def test_group_change_invalidates_old_group(self):
+        post_test = Post.objects.create(
+            text='Переезд', author=self.user, group=self.group
+        )
+        self.assertIn('Переезд', self.get_content(
+            'posts:group_list', slug='group'
+        ))
+        post_test = Post.objects.get(pk=post_test.pk)
+        post_test.group = Group.objects.create(title='Другая', slug='other')
+        with run_on_commit():
+            post_test.save()
+        self.assertNotIn('Переезд', self.get_content(
+            'posts:group_list', slug='group'
+        ))
+
+    def test_pages_are_cached_separately(self):
+        for i in range(11):
+            Post.objects.create(text=f'Пост {i}', author=self.user)
+        first = self.authorized_client.get(reverse('posts:index'))
+        cursor = first.context['page_obj'].paginator.next_cursor
+        second = self.authorized_client.get(
+            reverse('posts:index'), {'after': cursor}
+        )
+        self.assertIn('Пост 0', second.content.decode())
+        self.assertNotIn('Пост 0', first.content.decode())
+
+    def test_follow_feed_invalidated_on_follow(self):
+        author = User.objects.create_user(username='author')
+        Post.objects.create(text='Пост автора', author=author)
+        self.assertNotIn('Пост автора', self.get_content('posts:follow_index'))
+        with run_on_commit():
+            self.authorized_client.get(
+                reverse('posts:profile_follow', kwargs={'username': 'author'})
+            )
+        self.assertIn('Пост автора', self.get_content('posts:follow_index'))
+
+    def test_generations_change_after_commit(self):
+        # Пока транзакция не зафиксирована, фрагменты остаются прежними.
+        before = feed_cache.generations(feed_cache.index_scope())
+        with run_on_commit():
+            Post.objects.create(text='Новый пост', author=self.user)
+            self.assertEqual(
+                feed_cache.generations(feed_cache.index_scope()), before
+            )
+        self.assertNotEqual(
+            feed_cache.generations(feed_cache.index_scope()), before
+        )
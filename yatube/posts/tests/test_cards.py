@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import run_on_commit
+
+from .. import threads
+from ..cards import card_key, render_cards
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.post = Post.objects.create(
+            text='Текст поста', author=self.author, group=self.group
+        )
+        self.client = Client()
+
+    def test_card_rendered_once_for_all_feeds(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Текст поста')
+        key = card_key(self.post)
+        self.assertIn('Текст поста', cache.get(key))
+        cache.set(key, '<p>карточка из кэша</p>')
+        for url in (
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+        ):
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.client.get(url), 'карточка из кэша'
+                )
+
+    def test_key_follows_version_and_comments(self):
+        key = card_key(self.post)
+        threads.add(self.post, self.author, 'Комментарий')
+        self.post.refresh_from_db()
+        commented = card_key(self.post)
+        self.assertNotEqual(commented, key)
+        self.post.version += 1
+        self.assertNotEqual(card_key(self.post), commented)
+
+    def test_key_follows_author_and_group(self):
+        key = card_key(self.post)
+        self.group.slug = 'renamed'
+        self.group.save()
+        renamed = card_key(Post.objects.for_feed().get(pk=self.post.pk))
+        self.assertNotEqual(renamed, key)
+        self.author.first_name = 'Лев'
+        self.author.save()
+        post = Post.objects.for_feed().get(pk=self.post.pk)
+        self.assertNotEqual(card_key(post), renamed)
+        self.assertIn('Лев', render_cards([post])[0])
+
+    def test_feeds_follow_renames(self):
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.author.username]),
+        )
+        for url in pages:
+            self.client.get(url)
+        self.group.slug = 'renamed'
+        self.author.last_name = 'Толстой'
+        with run_on_commit():
+            self.group.save()
+            self.author.save()
+        for url in pages:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, '/group/renamed/')
+                self.assertContains(response, 'Толстой')
+
+    def test_cards_keep_page_order(self):
+        second = Post.objects.create(text='Второй', author=self.author)
+        render_cards([self.post])
+        cards = render_cards([second, self.post])
+        self.assertIn('Второй', cards[0])
+        self.assertIn('Текст поста', cards[1])
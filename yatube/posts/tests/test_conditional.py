@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import run_on_commit
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=['group']),
+            reverse('posts:profile', args=['author']),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        ]
+
+    def test_not_modified_skips_rendering(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('no-cache', response['Cache-Control'])
+                self.assertIn('Cookie', response['Vary'])
+                with self.assertNumQueries(0):
+                    repeated = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(repeated.status_code, 304)
+                self.assertEqual(repeated.templates, [])
+
+    def test_if_modified_since_ignored_for_html(self):
+        # По дате нельзя отличить одного пользователя от другого.
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        repeated = self.reader_client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+        self.assertEqual(repeated.status_code, 200)
+
+    def test_new_login_changes_etag(self):
+        # При входе меняется токен CSRF в формах страницы.
+        self.reader.set_password('password')
+        self.reader.save()
+        client = Client()
+        credentials = {'username': 'reader', 'password': 'password'}
+        client.post(reverse('users:login'), credentials)
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        etag = client.get(url)['ETag']
+        client.get(reverse('users:logout'))
+        client.post(reverse('users:login'), credentials)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_changes_invalidate(self):
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        with run_on_commit():
+            Post.objects.create(
+                text='Новый', author=self.author, group=self.group
+            )
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_comment_invalidates_post_detail(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        etag = self.client.get(url)['ETag']
+        with run_on_commit():
+            Comment.objects.create(
+                post=self.post, author=self.reader, text='!'
+            )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, '!')
+
+    def test_etag_depends_on_user(self):
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_follow_button_invalidates_profile(self):
+        url = reverse('posts:profile', args=['author'])
+        etag = self.reader_client.get(url)['ETag']
+        with run_on_commit():
+            Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.context['following'], 'following')
@@ -0,0 +1,99 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Post, Profile
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='test')
+        self.author = User.objects.create_user(username='author')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def profile(self, user):
+        return Profile.objects.get(user=user)
+
+    def test_profile_created_with_user(self):
+        self.assertEqual(self.profile(self.user).posts_count, 0)
+
+    def test_profile_page_writes_nothing(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(
+                reverse('posts:profile', kwargs={'username': 'author'})
+            )
+        self.assertFalse([
+            query['sql'] for query in context.captured_queries
+            if not query['sql'].startswith('SELECT')
+        ])
+
+    def test_post_create_increments_posts_count(self):
+        for number in range(1, 3):
+            self.authorized_client.post(
+                reverse('posts:post_create'), data={'text': 'Текст'}
+            )
+            self.assertEqual(self.profile(self.user).posts_count, number)
+
+    def test_missing_profile_created_on_change(self):
+        Profile.objects.filter(user=self.user).delete()
+        Post.objects.create(text='Старый', author=self.user)
+        self.authorized_client.post(
+            reverse('posts:post_create'), data={'text': 'Текст'}
+        )
+        # Профиль создан по реальным данным и учёл оба поста.
+        self.assertEqual(self.profile(self.user).posts_count, 2)
+
+    def test_add_comment_increments_comments_count(self):
+        post = Post.objects.create(text='Текст', author=self.author)
+        for _ in range(2):
+            self.authorized_client.post(
+                reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+                data={'text': 'Комментарий'}
+            )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 2)
+
+    def test_follow_and_unfollow_change_counters(self):
+        follow_url = reverse(
+            'posts:profile_follow', kwargs={'username': 'author'}
+        )
+        self.authorized_client.get(follow_url)
+        self.authorized_client.get(follow_url)
+        self.assertEqual(self.profile(self.user).following_count, 1)
+        self.assertEqual(self.profile(self.author).followers_count, 1)
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'author'})
+        )
+        self.assertEqual(self.profile(self.user).following_count, 0)
+        self.assertEqual(self.profile(self.author).followers_count, 0)
+
+    def test_drifted_counter_stops_at_zero(self):
+        self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        Profile.objects.update(following_count=0, followers_count=0)
+        response = self.authorized_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'author'})
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.profile(self.user).following_count, 0)
+        self.assertEqual(self.profile(self.author).followers_count, 0)
+
+    def test_reconcile_counters_fixes_drift(self):
+        post = Post.objects.create(text='Текст', author=self.author)
+        Comment.objects.create(post=post, author=self.user, text='...')
+        Profile.objects.filter(user=self.author).update(posts_count=10)
+        Profile.objects.filter(user=self.user).delete()
+        call_command('reconcile_counters', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.profile(self.author).posts_count, 1)
+        self.assertEqual(self.profile(self.user).posts_count, 0)
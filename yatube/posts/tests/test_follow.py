@@ -1,7 +1,8 @@
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
-from ..models import Post, Group
+from .. import timeline
+from ..models import Follow, Post, Group, TimelineEntry
 
 User = get_user_model()
 
@@ -69,3 +70,107 @@ class FollowTests(TestCase):
         )
         long_page = len(response.context['page_obj'])
         self.assertEqual(long_page, 0)
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.user = User.objects.create_user(username='reader')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.old_post = Post.objects.create(text='Старый', author=self.author)
+
+    def follow(self):
+        self.authorized_client.get(
+            reverse('posts:profile_follow',
+                    kwargs={'username': self.author.username}))
+
+    def test_follow_backfills_timeline(self):
+        self.follow()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, post=self.old_post
+        ).exists())
+
+    def test_new_post_fans_out_to_followers(self):
+        self.follow()
+        post = Post.objects.create(text='Новый', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, post=post
+        ).exists())
+
+    def test_unfollow_prunes_timeline(self):
+        self.follow()
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow',
+                    kwargs={'username': self.author.username}))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user).exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_heavy_author_is_read_on_request(self):
+        self.follow()
+        post = Post.objects.create(text='Новый', author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            list(response.context['page_obj']), [post, self.old_post]
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_heavy_author_found_without_counter(self):
+        # Подписки в обход представлений не меняют счётчик в профиле.
+        for name in ('first', 'second'):
+            Follow.objects.create(
+                user=User.objects.create_user(username=name),
+                author=self.author,
+            )
+        self.follow()
+        post = Post.objects.create(text='Новый', author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertIn(post, response.context['page_obj'])
+
+    def test_entries_keep_post_date(self):
+        self.follow()
+        entry = TimelineEntry.objects.get(user=self.user)
+        self.assertEqual(entry.created, self.old_post.created)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_cursor_pages_merge_heavy_authors(self):
+        self.follow()
+        heavy = User.objects.create_user(username='heavy')
+        for name in ('first', 'second'):
+            follower = Client()
+            follower.force_login(User.objects.create_user(username=name))
+            follower.get(reverse(
+                'posts:profile_follow', kwargs={'username': 'heavy'}
+            ))
+        Follow.objects.create(user=self.user, author=heavy)
+        posts = [self.old_post]
+        for number in range(5):
+            posts.append(Post.objects.create(
+                text=f'Пост {number}',
+                author=heavy if number % 2 else self.author,
+            ))
+        self.assertFalse(TimelineEntry.objects.filter(
+            post__author=heavy
+        ).exists())
+        paginator = timeline.TimelinePaginator(
+            Post.objects.for_feed(), 4, self.user
+        )
+        first = paginator.get_cursor_page()
+        self.assertEqual(list(first), posts[:1:-1])
+        rest = paginator.get_cursor_page(after=paginator.next_cursor)
+        self.assertEqual(list(rest), posts[1::-1])
+        self.assertFalse(rest.has_next())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1, JOBS_EAGER=True)
+    def test_author_below_limit_is_backfilled(self):
+        self.follow()
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=other, author=self.author)
+        post = Post.objects.create(text='Новый', author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        Follow.objects.filter(user=other).delete()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, post=post
+        ).exists())
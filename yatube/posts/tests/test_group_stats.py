@@ -0,0 +1,148 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import group_stats
+from ..models import Group, GroupAuthorStats, GroupStats, Post
+
+User = get_user_model()
+
+
+class GroupStatsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.other = User.objects.create_user(username='other')
+        self.first = Group.objects.create(title='Первая', slug='first')
+        self.second = Group.objects.create(title='Вторая', slug='second')
+
+    def stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def authors(self, group):
+        return dict(GroupAuthorStats.objects.filter(
+            group=group
+        ).values_list('author__username', 'posts_count'))
+
+    def test_new_post_counts_in_group(self):
+        self.assertEqual(self.stats(self.first).posts_count, 0)
+        Post.objects.create(text='Пост', author=self.author, group=self.first)
+        post = Post.objects.create(
+            text='Пост', author=self.other, group=self.first
+        )
+        stats = self.stats(self.first)
+        self.assertEqual(
+            (stats.posts_count, stats.last_post_at), (2, post.created)
+        )
+        self.assertEqual(self.authors(self.first), {'author': 1, 'other': 1})
+
+    def test_saving_same_instance_again(self):
+        post = Post.objects.create(
+            text='Пост', author=self.author, group=self.first
+        )
+        Post.objects.create(text='Ещё', author=self.author, group=self.first)
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.second
+        post.save()
+        post.text = 'Правка'
+        post.save()
+        self.assertEqual(self.stats(self.first).posts_count, 1)
+        self.assertEqual(self.stats(self.second).posts_count, 1)
+        # Созданный экземпляр тоже помнит свою группу.
+        fresh = Post.objects.create(
+            text='Новый', author=self.other, group=self.first
+        )
+        fresh.group = self.second
+        fresh.save()
+        self.assertEqual(self.stats(self.first).posts_count, 1)
+        self.assertEqual(self.stats(self.second).posts_count, 2)
+
+    def test_group_change_and_delete(self):
+        older = Post.objects.create(
+            text='Старый', author=self.author, group=self.first
+        )
+        post = Post.objects.create(
+            text='Пост', author=self.author, group=self.first
+        )
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.second
+        post.save()
+        first, second = self.stats(self.first), self.stats(self.second)
+        self.assertEqual(
+            (first.posts_count, first.last_post_at), (1, older.created)
+        )
+        self.assertEqual(second.posts_count, 1)
+        older.delete()
+        first = self.stats(self.first)
+        self.assertEqual(
+            (first.posts_count, first.last_post_at),
+            (0, GroupStats.NO_ACTIVITY),
+        )
+        self.assertEqual(self.authors(self.first), {})
+
+    def test_rebuild_command(self):
+        Post.objects.create(text='Пост', author=self.author, group=self.first)
+        GroupStats.objects.all().delete()
+        GroupAuthorStats.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_group_stats', stdout=out)
+        self.assertIn('групп 2', out.getvalue())
+        self.assertEqual(self.stats(self.first).posts_count, 1)
+        self.assertEqual(self.stats(self.second).posts_count, 0)
+        self.assertEqual(self.authors(self.first), {'author': 1})
+
+
+class GroupIndexTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.groups = [
+            Group.objects.create(title=f'Группа {number}', slug=f'g{number}')
+            for number in range(group_stats.GROUPS_PER_PAGE + 1)
+        ]
+        for number, group in enumerate(self.groups[:3]):
+            for _ in range(number + 1):
+                Post.objects.create(
+                    text='Пост', author=self.author, group=group
+                )
+        self.url = reverse('posts:group_index')
+
+    def titles(self, response):
+        return [
+            stats.group.title for stats in response.context['page_obj']
+        ]
+
+    def test_sorted_by_activity_and_posts(self):
+        response = self.client.get(self.url)
+        self.assertEqual(
+            self.titles(response)[:3], ['Группа 2', 'Группа 1', 'Группа 0']
+        )
+        self.assertContains(response, 'Активные авторы')
+        by_posts = self.titles(self.client.get(self.url, {'sort': 'posts'}))
+        self.assertEqual(by_posts[0], 'Группа 2')
+
+    def test_cursor_pages(self):
+        page = self.client.get(self.url).context['page_obj']
+        self.assertTrue(page.has_next())
+        rest = self.client.get(
+            self.url, {'after': page.paginator.next_cursor}
+        )
+        self.assertEqual(len(rest.context['page_obj']), 1)
+        self.assertEqual(
+            len(set(self.titles(rest)) | {s.group.title for s in page}),
+            len(self.groups),
+        )
+
+    def test_cached_directory_skips_queries(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+        Post.objects.create(
+            text='Пост', author=self.author, group=self.groups[-1]
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(self.titles(response)[0], self.groups[-1].title)
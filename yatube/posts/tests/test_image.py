@@ -1,9 +1,15 @@
+import json
 import shutil
 import tempfile
+from io import BytesIO
+
+from PIL import Image
 from django.contrib.auth import get_user_model
+from .. import thumbnails
 from ..forms import PostForm
 from ..models import Post, Group
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
@@ -202,3 +208,100 @@ class TaskCreateFormTests(TestCase):
             reverse('posts:post_detail',
                     kwargs={'post_id': f'{self.post_test.id}'})))
         self.assertEqual(response.context.get('post').image, 'posts/test4.gif')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, JOBS_EAGER=True)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='thumbs')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def upload(self, name):
+        buffer = BytesIO()
+        Image.new('RGB', (1600, 900), 'white').save(buffer, 'JPEG')
+        return SimpleUploadedFile(
+            name=name, content=buffer.getvalue(), content_type='image/jpeg'
+        )
+
+    def test_renditions_built_on_create(self):
+        """Миниатюры строятся при публикации и попадают в ленту."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'С картинкой', 'image': self.upload('big.jpg')},
+        )
+        post = Post.objects.get()
+        renditions = post.renditions
+        self.assertEqual(renditions['feed']['jpeg']['width'], 960)
+        self.assertEqual(renditions['feed']['jpeg']['height'], 339)
+        self.assertEqual(renditions['detail']['jpeg']['width'], 1280)
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, renditions['feed']['jpeg']['url'])
+        if 'WEBP' in thumbnails.FORMATS:
+            self.assertContains(response, renditions['feed']['webp']['url'])
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertContains(response, renditions['detail']['jpeg']['url'])
+
+    def test_stale_renditions_are_ignored(self):
+        """Без готовых миниатюр шаблон показывает оригинал."""
+        post = Post.objects.create(
+            text='Старая картинка',
+            author=self.user,
+            image=self.upload('old.jpg'),
+            thumbnails=json.dumps({'source': 'posts/other.jpg'}),
+        )
+        self.assertEqual(post.renditions, {})
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, post.image.url)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_MAX_SIDE=800)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def photo(self, size=(3000, 2000)):
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        buffer = BytesIO()
+        Image.new('RGB', size, 'green').save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile(
+            name='photo.jpeg',
+            content=buffer.getvalue(),
+            content_type='image/jpeg',
+        )
+
+    def test_large_image_downsampled_without_metadata(self):
+        form = PostForm(data={'text': 'Фото'}, files={'image': self.photo()})
+        self.assertTrue(form.is_valid(), form.errors)
+        image = form.cleaned_data['image']
+        self.assertEqual(image.name, 'photo.jpg')
+        stored = Image.open(image)
+        self.assertEqual(stored.size, (800, 533))
+        self.assertNotIn('exif', stored.info)
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=1000 * 1000)
+    def test_too_many_pixels_rejected(self):
+        form = PostForm(data={'text': 'Фото'}, files={'image': self.photo()})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(
+            form.errors.as_data()['image'][0].code, 'too_many_pixels'
+        )
+
+    @override_settings(POST_IMAGE_MAX_UPLOAD_SIZE=100)
+    def test_too_large_file_rejected(self):
+        form = PostForm(data={'text': 'Фото'}, files={'image': self.photo()})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(
+            form.errors.as_data()['image'][0].code, 'file_too_large'
+        )
@@ -0,0 +1,113 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import notifications
+from ..models import Follow, Notification, NotificationOutbox, Post, Profile
+
+User = get_user_model()
+
+
+@override_settings(JOBS_EAGER=True)
+class NotificationTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.followers = [
+            User.objects.create_user(username=f'follower{number}')
+            for number in range(3)
+        ]
+        for user in self.followers:
+            Follow.objects.create(user=user, author=self.author)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.follower_client = Client()
+        self.follower_client.force_login(self.followers[0])
+
+    def unread(self, user):
+        return Profile.objects.get(user=user).unread_notifications
+
+    def test_post_create_notifies_followers(self):
+        self.author_client.post(
+            reverse('posts:post_create'), data={'text': 'Новый пост'}
+        )
+        post = Post.objects.get(text='Новый пост')
+        for user in self.followers:
+            self.assertTrue(
+                Notification.objects.filter(user=user, post=post).exists()
+            )
+            self.assertEqual(self.unread(user), 1)
+        self.assertFalse(NotificationOutbox.objects.exists())
+        self.assertFalse(
+            Notification.objects.filter(user=self.author).exists()
+        )
+
+    def test_burst_delivered_in_one_pass(self):
+        with override_settings(JOBS_EAGER=False):
+            for number in range(3):
+                notifications.enqueue(Post.objects.create(
+                    text=f'Пост {number}', author=self.author
+                ))
+        notifications.deliver()
+        self.assertEqual(Notification.objects.count(), 9)
+        self.assertEqual(self.unread(self.followers[1]), 3)
+        # Повторная задача уже ничего не находит в очереди.
+        notifications.deliver()
+        self.assertEqual(self.unread(self.followers[1]), 3)
+
+    def test_retry_does_not_recount_delivered(self):
+        post = Post.objects.create(text='Пост', author=self.author)
+        notifications.notify_followers(self.author.pk, [post.pk])
+        Notification.objects.filter(user=self.followers[0]).delete()
+        Profile.objects.filter(user=self.followers[0]).update(
+            unread_notifications=0
+        )
+        notifications.notify_followers(self.author.pk, [post.pk])
+        for user in self.followers:
+            self.assertEqual(self.unread(user), 1)
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_unread_endpoint_and_mark_read(self):
+        self.author_client.post(
+            reverse('posts:post_create'), data={'text': 'Пост'}
+        )
+        url = reverse('posts:notifications_unread')
+        self.assertEqual(self.follower_client.get(url).json(), {'unread': 1})
+        response = self.follower_client.get(reverse('posts:notifications'))
+        self.assertContains(response, 'Пост')
+        self.follower_client.post(reverse('posts:notifications_read'))
+        self.assertEqual(self.follower_client.get(url).json(), {'unread': 0})
+        self.assertFalse(Notification.objects.filter(
+            user=self.followers[0], is_read=False
+        ).exists())
+
+    def test_reconcile_counts_unread(self):
+        self.author_client.post(
+            reverse('posts:post_create'), data={'text': 'Пост'}
+        )
+        Profile.objects.update(unread_notifications=7)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(self.unread(self.followers[0]), 1)
+        self.assertEqual(self.unread(self.author), 0)
+
+    @override_settings(JOBS_EAGER=False)
+    def test_post_create_queries_do_not_depend_on_followers(self):
+        def create_queries(text):
+            with CaptureQueriesContext(connection) as context:
+                self.author_client.post(
+                    reverse('posts:post_create'), data={'text': text}
+                )
+            return len(context)
+
+        # Первый пост ставит задачу рассылки, следующие застают её
+        # в очереди.
+        create_queries('Первый')
+        few = create_queries('Второй')
+        for number in range(3, 50):
+            user = User.objects.create_user(username=f'follower{number}')
+            Follow.objects.create(user=user, author=self.author)
+        self.assertEqual(create_queries('Третий'), few)
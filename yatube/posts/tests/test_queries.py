@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import counters
+from ..models import Comment, Follow, Group, Post
+from .utils import QueryCountMixin
+
+User = get_user_model()
+
+
+class FeedQueriesTest(QueryCountMixin, TestCase):
+    """Число запросов не зависит от количества постов на странице."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for i in range(10):
+            # У каждого поста своя группа, а комментарии пишут разные
+            # пользователи: N+1 сразу изменил бы число запросов.
+            group = Group.objects.create(title=f'Группа {i}', slug=f'g{i}')
+            post = Post.objects.create(
+                text=f'Пост {i}', author=cls.author, group=group
+            )
+            Post.objects.create(
+                text=f'Пост в группе {i}', author=cls.author, group=cls.group
+            )
+            commenter = User.objects.create_user(username=f'commenter{i}')
+            Comment.objects.create(post=post, author=commenter, text='...')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+        for comment in Comment.objects.all():
+            comment.pk = None
+            comment.post = cls.post
+            comment.save()
+
+    def setUp(self):
+        cache.clear()
+        counters.reconcile()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_guest_pages_queries(self):
+        # При холодном кэше id группы, автора или поста для ETag
+        # читается отдельным запросом, дальше берётся из кэша,
+        # как и первая страница комментариев поста.
+        pages = {
+            reverse('posts:index'): (1, 1),
+            reverse('posts:group_list', kwargs={'slug': 'group'}): (3, 2),
+            reverse('posts:profile', kwargs={'username': 'author'}): (3, 2),
+            reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}
+            ): (3, 1),
+        }
+        for url, (cold, warm) in pages.items():
+            with self.subTest(url=url):
+                self.assertViewQueries(cold, url)
+                self.assertViewQueries(warm, url)
+
+    def test_follow_index_queries(self):
+        # Сессия, пользователь, записи ленты, авторы-"звёзды" и посты.
+        self.assertViewQueries(
+            5, reverse('posts:follow_index'), self.authorized_client
+        )
@@ -0,0 +1,98 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from PIL import Image
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Job
+
+from .. import feed_cache
+from ..models import Group, Post, PostRevision
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def png(color):
+    buffer = BytesIO()
+    Image.new('RGB', (20, 20), color).save(buffer, 'PNG')
+    return SimpleUploadedFile('picture.png', buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostEditTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.client.post(reverse('posts:post_create'), data={
+            'text': 'Текст', 'group': self.group.pk, 'image': png('red'),
+        })
+        self.post = Post.objects.get()
+        self.url = reverse('posts:post_edit', args=[self.post.pk])
+
+    def edit(self, **data):
+        form = {'text': 'Текст', 'group': self.group.pk, **data}
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, data=form)
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "posts_post"')
+        ]
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=[self.post.pk])
+        )
+        return updates
+
+    def test_stranger_is_redirected(self):
+        stranger = Client()
+        stranger.force_login(User.objects.create_user(username='stranger'))
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        self.assertRedirects(stranger.get(self.url), detail)
+        stranger.post(self.url, data={'text': 'Чужой текст'})
+        self.assertEqual(Post.objects.get().text, 'Текст')
+
+    def test_noop_edit_writes_nothing(self):
+        scopes = feed_cache.post_scopes(self.author.pk, self.group.pk)
+        generations = feed_cache.generations(*scopes)
+        self.assertEqual(self.edit(), [])
+        self.assertEqual(feed_cache.generations(*scopes), generations)
+        self.assertFalse(PostRevision.objects.exists())
+        self.assertEqual(Post.objects.get().version, 1)
+
+    def test_edit_updates_changed_fields_and_records_revision(self):
+        updates = self.edit(text='Новый текст')
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"image"', updates[0])
+        post = Post.objects.get()
+        self.assertEqual((post.text, post.version), ('Новый текст', 2))
+        revision = post.revisions.get()
+        self.assertEqual(
+            (revision.version, revision.text, revision.group, revision.image),
+            (1, 'Текст', self.group, self.post.image.name),
+        )
+
+    def test_same_image_is_not_reprocessed(self):
+        jobs = Job.objects.count()
+        self.assertEqual(self.edit(image=png('red')), [])
+        self.assertEqual(Post.objects.get().image, self.post.image.name)
+        self.assertEqual(Job.objects.count(), jobs)
+        self.edit(image=png('blue'))
+        post = Post.objects.get()
+        self.assertNotEqual(post.image, self.post.image.name)
+        self.assertNotEqual(post.image_hash, self.post.image_hash)
+        self.assertEqual(post.version, 2)
@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.stemmer import stem
+
+from .. import search
+from ..models import Post, SearchTerm
+
+User = get_user_model()
+
+
+class StemmerTest(TestCase):
+    def test_word_forms_share_stem(self):
+        self.assertEqual(stem('постов'), stem('посты'))
+        self.assertEqual(stem('Комментарии'), 'комментар')
+        self.assertEqual(stem('красивейшая'), 'красив')
+        self.assertEqual(stem('ёлки'), stem('елка'))
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='author')
+        self.client = Client()
+
+    def test_finds_word_forms_ranked(self):
+        once = Post.objects.create(
+            text='Сегодня написал про котов', author=self.user
+        )
+        twice = Post.objects.create(
+            text='Кот и ещё раз кот', author=self.user
+        )
+        Post.objects.create(text='Про собак', author=self.user)
+        posts, next_cursor = search.search('коты')
+        self.assertEqual(posts, [twice, once])
+        self.assertIsNone(next_cursor)
+        self.assertIn('<mark>котов</mark>', posts[1].highlight)
+
+    def test_cursor_pages_do_not_overlap(self):
+        for i in range(15):
+            Post.objects.create(text=f'Пост номер {i}', author=self.user)
+        first, cursor = search.search('посты', limit=10)
+        second, last = search.search('посты', after=cursor, limit=10)
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len(second), 5)
+        self.assertIsNone(last)
+        self.assertFalse(set(first) & set(second))
+
+    def test_index_follows_edit_and_delete(self):
+        post = Post.objects.create(text='Старый текст', author=self.user)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertEqual(search.search('старый')[0], [])
+        self.assertEqual(search.search('новый')[0], [post])
+        post.delete()
+        self.assertEqual(search.search('новый')[0], [])
+
+    def test_highlight_escapes_html(self):
+        highlighted = search.highlight('<b>кот</b>', search.parse('кот'))
+        self.assertEqual(highlighted, '&lt;b&gt;<mark>кот</mark>&lt;/b&gt;')
+
+    def test_search_page(self):
+        post = Post.objects.create(text='Про котов', author=self.user)
+        response = self.client.get(reverse('posts:search'), {'q': 'кот'})
+        self.assertEqual(response.context['posts'], [post])
+        self.assertContains(response, '<mark>котов</mark>')
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        self.client.force_login(admin)
+        post = Post.objects.create(text='Про котов', author=self.user)
+        Post.objects.create(text='Про собак', author=self.user)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кошки кот'}
+        )
+        self.assertEqual(list(response.context['cl'].result_list), [])
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'коты'}
+        )
+        self.assertEqual(list(response.context['cl'].result_list), [post])
+
+
+@override_settings(POSTS_SEARCH_BACKEND='index')
+class InvertedIndexSearchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+
+    def test_finds_all_terms_ranked(self):
+        once = Post.objects.create(text='Кот спит', author=self.user)
+        twice = Post.objects.create(text='Кот и кот спит', author=self.user)
+        Post.objects.create(text='Кот ест', author=self.user)
+        self.assertEqual(
+            SearchTerm.objects.filter(post=twice, term='кот').get().count, 2
+        )
+        posts, _ = search.search('коты спит')
+        self.assertEqual(posts, [twice, once])
+        queryset = search.filter_queryset(Post.objects.all(), 'спит')
+        self.assertEqual(set(queryset), {once, twice})
+
+    def test_cursor(self):
+        for i in range(12):
+            Post.objects.create(text=f'Пост {i}', author=self.user)
+        first, cursor = search.search('постов', limit=10)
+        second, _ = search.search('постов', after=cursor, limit=10)
+        self.assertEqual(len(first) + len(second), 12)
+        self.assertFalse(set(first) & set(second))
+
+    def test_ranking_does_not_count_posts(self):
+        Post.objects.create(text='Кот спит', author=self.user)
+        search.search('кот')
+        with CaptureQueriesContext(connection) as queries:
+            posts, _ = search.search('кот')
+        self.assertEqual(len(posts), 1)
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(*)', query['sql'])
+
+    def test_rebuild_inserts_large_batches(self):
+        for number in range(300):
+            Post.objects.create(
+                text=f'Пост {number} слово{number}', author=self.user
+            )
+        indexed = SearchTerm.objects.count()
+        SearchTerm.objects.all().delete()
+        self.assertEqual(search.rebuild(), 300)
+        self.assertEqual(SearchTerm.objects.count(), indexed)
@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import run_on_commit
+
+from .. import threads
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class CommentThreadsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader')
+        self.post = Post.objects.create(text='Пост', author=self.user)
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('posts:comments', args=[self.post.pk])
+
+    def comment(self, text, parent=None):
+        return threads.add(self.post, self.user, text, parent)
+
+    def test_cursor_pages_in_both_orders(self):
+        total = threads.COMMENTS_PER_PAGE + 5
+        for number in range(total):
+            self.comment(f'Комментарий {number}')
+        newest = threads.page(self.post.pk)
+        self.assertEqual(newest.comments[0].text, f'Комментарий {total - 1}')
+        rest = threads.page(self.post.pk, after=newest.next_cursor)
+        self.assertEqual(len(rest.comments), 5)
+        self.assertIsNone(rest.next_cursor)
+        oldest = threads.page(self.post.pk, 'oldest')
+        self.assertEqual(oldest.comments[0].text, 'Комментарий 0')
+        self.assertFalse(
+            {c.pk for c in newest.comments} & {c.pk for c in rest.comments}
+        )
+
+    def test_replies_attach_to_root(self):
+        root = self.comment('Корень')
+        first = self.comment('Ответ', root)
+        nested = self.comment('Ответ на ответ', first)
+        self.assertEqual(nested.parent_id, root.pk)
+        self.assertEqual(nested.path, threads.make_path(root.pk, nested.pk))
+        root.refresh_from_db()
+        self.assertEqual(root.replies_count, 2)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 3)
+
+    def test_reply_preview_and_load_more(self):
+        root = self.comment('Корень')
+        replies = [
+            self.comment(f'Ответ {number}', root) for number in range(5)
+        ]
+        with self.assertNumQueries(2):
+            shown = threads.page(self.post.pk).comments[0]
+        self.assertEqual(
+            shown.preview_replies, replies[:threads.REPLIES_PREVIEW]
+        )
+        response = self.client.get(self.url, {
+            'parent': root.pk, 'after': shown.replies_cursor,
+            'format': 'json',
+        })
+        self.assertEqual(
+            [comment['text'] for comment in response.json()['comments']],
+            ['Ответ 3', 'Ответ 4'],
+        )
+
+    def test_first_page_cached_until_new_comment(self):
+        self.comment('Первый')
+        threads.first_page(self.post.pk)
+        with self.assertNumQueries(0):
+            threads.first_page(self.post.pk)
+        with run_on_commit():
+            self.client.post(
+                reverse('posts:add_comment', args=[self.post.pk]),
+                {'text': 'Второй'},
+            )
+        texts = [c.text for c in threads.first_page(self.post.pk).comments]
+        self.assertEqual(texts, ['Второй', 'Первый'])
+
+    def test_reply_through_form(self):
+        root = self.comment('Корень')
+        self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Ответ', 'parent': root.pk},
+        )
+        self.assertEqual(Comment.objects.get(text='Ответ').parent, root)
+
+    def test_fragment_has_load_more(self):
+        for number in range(threads.COMMENTS_PER_PAGE + 1):
+            self.comment(f'Комментарий {number}')
+        response = self.client.get(self.url)
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertContains(response, 'Показать ещё')
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:comments', args=[self.post.pk + 1])
+            ).status_code,
+            404,
+        )
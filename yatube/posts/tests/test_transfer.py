@@ -0,0 +1,148 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from .. import search, transfer
+from ..models import Comment, Follow, Group, Post, Profile, TimelineEntry
+
+User = get_user_model()
+CREATED = datetime(2020, 5, 1, 12, 30, tzinfo=timezone.utc)
+
+
+class TransferTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.posts = [
+            Post.objects.create(
+                author=self.author, group=self.group,
+                text='Первый пост,\nс "кавычками"',
+            ),
+            Post.objects.create(author=self.author, text='Второй пост'),
+        ]
+        Post.objects.filter(pk=self.posts[0].pk).update(created=CREATED)
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def clear(self):
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+    def run_command(self, name, *args):
+        out = StringIO()
+        call_command(name, self.directory, *args, stdout=out)
+        return out.getvalue()
+
+    def test_round_trip(self):
+        for file_format in transfer.FORMATS:
+            with self.subTest(format=file_format):
+                self.run_command('export_posts', '--format', file_format)
+                self.clear()
+                output = self.run_command(
+                    'import_posts', '--format', file_format
+                )
+                self.assertIn('posts: 2 строк', output)
+                post = Post.objects.get(pk=self.posts[0].pk)
+                self.assertEqual(post.text, self.posts[0].text)
+                self.assertEqual(post.created, CREATED)
+                self.assertEqual(post.author.username, 'author')
+                self.assertEqual(post.group.slug, 'group')
+                self.assertIsNone(
+                    Post.objects.get(pk=self.posts[1].pk).group
+                )
+                self.assertEqual(post.comments.get().author.username, 'reader')
+                self.assertEqual(post.comments_count, 1)
+                reader = User.objects.get(username='reader')
+                self.assertFalse(reader.has_usable_password())
+                self.assertEqual(
+                    Profile.objects.get(user=reader).following_count, 1
+                )
+                self.assertEqual(
+                    TimelineEntry.objects.filter(user=reader).count(), 2
+                )
+                self.assertEqual(search.search('первый')[0], [post])
+
+    def test_import_skips_rows_with_unknown_references(self):
+        self.run_command('export_posts')
+        self.clear()
+        User.objects.create_user(username='reader')
+        output = self.run_command(
+            'import_posts', '--only', 'posts', 'comments'
+        )
+        self.assertIn('posts: 0 строк, пропущено 2', output)
+        self.assertIn('comments: 0 строк, пропущено 1', output)
+
+    def test_reimport_skips_loaded_rows(self):
+        self.run_command('export_posts')
+        output = self.run_command('import_posts')
+        self.assertIn('posts: 0 строк, пропущено 2', output)
+        self.assertIn('comments: 0 строк, пропущено 1', output)
+        self.assertIn('follows: 0 строк, пропущено 1', output)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_import_refuses_foreign_post_with_same_id(self):
+        self.run_command('export_posts')
+        self.clear()
+        stranger = User.objects.create_user(username='stranger')
+        Post.objects.create(
+            pk=self.posts[0].pk, author=stranger, text='Чужой пост'
+        )
+        with self.assertRaises(CommandError):
+            self.run_command('import_posts')
+        self.assertFalse(Comment.objects.exists())
+
+    def test_import_resumes_from_checkpoint(self):
+        self.run_command('export_posts')
+        self.clear()
+        transfer.write_checkpoint(
+            os.path.join(self.directory, transfer.IMPORT_CHECKPOINT),
+            {'posts': 1},
+        )
+        self.run_command('import_posts', '--resume')
+        self.assertEqual(
+            list(Post.objects.values_list('pk', flat=True)),
+            [self.posts[1].pk],
+        )
+
+    def test_export_resume_appends_new_rows(self):
+        self.run_command('export_posts', '--only', 'posts')
+        Post.objects.create(author=self.author, text='Третий пост')
+        self.run_command('export_posts', '--only', 'posts', '--resume')
+        rows = list(transfer.read_rows(
+            transfer.data_path(self.directory, 'posts', 'ndjson'), 'ndjson'
+        ))
+        self.assertEqual(
+            [row['text'] for row in rows],
+            ['Первый пост,\nс "кавычками"', 'Второй пост', 'Третий пост'],
+        )
+
+
+class DeferredIndexesTest(TransactionTestCase):
+    def test_indexes_are_restored(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        author = User.objects.create_user(username='author')
+        Post.objects.create(author=author, text='Пост')
+        transfer.export(directory)
+        Post.objects.all().delete()
+        transfer.load(directory, defer_indexes=True)
+        self.assertEqual(Post.objects.count(), 1)
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, Post._meta.db_table
+            )
+        self.assertIn('post_created_idx', constraints)
@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django import forms
 from ..models import Group, Post
@@ -241,3 +243,55 @@ class PaginatorViewsTest(TestCase):
             ) + '?page=2'
         )
         self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_cursor_pages_follow_each_other(self):
+        # Переходим по курсору на вторую страницу и обратно.
+        url = reverse('posts:index')
+        response = self.authorized_client.get(url)
+        first_page = response.context['page_obj']
+        self.assertTrue(first_page.has_next())
+        self.assertFalse(first_page.has_previous())
+        response = self.authorized_client.get(
+            url, {'after': first_page.paginator.next_cursor}
+        )
+        second_page = response.context['page_obj']
+        self.assertEqual(len(second_page), 3)
+        self.assertFalse(second_page.has_next())
+        self.assertTrue(second_page.has_previous())
+        self.assertFalse(
+            set(first_page.object_list) & set(second_page.object_list)
+        )
+        response = self.authorized_client.get(
+            url, {'before': second_page.paginator.previous_cursor}
+        )
+        self.assertEqual(
+            list(response.context['page_obj']), list(first_page)
+        )
+
+    def test_cursor_page_without_count_and_offset(self):
+        # Страница по курсору не считает посты и не использует OFFSET.
+        group_url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        response = self.client.get(group_url)
+        cursor = response.context['page_obj'].paginator.next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(group_url, {'after': cursor})
+        self.assertEqual(len(response.context['page_obj']), 3)
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+            self.assertNotIn('OFFSET', query['sql'])
+
+    def test_broken_cursor_returns_first_page(self):
+        response = self.authorized_client.get(
+            reverse('posts:index'), {'after': 'broken'}
+        )
+        self.assertEqual(len(response.context['page_obj']), 10)
+
+    def test_null_cursor_returns_first_page(self):
+        # Курсор из JSON-значений null: [null,null].
+        for param in ('after', 'before'):
+            with self.subTest(param=param):
+                response = self.client.get(
+                    reverse('posts:index'), {param: 'W251bGwsbnVsbF0'}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.context['page_obj']), 10)
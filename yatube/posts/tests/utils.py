@@ -0,0 +1,19 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountMixin:
+    """Закрепляет число SQL-запросов, которые делает страница."""
+
+    def assertViewQueries(self, num, url, client=None):
+        client = client or self.client
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        queries = '\n'.join(
+            query['sql'] for query in context.captured_queries
+        )
+        self.assertEqual(
+            len(context), num,
+            f'{url}: {len(context)} запросов вместо {num}\n{queries}'
+        )
+        return response
@@ -0,0 +1,144 @@
+"""Комментарии поста: страницы по курсору и ответы в одну ступень.
+
+Корневые комментарии листаются CursorPaginator по индексу
+comment_thread_idx (post, parent, created, id) в обе стороны:
+сначала новые или сначала старые. Ответ всегда прикрепляется к корню
+ветки, а его path - id корня и ответа, дополненные нулями, поэтому
+ответы читаются по индексу (parent, path) в порядке написания. Под
+каждым корнем показываются первые REPLIES_PREVIEW ответов, остальные
+догружаются той же ручкой, что и следующие страницы.
+
+Первая страница каждой сортировки кэшируется вместе с поколением
+области поста feed_cache: новый комментарий увеличивает поколение
+сигналом, и следующий запрос читает страницу заново.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+
+from core.db import replication
+from core.paginator import CursorPaginator
+
+from . import counters, feed_cache
+from .models import Comment
+
+COMMENTS_PER_PAGE = 20
+REPLIES_PREVIEW = 3
+ORDERINGS = {
+    'newest': ('-created', '-pk'),
+    'oldest': ('created', 'pk'),
+}
+ORDER_TITLES = {
+    'newest': 'Сначала новые',
+    'oldest': 'Сначала старые',
+}
+DEFAULT_ORDER = 'newest'
+REPLY_ORDERING = ('path',)
+KEY = 'comments:first:{}:{}:{}:{}'
+
+CommentPage = namedtuple('CommentPage', 'comments next_cursor')
+
+
+def make_path(*ids):
+    return '.'.join(f'{pk:010d}' for pk in ids)
+
+
+def get_order(value):
+    return value if value in ORDERINGS else DEFAULT_ORDER
+
+
+def add(post, author, text, parent=None):
+    """Создаёт комментарий; ответ на ответ уходит к корню ветки."""
+    root_id = None
+    if parent is not None:
+        root_id = parent.parent_id or parent.pk
+    with transaction.atomic():
+        comment = Comment.objects.create(
+            post=post, author=author, text=text, parent_id=root_id
+        )
+        ids = (root_id, comment.pk) if root_id else (comment.pk,)
+        comment.path = make_path(*ids)
+        comment.save(update_fields=['path'])
+        counters.comment_added(post.pk)
+        if root_id:
+            Comment.objects.filter(pk=root_id).update(
+                replies_count=F('replies_count') + 1
+            )
+    return comment
+
+
+def reply_paginator(queryset):
+    return CursorPaginator(queryset, COMMENTS_PER_PAGE, REPLY_ORDERING)
+
+
+def attach_replies(comments):
+    """Первые ответы корней одним запросом; курсор на остальные."""
+    by_pk = {}
+    for comment in comments:
+        comment.preview_replies = []
+        comment.replies_cursor = None
+        if comment.replies_count:
+            by_pk[comment.pk] = comment
+    if not by_pk:
+        return
+    first = Comment.objects.filter(
+        parent_id=OuterRef('parent_id')
+    ).order_by(*REPLY_ORDERING).values('pk')[:REPLIES_PREVIEW]
+    replies = Comment.objects.filter(
+        parent_id__in=by_pk, pk__in=Subquery(first)
+    ).select_related('author').order_by(*REPLY_ORDERING)
+    for reply in replies:
+        by_pk[reply.parent_id].preview_replies.append(reply)
+    paginator = reply_paginator(replies)
+    for comment in by_pk.values():
+        shown = comment.preview_replies
+        if shown and comment.replies_count > len(shown):
+            comment.replies_cursor = paginator.encode_cursor(shown[-1])
+
+
+def page(post_id, order=DEFAULT_ORDER, after=None, parent_id=None):
+    """Страница корней поста или ответов ветки parent_id после курсора."""
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    )
+    if parent_id is None:
+        paginator = CursorPaginator(
+            comments.filter(parent=None), COMMENTS_PER_PAGE, ORDERINGS[order]
+        )
+    else:
+        paginator = reply_paginator(comments.filter(parent_id=parent_id))
+    comment_page = paginator.get_cursor_page(after=after)
+    result = list(comment_page)
+    if parent_id is None:
+        attach_replies(result)
+    next_cursor = paginator.next_cursor if comment_page.has_next() else None
+    return CommentPage(result, next_cursor)
+
+
+def first_page(post_id, order=DEFAULT_ORDER):
+    """Первая страница корней из кэша."""
+    generation, = feed_cache.generations(feed_cache.post_scope(post_id))
+    key = KEY.format(post_id, order, generation, replication.read_epoch())
+    comment_page = cache.get(key)
+    if comment_page is None:
+        comment_page = page(post_id, order)
+        cache.set(key, comment_page, settings.FEED_CACHE_TIMEOUT)
+    return comment_page
+
+
+def as_dict(comment):
+    data = {
+        'id': comment.pk,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+        'parent': comment.parent_id,
+        'replies_count': comment.replies_count,
+    }
+    if hasattr(comment, 'preview_replies'):
+        data['replies'] = [as_dict(reply) for reply in comment.preview_replies]
+        data['replies_cursor'] = comment.replies_cursor
+    return data
@@ -0,0 +1,68 @@
+"""Готовые миниатюры картинок постов.
+
+Миниатюры всех размеров из POST_IMAGE_RENDITIONS строятся один раз
+после загрузки картинки фоновой задачей core.jobs, их адреса и размеры
+записываются в Post.thumbnails. Шаблоны берут готовые адреса и не
+обращаются к sorl-thumbnail во время запроса.
+"""
+import json
+import time
+
+from django.conf import settings
+from PIL import features
+from sorl.thumbnail import get_thumbnail
+
+from core import jobs, metrics
+
+from . import feed_cache
+from .models import Post
+
+# Форматы каждой миниатюры: основной и WebP для тега <picture>,
+# если Pillow собран с libwebp.
+FORMATS = ('JPEG', 'WEBP') if features.check('webp') else ('JPEG',)
+
+
+def render(image):
+    """Строит все миниатюры файла и возвращает их описание."""
+    renditions = {'source': image.name}
+    for name, (geometry, options) in settings.POST_IMAGE_RENDITIONS.items():
+        renditions[name] = {}
+        for image_format in FORMATS:
+            started = time.perf_counter()
+            thumbnail = get_thumbnail(
+                image, geometry, format=image_format, **options
+            )
+            metrics.thumbnail_seconds.observe(
+                name, image_format.lower(),
+                value=time.perf_counter() - started,
+            )
+            renditions[name][image_format.lower()] = {
+                'url': thumbnail.url,
+                'width': thumbnail.width,
+                'height': thumbnail.height,
+            }
+    return renditions
+
+
+def generate(post_id):
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author_id', 'group_id'
+    ).first()
+    if post is None or not post.image:
+        return
+    renditions = render(post.image)
+    # Пока строились миниатюры, картинку могли заменить.
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnails=json.dumps(renditions)
+    )
+    if updated:
+        feed_cache.bump(
+            feed_cache.post_scope(post_id),
+            *feed_cache.post_scopes(post.author_id, post.group_id),
+        )
+
+
+def schedule(post):
+    """Поставить построение миниатюр поста в очередь."""
+    if post.image:
+        jobs.enqueue(generate, post.pk, key=f'thumbnails:{post.pk}')
@@ -0,0 +1,206 @@
+"""Лента подписок: рассылка постов подписчикам при записи.
+
+Новый пост сразу раскладывается в TimelineEntry каждого подписчика
+вместе с датой публикации, и страница ленты читается одним диапазоном
+индекса (user, -created, -post). Авторы, у которых подписчиков больше
+TIMELINE_FANOUT_LIMIT, не рассылаются: их посты в том же диапазоне
+ключа подмешиваются при чтении. Когда у автора снова становится не
+больше TIMELINE_FANOUT_LIMIT подписчиков, его посты дописываются
+в ленты подписчиков фоновой задачей.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.db.models import (
+    OuterRef, Prefetch, Q, Subquery, prefetch_related_objects,
+)
+
+from core import jobs
+from core.paginator import CursorPaginator
+
+from .models import Follow, Post, TimelineEntry
+
+BATCH_SIZE = 500
+ORDERING = ('-created', '-post_id')
+
+
+def _extra_follower(author_id):
+    """Подписчик сверх TIMELINE_FANOUT_LIMIT: он есть только у "звёзд".
+
+    По нему решают и рассылка при записи, и чтение ленты, поэтому
+    автор всегда попадает в ленту одним из двух способов. Счётчик
+    в профиле для этого не годится: его обновляют только представления.
+    """
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    return Follow.objects.filter(
+        author_id=author_id
+    ).order_by().values('pk')[limit:limit + 1]
+
+
+def is_heavy(author_id):
+    """Слишком много подписчиков для рассылки при записи."""
+    return _extra_follower(author_id).exists()
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if is_heavy(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post=post, created=post.created)
+            for user_id in followers
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика уже опубликованные посты автора."""
+    if is_heavy(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'created'
+    ).order_by()
+    batch = []
+    for post_id, created in posts.iterator(chunk_size=BATCH_SIZE):
+        batch.append(TimelineEntry(
+            user_id=user_id, post_id=post_id, created=created
+        ))
+        if len(batch) == BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def backfill_followers(author_id):
+    """Дописывает посты автора в ленты всех его подписчиков."""
+    followers = Follow.objects.filter(author_id=author_id).values_list(
+        'user_id', flat=True
+    )
+    for user_id in followers.iterator():
+        backfill(user_id, author_id)
+
+
+def follower_removed(author_id):
+    """Дописывает ленты, если автор опустился до порога рассылки.
+
+    Посты, написанные выше порога, не были разосланы и после отписки
+    больше не подмешиваются при чтении.
+    """
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    followers = Follow.objects.filter(author_id=author_id)[:limit + 1]
+    if limit and followers.count() == limit:
+        jobs.enqueue(
+            backfill_followers, author_id, key=f'timeline:{author_id}'
+        )
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты подписчика посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def heavy_authors(user):
+    """Авторы ленты пользователя, чьи посты читаются при запросе."""
+    return Follow.objects.filter(user=user).annotate(
+        extra_follower=Subquery(_extra_follower(OuterRef('author_id')))
+    ).filter(extra_follower__isnull=False).values_list(
+        'author_id', flat=True
+    )
+
+
+def feed_for(user):
+    """Посты ленты подписок пользователя одним ленивым запросом.
+
+    Нужен для нумерованных страниц `?page=N`; курсорные страницы
+    читает TimelinePaginator.
+    """
+    return Post.objects.filter(
+        Q(pk__in=TimelineEntry.objects.filter(user=user).values('post_id'))
+        | Q(author_id__in=heavy_authors(user))
+    )
+
+
+class TimelinePaginator(CursorPaginator):
+    """Курсорные страницы ленты подписок по индексу TimelineEntry.
+
+    Ключ страницы - (created, post) записи ленты. Посты авторов-"звёзд"
+    читаются в том же диапазоне ключа по индексу постов автора
+    и сливаются с записями; страница состоит из постов object_list.
+    """
+
+    def __init__(self, object_list, per_page, user):
+        super().__init__(
+            TimelineEntry.objects.filter(user=user).order_by(*ORDERING),
+            per_page, ORDERING,
+        )
+        self.posts = object_list
+        self.user = user
+
+    def _fetch(self, ordering, values):
+        entries = super()._fetch(ordering, values)
+        authors = list(heavy_authors(self.user))
+        if not authors:
+            return entries
+        post_ordering = tuple(
+            name.replace('post_id', 'pk') for name in ordering
+        )
+        posts = self.posts.filter(author_id__in=authors)
+        if values is not None:
+            posts = posts.filter(self._seek(post_ordering, values))
+        by_post = {
+            post.pk: TimelineEntry(
+                user=self.user, post=post, created=post.created
+            )
+            for post in posts.order_by(*post_ordering)[:self.per_page + 1]
+        }
+        # Посты, разосланные до того, как автор превысил порог, уже
+        # есть среди записей ленты.
+        for entry in entries:
+            by_post.setdefault(entry.post_id, entry)
+        rows = sorted(
+            by_post.values(),
+            key=lambda entry: (entry.created, entry.post_id),
+            reverse=ordering[0].startswith('-'),
+        )
+        return rows[:self.per_page + 1]
+
+    def get_cursor_page(self, after=None, before=None):
+        page = super().get_cursor_page(after=after, before=before)
+        prefetch_related_objects(
+            [
+                entry for entry in page.object_list
+                if not TimelineEntry.post.is_cached(entry)
+            ],
+            Prefetch('post', queryset=self.posts),
+        )
+        # Пост мог быть удалён между двумя запросами.
+        page.object_list = [
+            entry.post for entry in page.object_list
+            if entry.post is not None
+        ]
+        return page
+
+
+def paginator(user):
+    """Класс страниц ленты для core.paginator.paginate."""
+    return partial(TimelinePaginator, user=user)
+
+
+def rebuild(user_id=None):
+    """Пересобирает ленты всех подписчиков или одного пользователя."""
+    follows = Follow.objects.all()
+    if user_id is not None:
+        follows = follows.filter(user_id=user_id)
+        TimelineEntry.objects.filter(user_id=user_id).delete()
+    else:
+        TimelineEntry.objects.all().delete()
+    for user_id, author_id in follows.values_list('user_id', 'author_id'):
+        backfill(user_id, author_id)
@@ -0,0 +1,486 @@
+"""Выгрузка и загрузка пользователей, групп, постов, комментариев
+и подписок в NDJSON или CSV.
+
+    python manage.py export_posts /tmp/dump --format csv --images
+    python manage.py import_posts /tmp/dump --resume
+
+Каждый вид данных лежит в своём файле каталога (`posts.ndjson`,
+`comments.csv`, ...), картинки постов - в подкаталоге media. Ссылки
+на пользователей и группы записываются именем и slug, поэтому дамп
+можно загрузить в базу, где у них другие id. Посты и комментарии
+сохраняют свои id: строка, которая уже есть в базе, пропускается,
+а чужая строка с тем же id останавливает загрузку ошибкой, чтобы
+комментарии не попали под посторонний пост.
+
+Память не растёт с размером данных: выгрузка читает таблицы через
+.iterator() по возрастанию pk, загрузка вставляет строки пачками
+bulk_create и переводит имена в id запросом на пачку. После каждой
+пачки в checkpoint записывается, докуда дошли, и с --resume прерванная
+команда продолжает с этого места. Сигналы при bulk_create не
+срабатывают: счётчики, ленты подписок и поисковый индекс
+пересобираются один раз после загрузки.
+"""
+import csv
+import io
+import json
+import os
+import shutil
+import time
+from collections import namedtuple
+from contextlib import ExitStack, contextmanager
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from . import counters, feed_cache, group_stats, search, threads, timeline
+from .models import Comment, Follow, Group, Post, User
+
+FORMATS = ('ndjson', 'csv')
+# Пачка загрузки переводит имена в id одним запросом IN, а SQLite
+# разрешает не больше 999 параметров; в подписке имён два.
+BATCH_SIZE = 400
+MEDIA_DIR = 'media'
+EXPORT_CHECKPOINT = '.export-checkpoint.json'
+IMPORT_CHECKPOINT = '.import-checkpoint.json'
+# Столько областей feed_cache копится, прежде чем их сбросить: одна
+# область затрагивается многими пачками.
+BUMP_LIMIT = 10000
+
+# columns - поля файла, lookups - откуда они берутся при выгрузке.
+Kind = namedtuple('Kind', 'model columns lookups')
+KINDS = {
+    'users': Kind(
+        User,
+        ('username', 'first_name', 'last_name', 'email', 'date_joined'),
+        ('username', 'first_name', 'last_name', 'email', 'date_joined'),
+    ),
+    'groups': Kind(
+        Group,
+        ('slug', 'title', 'description'),
+        ('slug', 'title', 'description'),
+    ),
+    'posts': Kind(
+        Post,
+        ('id', 'author', 'group', 'text', 'created', 'image'),
+        ('id', 'author__username', 'group__slug', 'text', 'created', 'image'),
+    ),
+    'comments': Kind(
+        Comment,
+        ('id', 'post', 'author', 'text', 'created', 'parent', 'path'),
+        (
+            'id', 'post_id', 'author__username', 'text', 'created',
+            'parent_id', 'path',
+        ),
+    ),
+    'follows': Kind(
+        Follow,
+        ('user', 'author'),
+        ('user__username', 'author__username'),
+    ),
+}
+
+
+Stats = namedtuple('Stats', 'rows skipped seconds')
+
+
+def rate(stats):
+    """Строк в секунду."""
+    return stats.rows / stats.seconds if stats.seconds else 0
+
+
+def read_checkpoint(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def write_checkpoint(path, checkpoint):
+    # Через временный файл: прерывание не оставит половину JSON.
+    with open(path + '.tmp', 'w') as file:
+        json.dump(checkpoint, file)
+    os.replace(path + '.tmp', path)
+
+
+def batches(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _plain(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def encode(rows, columns, file_format):
+    """Байты пачки строк в формате file_format."""
+    if file_format == 'csv':
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            ['' if value is None else _plain(value) for value in row]
+            for row in rows
+        )
+        return buffer.getvalue().encode()
+    return ''.join(
+        json.dumps(
+            dict(zip(columns, map(_plain, row))), ensure_ascii=False
+        ) + '\n'
+        for row in rows
+    ).encode()
+
+
+def read_rows(path, file_format):
+    """Строки файла как словари; пустые поля CSV становятся None."""
+    with open(path, newline='', encoding='utf-8') as file:
+        if file_format == 'csv':
+            for row in csv.DictReader(file):
+                yield {
+                    name: value if value != '' else None
+                    for name, value in row.items()
+                }
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def data_path(directory, name, file_format):
+    return os.path.join(directory, f'{name}.{file_format}')
+
+
+def copy_images(directory, names):
+    """Кладёт картинки из хранилища в каталог media дампа."""
+    for name in names:
+        target = os.path.join(directory, MEDIA_DIR, name)
+        if not name or os.path.exists(target) or (
+            not default_storage.exists(name)
+        ):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with default_storage.open(name) as source, open(target, 'wb') as file:
+            shutil.copyfileobj(source, file)
+
+
+def export_kind(directory, name, file_format, checkpoint, images=False):
+    """Дописывает в файл вида name строки с pk больше сохранённого."""
+    kind = KINDS[name]
+    state = checkpoint.setdefault(name, {'pk': 0, 'offset': 0})
+    path = data_path(directory, name, file_format)
+    rows = kind.model.objects.filter(pk__gt=state['pk']).order_by(
+        'pk'
+    ).values_list(*kind.lookups, 'pk')
+    checkpoint_path = os.path.join(directory, EXPORT_CHECKPOINT)
+    started = time.monotonic()
+    total = 0
+    with open(path, 'ab') as file:
+        # Отрезаем то, что было записано после последнего checkpoint.
+        file.truncate(state['offset'])
+        if state['offset'] == 0 and file_format == 'csv':
+            file.write(encode([kind.columns], kind.columns, 'csv'))
+        for batch in batches(rows.iterator(chunk_size=BATCH_SIZE)):
+            values = [row[:-1] for row in batch]
+            if images and name == 'posts':
+                copy_images(directory, [row[-1] for row in values])
+            file.write(encode(values, kind.columns, file_format))
+            file.flush()
+            total += len(batch)
+            state.update(pk=batch[-1][-1], offset=file.tell())
+            write_checkpoint(checkpoint_path, checkpoint)
+    return Stats(total, 0, time.monotonic() - started)
+
+
+def export(directory, file_format='ndjson', kinds=None, images=False,
+           resume=False):
+    """Выгружает данные в каталог; возвращает Stats по видам."""
+    os.makedirs(directory, exist_ok=True)
+    checkpoint_path = os.path.join(directory, EXPORT_CHECKPOINT)
+    checkpoint = read_checkpoint(checkpoint_path) if resume else {}
+    if checkpoint.get('format', file_format) != file_format:
+        raise ValueError(
+            f'Выгрузка начата в формате {checkpoint["format"]}'
+        )
+    checkpoint['format'] = file_format
+    return {
+        name: export_kind(directory, name, file_format, checkpoint, images)
+        for name in kinds or KINDS
+    }
+
+
+def _ids(model, field, values):
+    """{значение field: pk} для строк model из values."""
+    values = {value for value in values if value is not None}
+    return dict(
+        model.objects.filter(**{f'{field}__in': values}).values_list(
+            field, 'pk'
+        )
+    )
+
+
+def _datetime(value):
+    return parse_datetime(value) if value else None
+
+
+def _loaded(model, rows, *fields):
+    """{id: значения fields} строк model, чьи id есть в rows."""
+    ids = {int(row['id']) for row in rows}
+    return {
+        pk: tuple(values) for pk, *values in model.objects.filter(
+            pk__in=ids
+        ).values_list('pk', *fields)
+    }
+
+
+def _check_loaded(model, pk, loaded, expected):
+    """Строка с этим id уже загружена; чужая строка - ошибка."""
+    if loaded != expected:
+        raise ValueError(
+            f'{model._meta.model_name} с id {pk} уже есть в базе и не '
+            'совпадает с выгрузкой. Посты и комментарии сохраняют свои '
+            'id: загружайте их в базу, где эти id свободны.'
+        )
+
+
+def build_users(rows, images_dir):
+    existing = _ids(User, 'username', (row['username'] for row in rows))
+    # Пароли не переносятся: пользователь задаст новый через сброс.
+    return [
+        User(
+            username=row['username'],
+            first_name=row['first_name'] or '',
+            last_name=row['last_name'] or '',
+            email=row['email'] or '',
+            date_joined=_datetime(row['date_joined']),
+            password=make_password(None),
+        )
+        for row in rows
+        if row['username'] not in existing
+    ]
+
+
+def build_groups(rows, images_dir):
+    existing = _ids(Group, 'slug', (row['slug'] for row in rows))
+    return [
+        Group(
+            slug=row['slug'],
+            title=row['title'],
+            description=row['description'] or '',
+        )
+        for row in rows
+        if row['slug'] not in existing
+    ]
+
+
+def build_posts(rows, images_dir):
+    authors = _ids(User, 'username', (row['author'] for row in rows))
+    groups = _ids(Group, 'slug', (row['group'] for row in rows))
+    loaded = _loaded(Post, rows, 'author_id', 'created')
+    posts = []
+    for row in rows:
+        pk = int(row['id'])
+        author_id = authors.get(row['author'])
+        created = _datetime(row['created'])
+        if pk in loaded:
+            _check_loaded(Post, pk, loaded[pk], (author_id, created))
+            continue
+        if author_id is None:
+            continue
+        image = row['image'] or ''
+        if image and images_dir is not None:
+            restore_image(images_dir, image)
+        posts.append(Post(
+            id=pk,
+            author_id=author_id,
+            group_id=groups.get(row['group']),
+            text=row['text'],
+            created=created,
+            image=image,
+        ))
+    return posts
+
+
+def build_comments(rows, images_dir):
+    authors = _ids(User, 'username', (row['author'] for row in rows))
+    # Пост с id из выгрузки - тот же пост: чужой build_posts не пропустил.
+    posts = set(_ids(Post, 'pk', (int(row['post']) for row in rows)))
+    loaded = _loaded(Comment, rows, 'post_id', 'author_id', 'created')
+    comments = []
+    for row in rows:
+        pk = int(row['id'])
+        post_id = int(row['post'])
+        author_id = authors.get(row['author'])
+        created = _datetime(row['created'])
+        if pk in loaded:
+            _check_loaded(
+                Comment, pk, loaded[pk], (post_id, author_id, created)
+            )
+            continue
+        if author_id is None or post_id not in posts:
+            continue
+        comments.append(Comment(
+            id=pk,
+            post_id=post_id,
+            author_id=author_id,
+            text=row['text'],
+            created=created,
+            # В старых выгрузках все комментарии корневые.
+            parent_id=int(row['parent']) if row.get('parent') else None,
+            path=row.get('path') or threads.make_path(pk),
+        ))
+    return comments
+
+
+def build_follows(rows, images_dir):
+    users = _ids(
+        User, 'username',
+        [row['user'] for row in rows] + [row['author'] for row in rows],
+    )
+    pairs = {
+        (users[row['user']], users[row['author']])
+        for row in rows
+        if row['user'] in users and row['author'] in users
+    }
+    existing = set(Follow.objects.filter(
+        user_id__in={user for user, _ in pairs},
+        author_id__in={author for _, author in pairs},
+    ).values_list('user_id', 'author_id'))
+    return [
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id, author_id in sorted(pairs - existing)
+    ]
+
+
+BUILDERS = {
+    'users': build_users,
+    'groups': build_groups,
+    'posts': build_posts,
+    'comments': build_comments,
+    'follows': build_follows,
+}
+
+
+def restore_image(images_dir, name):
+    """Кладёт картинку из дампа в хранилище, если её там нет."""
+    source = os.path.join(images_dir, name)
+    if os.path.isfile(source) and not default_storage.exists(name):
+        with open(source, 'rb') as file:
+            default_storage.save(name, File(file))
+
+
+def touched_scopes(objects):
+    """Области feed_cache, которые меняет пачка объектов."""
+    scopes = set()
+    for obj in objects:
+        if isinstance(obj, Post):
+            scopes.update(feed_cache.post_scopes(obj.author_id, obj.group_id))
+        elif isinstance(obj, Comment):
+            scopes.add(feed_cache.post_scope(obj.post_id))
+        elif isinstance(obj, Follow):
+            scopes.add(feed_cache.follow_scope(obj.user_id))
+            scopes.add(feed_cache.author_scope(obj.user_id))
+            scopes.add(feed_cache.author_scope(obj.author_id))
+    return scopes
+
+
+@contextmanager
+def keep_created(*models):
+    """Даёт bulk_create записать created из дампа.
+
+    auto_now_add иначе заменит дату временем загрузки.
+    """
+    fields = [model._meta.get_field('created') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+@contextmanager
+def deferred_indexes(*models):
+    """Снимает индексы Meta.indexes моделей на время загрузки.
+
+    Вставка без вторичных индексов быстрее, а построить индекс
+    по готовой таблице дешевле, чем обновлять его на каждой строке.
+    """
+    with connection.schema_editor() as editor:
+        for model in models:
+            for index in model._meta.indexes:
+                editor.remove_index(model, index)
+    try:
+        yield
+    finally:
+        with connection.schema_editor() as editor:
+            for model in models:
+                for index in model._meta.indexes:
+                    editor.add_index(model, index)
+
+
+def import_kind(directory, name, file_format, checkpoint, images=False):
+    """Загружает файл вида name, пропуская уже загруженные строки."""
+    path = data_path(directory, name, file_format)
+    if not os.path.exists(path):
+        return Stats(0, 0, 0)
+    kind = KINDS[name]
+    build = BUILDERS[name]
+    images_dir = os.path.join(directory, MEDIA_DIR) if images else None
+    checkpoint_path = os.path.join(directory, IMPORT_CHECKPOINT)
+    done = checkpoint.get(name, 0)
+    rows = islice(read_rows(path, file_format), done, None)
+    started = time.monotonic()
+    total = skipped = 0
+    scopes = set()
+    for batch in batches(rows):
+        objects = build(batch, images_dir)
+        with transaction.atomic():
+            # Уже загруженные строки отбросил build; ignore_conflicts
+            # страхует от повторов внутри самого файла.
+            kind.model.objects.bulk_create(objects, ignore_conflicts=True)
+        scopes |= touched_scopes(objects)
+        if len(scopes) >= BUMP_LIMIT:
+            feed_cache.bump(*scopes)
+            scopes.clear()
+        total += len(objects)
+        skipped += len(batch) - len(objects)
+        checkpoint[name] = done = done + len(batch)
+        write_checkpoint(checkpoint_path, checkpoint)
+    feed_cache.bump(*scopes)
+    return Stats(total, skipped, time.monotonic() - started)
+
+
+def rebuild():
+    """Пересобирает то, что при обычной записи делают сигналы."""
+    counters.reconcile()
+    timeline.rebuild()
+    search.rebuild()
+    group_stats.rebuild()
+
+
+def load(directory, file_format='ndjson', kinds=None, images=False,
+         resume=False, defer_indexes=False, rebuild_after=True):
+    """Загружает данные из каталога; возвращает Stats по видам."""
+    checkpoint_path = os.path.join(directory, IMPORT_CHECKPOINT)
+    checkpoint = read_checkpoint(checkpoint_path) if resume else {}
+    with ExitStack() as stack:
+        if defer_indexes:
+            stack.enter_context(deferred_indexes(Post, Comment))
+        stack.enter_context(keep_created(Post, Comment))
+        stats = {
+            name: import_kind(
+                directory, name, file_format, checkpoint, images
+            )
+            for name in kinds or KINDS
+        }
+    if rebuild_after:
+        rebuild()
+    return stats
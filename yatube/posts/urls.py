@@ -4,6 +4,7 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('groups/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
@@ -12,6 +13,12 @@ urlpatterns = [
     path(
         'posts/<int:post_id>/comment/', views.add_comment, name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.comment_list,
+        name='comments'
+    ),
+    path('search/', views.post_search, name='search'),
     path('follow/', views.follow_index, name='follow_index'),
     path(
         'profile/<str:username>/follow/',
@@ -23,4 +30,17 @@ urlpatterns = [
         views.profile_unfollow,
         name="profile_unfollow"
     ),
+    path(
+        'notifications/', views.notification_list, name='notifications'
+    ),
+    path(
+        'notifications/unread/',
+        views.notification_unread,
+        name='notifications_unread'
+    ),
+    path(
+        'notifications/read/',
+        views.notification_read,
+        name='notifications_read'
+    ),
 ]
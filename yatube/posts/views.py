@@ -1,58 +1,129 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect
+from django.db import transaction
+from django.http import Http404, JsonResponse
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.http import require_POST
 from .models import Post, User, Follow
-from .models import Group
+from .models import Comment, Group
 from .forms import PostForm, CommentForm
-from django.core.paginator import Paginator
+from . import counters, feed_cache, notifications, search, thumbnails
+from . import group_stats, revisions, threads, timeline
+from .conditional import conditional, lookup
+from core.db.routers import replica_reads
+from core.paginator import paginate
+from core.ratelimit import ratelimit
 from django.urls import reverse
 
+POSTS_PER_PAGE = 10
 
+
+def group_scopes(request, slug):
+    group_id = lookup(Group.objects, 'slug', slug)
+    return group_id and [feed_cache.group_scope(group_id)]
+
+
+def index_scopes(request):
+    return [feed_cache.index_scope()]
+
+
+def profile_scopes(request, username):
+    author_id = lookup(User.objects, 'username', username)
+    if author_id is None:
+        return None
+    scopes = [feed_cache.author_scope(author_id)]
+    if request.user.is_authenticated:
+        # Кнопка подписки зависит от подписок читателя.
+        scopes.append(feed_cache.follow_scope(request.user.pk))
+    return scopes
+
+
+def post_scopes(request, post_id):
+    row = lookup(Post.objects, 'pk', post_id, 'author_id', 'group_id')
+    if row is None:
+        return None
+    # Автор поста не меняется, а группу меняет правка поста,
+    # которая увеличивает и поколение самого поста.
+    return [
+        feed_cache.post_scope(post_id), *feed_cache.post_scopes(*row)
+    ]
+
+
+def groups_scopes(request):
+    return [feed_cache.groups_scope()]
+
+
+def follow_scopes(request):
+    return [
+        feed_cache.index_scope(), feed_cache.follow_scope(request.user.pk)
+    ]
+
+
+@replica_reads
+@conditional(groups_scopes)
+def group_index(request):
+    """Каталог групп по статистике posts.group_stats."""
+    sort = group_stats.get_sort(request.GET.get('sort'))
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    # Страница читается, только если фрагмент каталога не в кэше.
+    page_obj = SimpleLazyObject(
+        lambda: group_stats.page(sort, after, before)
+    )
+    context = {
+        'page_obj': page_obj,
+        'sort': sort,
+        'sorts': group_stats.SORT_TITLES,
+        **feed_cache.context(request, feed_cache.groups_scope()),
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
+@replica_reads
+@conditional(group_scopes)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts_list = group.posts.all()
-    page_number = request.GET.get('page')
-    page_obj = Paginator(posts_list, 10).get_page(page_number)
+    posts_list = group.posts.for_feed()
+    page_obj = paginate(request, posts_list, POSTS_PER_PAGE)
     context = {
         'page_obj': page_obj,
         'group': group,
+        **feed_cache.context(request, feed_cache.group_scope(group.pk)),
     }
     group_html = 'posts/group_list.html'
     return render(request, group_html, context)
 
 
+@replica_reads
+@conditional(index_scopes)
 def index(request):
-    post_list = Post.objects.all()
-    # Если порядок сортировки определен в классе Meta модели,
-    # запрос будет выглядить так:
-    # post_list = Post.objects.all()
-    # Показывать по 10 записей на странице.
-    paginator = Paginator(post_list, 10)
-
-    # Из URL извлекаем номер запрошенной страницы - это значение параметра page
-    page_number = request.GET.get('page')
-
-    # Получаем набор записей для страницы с запрошенным номером
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.for_feed()
+    # Страница выбирается по курсору ?after=/?before=,
+    # старые ссылки ?page=N продолжают работать.
+    page_obj = paginate(request, post_list, POSTS_PER_PAGE)
     # Отдаем в словаре контекста
     context = {
         'page_obj': page_obj,
+        **feed_cache.context(request, feed_cache.index_scope()),
     }
     return render(request, 'posts/index.html', context)
 
 
+@replica_reads
+@conditional(profile_scopes)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    number_posts = author.posts.count()
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    author_follow = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('profile'), username=username
+    )
+    author_profile = counters.get_profile(author)
+    number_posts = author_profile.posts_count
+    post_list = author.posts.for_feed()
+    page_obj = paginate(request, post_list, POSTS_PER_PAGE)
     follow = None
     if request.user.is_authenticated:
         follow_exist = Follow.objects.filter(
-            author=author_follow, user=request.user
+            author=author, user=request.user
         ).exists()
         if follow_exist:
             follow = 'following'
@@ -62,18 +133,27 @@ def profile(request, username):
         'page_obj': page_obj,
         'number_posts': number_posts,
         'author': author,
-        'following': follow
+        'author_profile': author_profile,
+        'following': follow,
+        **feed_cache.context(request, feed_cache.author_scope(author.pk)),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@replica_reads
+@conditional(post_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(Post.objects.for_detail(), pk=post_id)
+    order = threads.get_order(request.GET.get('order'))
+    after = request.GET.get('after')
+    if after:
+        comment_page = threads.page(post.pk, order, after)
+    else:
+        comment_page = threads.first_page(post.pk, order)
     user = request.user
     username = post.author
     form_comment = CommentForm(request.POST or None)
-    number_posts = username.posts.count()
+    number_posts = counters.get_profile(username).posts_count
     post_title = post.text[0:29]
     context = {
         'post_title': post_title,
@@ -81,14 +161,66 @@ def post_detail(request, post_id):
         'number_posts': number_posts,
         'user': user,
         'username': username,
-        'comments': comments,
+        'comments': comment_page.comments,
+        'next_cursor': comment_page.next_cursor,
+        'order': order,
+        'orderings': threads.ORDER_TITLES,
         'form_comment': form_comment,
 
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@replica_reads
+@conditional(post_scopes)
+def comment_list(request, post_id):
+    """Следующая страница комментариев или ответов ветки ?parent=.
+
+    Отдаёт фрагмент HTML для кнопки «Показать ещё», с ?format=json -
+    JSON.
+    """
+    parent = request.GET.get('parent', '')
+    if not lookup(Post.objects, 'pk', post_id) or (
+        parent and not parent.isdigit()
+    ):
+        raise Http404
+    order = threads.get_order(request.GET.get('order'))
+    comment_page = threads.page(
+        post_id, order, request.GET.get('after'),
+        int(parent) if parent else None,
+    )
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                threads.as_dict(comment) for comment in comment_page.comments
+            ],
+            'next': comment_page.next_cursor,
+        }, json_dumps_params={'ensure_ascii': False})
+    context = {
+        'post_id': post_id,
+        'comments': comment_page.comments,
+        'next_cursor': comment_page.next_cursor,
+        'order': order,
+        'parent': parent,
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+def post_search(request):
+    query = request.GET.get('q', '').strip()
+    after = request.GET.get('after')
+    posts, next_cursor = search.search(query, after, POSTS_PER_PAGE)
+    context = {
+        'query': query,
+        'posts': posts,
+        'next_cursor': next_cursor,
+        'is_first_page': not after,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
+@ratelimit('post')
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -98,7 +230,14 @@ def post_create(request):
     if request.method == 'POST' and form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        post.image_hash = form.image_hash
+        with transaction.atomic():
+            post.save()
+            counters.change(request.user.pk, posts_count=1)
+            # Миниатюры и уведомления подписчикам готовятся в фоне
+            # после фиксации транзакции.
+            thumbnails.schedule(post)
+            notifications.enqueue(post)
         return redirect(reverse(
             'posts:profile', kwargs={'username': f'{author_user}'})
         )
@@ -110,12 +249,14 @@ def post_create(request):
 def post_edit(request, post_id):
     is_edit = 'is_edit'
     post = get_object_or_404(Post, pk=post_id)
+    if post.author_id != request.user.pk:
+        return redirect('posts:post_detail', post_id=post.pk)
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
         instance=post)
     if request.method == 'POST' and form.is_valid():
-        post.save()
+        revisions.save_edit(post, form)
         return redirect(reverse(
             'posts:post_detail', kwargs={'post_id': f'{post.pk}'})
         )
@@ -129,54 +270,102 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('comment')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
+    parent = None
+    parent_id = request.POST.get('parent', '')
+    if parent_id.isdigit():
+        parent = Comment.objects.filter(
+            pk=parent_id, post=post
+        ).only('parent_id').first()
     if form.is_valid():
-        comment = form.save(commit=False)
-        comment.author = request.user
-        comment.post = post
-        comment.save()
+        threads.add(
+            post, request.user, form.cleaned_data['text'], parent
+        )
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
+@replica_reads
+@conditional(follow_scopes)
 def follow_index(request):
     # информация о текущем пользователе доступна в переменной request.user
-    posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, 10)
-
-    # Из URL извлекаем номер запрошенной страницы - это значение параметра page
-    page_number = request.GET.get('page')
-
-    # Получаем набор записей для страницы с запрошенным номером
-    page_obj = paginator.get_page(page_number)
+    posts = timeline.feed_for(request.user).for_feed()
+    page_obj = paginate(
+        request, posts, POSTS_PER_PAGE, timeline.paginator(request.user)
+    )
     # Отдаем в словаре контекста
     context = {
         'page_obj': page_obj,
+        **feed_cache.context(
+            request,
+            feed_cache.index_scope(),
+            feed_cache.follow_scope(request.user.pk),
+        ),
     }
 
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@ratelimit('follow', methods=None)
 def profile_follow(request, username):
     # Подписаться на автора
 
     author_follow = get_object_or_404(User, username=username)
     if author_follow != request.user:
-        Follow.objects.get_or_create(
-            user=request.user,
-            author=author_follow
-        )
+        with transaction.atomic():
+            _, created = Follow.objects.get_or_create(
+                user=request.user,
+                author=author_follow
+            )
+            if created:
+                counters.change(request.user.pk, following_count=1)
+                counters.change(author_follow.pk, followers_count=1)
     return redirect('posts:profile', username=username)
 
 
 @login_required
+@ratelimit('follow', methods=None)
 def profile_unfollow(request, username):
     # Дизлайк, отписка
     follow = Follow.objects.filter(
         author__username=username, user=request.user
     )
-    follow.delete()
+    author_ids = list(follow.values_list('author_id', flat=True))
+    with transaction.atomic():
+        _, deleted = follow.delete()
+        removed = deleted.get(Follow._meta.label, 0)
+        if removed:
+            counters.change(request.user.pk, following_count=-removed)
+            counters.change(author_ids[0], followers_count=-removed)
     return redirect('posts:profile', username=username)
+
+
+@login_required
+def notification_list(request):
+    user_notifications = request.user.notifications.select_related(
+        'post__author'
+    )
+    page_obj = paginate(request, user_notifications, POSTS_PER_PAGE)
+    context = {
+        'page_obj': page_obj,
+        'unread': counters.get_profile(request.user).unread_notifications,
+    }
+    return render(request, 'posts/notifications.html', context)
+
+
+@login_required
+def notification_unread(request):
+    # Число берётся из счётчика профиля, а не COUNT по уведомлениям.
+    profile = counters.get_profile(request.user)
+    return JsonResponse({'unread': profile.unread_notifications})
+
+
+@login_required
+@require_POST
+def notification_read(request):
+    notifications.mark_read(request.user)
+    return redirect('posts:notifications')
@@ -1 +0,0 @@
-document.getElementById("redirect_to").focus();
@@ -4,6 +4,10 @@ from django.contrib.auth.forms import (
     PasswordResetForm
 )
 from django.contrib.auth import get_user_model
+from django.template import loader
+
+from core import jobs
+from . import mail
 
 User = get_user_model()
 
@@ -22,3 +26,19 @@ class ChangeForm(PasswordChangeForm):
 class ResetForm(PasswordResetForm):
     model = User
     fields = ('email')
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        # Письма отправляет воркер очереди, а не запрос пользователя.
+        subject = loader.render_to_string(subject_template_name, context)
+        subject = ''.join(subject.splitlines())
+        body = loader.render_to_string(email_template_name, context)
+        html_body = None
+        if html_email_template_name is not None:
+            html_body = loader.render_to_string(
+                html_email_template_name, context
+            )
+        jobs.enqueue(
+            mail.send, subject, body, from_email, [to_email], html_body
+        )
@@ -0,0 +1,9 @@
+from django.core.mail import EmailMultiAlternatives
+
+
+def send(subject, body, from_email, to, html_body=None):
+    """Отправляет письмо; вызывается задачей очереди core.jobs."""
+    message = EmailMultiAlternatives(subject, body, from_email, to)
+    if html_body:
+        message.attach_alternative(html_body, 'text/html')
+    message.send()
@@ -10,6 +10,7 @@ from django.contrib.auth.views import (
 )
 from django.urls import path
 from . import views
+from .forms import ResetForm
 
 app_name = 'users'
 
@@ -44,7 +45,8 @@ urlpatterns = [
     path(
         'password_reset/',
         PasswordResetView.as_view(
-            template_name='users/password_reset_form.html'
+            template_name='users/password_reset_form.html',
+            form_class=ResetForm
         ),
         name='password_reset'
 
@@ -11,6 +11,8 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import sys
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -42,9 +44,9 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'sorl.thumbnail',
     'core',
-    'posts',
+    'posts.apps.PostsConfig',
     'about',
-    'debug_toolbar',
+    'api',
 ]
 
 MIDDLEWARE = [
@@ -55,18 +57,34 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.PrimaryPinMiddleware',
+    'core.ratelimit.RateLimitMiddleware',
 ]
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
 
 
 ROOT_URLCONF = 'yatube.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    # Шаблон компилируется один раз на процесс; в разработке правки
+    # шаблонов видны без перезапуска.
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backend.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -84,12 +102,39 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Соединение живёт CONN_MAX_AGE секунд и переиспользуется запросами
+# потока; PRAGMA и повторы при блокировке см. core.db.backends.sqlite3.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    # Копия default, которую обновляет manage.py replicate. В тестах
+    # реплика - та же БД, что и default.
+    'replica': {
+        'ENGINE': 'core.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'pragmas': {'query_only': 1},
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
 }
+# Ленты читаются с реплик из DATABASE_REPLICAS (например, ['replica'],
+# когда запущен manage.py replicate), см. core.db.routers.
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+DATABASE_REPLICAS = []
+DATABASE_REPLICA_SELECTION = 'round_robin'
+# Сколько секунд после записи пользователь читает только default.
+DATABASE_PIN_SECONDS = 10
 
 
 # Password validation
@@ -129,7 +174,12 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
-STATIC_ROOT = os.path.join(BASE_DIR, "static")
+# Исходники статики лежат в static/, collectstatic собирает их вместе
+# со статикой приложений в staticfiles/ с хэшами в именах.
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+
 LANGUAGE_CODE = 'ru'
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -137,9 +187,21 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join('sent_emails')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Кэш общий для всех воркеров на машине. Для кэша внутри одного
+# процесса можно вернуть django.core.cache.backends.locmem.LocMemCache.
+# Тесты очищают кэш и пишут в него свои фрагменты, поэтому у них
+# отдельный файл; бенчмарки заводят свой рядом со своей БД.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': (
+            os.path.join(tempfile.gettempdir(), 'yatube-test-cache.sqlite3')
+            if TESTING else os.path.join(BASE_DIR, 'cache.sqlite3')
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
     }
 }
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
@@ -147,3 +209,85 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
+# Авторы, у которых больше подписчиков, не рассылают посты по лентам
+# при публикации: их посты подмешиваются в ленту при чтении.
+TIMELINE_FANOUT_LIMIT = 1000
+# Фрагменты лент сбрасываются сигналами через счётчики поколений,
+# таймаут лишь ограничивает время жизни неиспользуемых записей.
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+# Очередь фоновых задач core.jobs, которую выполняет manage.py runworker.
+# При JOBS_EAGER задачи выполняются сразу, без очереди.
+JOBS_EAGER = False
+JOBS_WORKER_THREADS = 4
+JOBS_POLL_INTERVAL = 1
+JOBS_MAX_ATTEMPTS = 5
+# Повтор через JOBS_RETRY_BACKOFF * 2**(попытка - 1) секунд.
+JOBS_RETRY_BACKOFF = 10
+JOBS_RETRY_BACKOFF_MAX = 60 * 60
+# Задача, взятая воркером дольше этого времени назад, считается брошенной.
+JOBS_LOCK_TIMEOUT = 60 * 30
+# Сколько дней хранить завершённые задачи.
+JOBS_KEEP_DAYS = 7
+# Миниатюры картинок постов, которые строятся при загрузке:
+# имя -> (геометрия sorl-thumbnail, параметры).
+POST_IMAGE_RENDITIONS = {
+    'feed': ('960x339', {'crop': 'center', 'upscale': True}),
+    'detail': ('1280', {'upscale': False}),
+}
+# Загрузки больше мегабайта пишутся на диск частями,
+# а не собираются в памяти процесса.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
+# Ограничения загружаемых картинок постов.
+POST_IMAGE_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 50 * 1000 * 1000
+POST_IMAGE_MAX_SIDE = 2560
+POST_IMAGE_JPEG_QUALITY = 85
+# Поиск по постам: 'auto' - FTS5, если БД на SQLite с FTS5,
+# иначе обратный индекс в таблице; 'fts5' или 'index' - явно.
+POSTS_SEARCH_BACKEND = 'auto'
+# Метрики процесса в формате Prometheus: страница /metrics/ для
+# администраторов и файл, перезаписываемый раз в METRICS_DUMP_INTERVAL
+# секунд. {pid} различает воркеры; пустое значение отключает файл.
+METRICS_FILE = os.path.join(BASE_DIR, 'metrics', 'yatube-{pid}.prom')
+METRICS_DUMP_INTERVAL = 15
+# Запросы дольше SLOW_REQUEST_MS миллисекунд с вероятностью
+# SLOW_REQUEST_SAMPLE_RATE пишутся в журнал вместе с самыми долгими SQL.
+SLOW_REQUEST_MS = 500
+SLOW_REQUEST_SAMPLE_RATE = 0.1
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'slow_requests': {
+            'class': 'logging.FileHandler',
+            'filename': os.path.join(BASE_DIR, 'slow_requests.log'),
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'yatube.slow_requests': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+# Cache-Control для статики без хэша в имени и для загруженных файлов;
+# файлы с хэшем core.fileserver отдаёт с max-age на год.
+STATIC_MAX_AGE = 60 * 60
+MEDIA_MAX_AGE = 60 * 60 * 24
+# Лимиты частоты core.ratelimit по группам: 'число/период' (s, m, h, d).
+RATE_LIMITS = {
+    'post': '10/m',
+    'comment': '30/m',
+    'follow': '60/m',
+    # Все изменяющие запросы с одного IP, см. RateLimitMiddleware.
+    'write': '300/m',
+}
+RATE_LIMIT_MIDDLEWARE_GROUP = 'write'
+# Сколько своих обратных прокси стоит перед приложением. При 0 клиент -
+# REMOTE_ADDR; иначе адрес берётся из X-Forwarded-For, а записи, которые
+# клиент дописал сам, не учитываются. Без верного значения за прокси
+# все клиенты делят один лимит.
+RATE_LIMIT_TRUSTED_PROXIES = 0
+RATE_LIMIT_CACHE = 'default'
@@ -19,18 +19,21 @@ from django.urls import include, path
 from django.conf.urls.static import static
 from django.conf import settings
 
+from core.views import metrics_export
 
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
     path('about/', include('about.urls', namespace='about')),
+    path('api/v1/', include('api.urls', namespace='api')),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
-    path('admin/', admin.site.urls)
+    path('admin/', admin.site.urls),
+    path('metrics/', metrics_export, name='metrics'),
 ] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 
-#if settings.DEBUG:
-    #import debug_toolbar
-    #urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)
+if settings.DEBUG:
+    import debug_toolbar
+    urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)
 urlpatterns += static(
     settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
 )
@@ -13,4 +13,10 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
-application = get_wsgi_application()
+from core.fileserver import FileServer  # noqa: E402
+from core.template_backend import warm_up  # noqa: E402
+
+# Статика и загруженные файлы отдаются до Django, см. core.fileserver.
+application = FileServer(get_wsgi_application())
+# Шаблоны компилируются до первого запроса.
+warm_up()